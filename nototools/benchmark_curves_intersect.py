@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare the pruned and exhaustive intersection checks in noto_lint.
+
+For each glyph in the fonts, this runs noto_lint.curves_intersect both with
+and without bounding box pruning, checks that they report the same result,
+and prints the time each took, with the slowest glyphs.
+"""
+
+import argparse
+import time
+
+from fontTools import ttLib
+
+from nototools import noto_lint
+
+
+def glyph_contours(glyph):
+  """Returns the contours of a simple glyf glyph as noto_lint builds them, a
+  list of lists of curves from one on-curve point to the next."""
+  contours = []
+  start_point = 0
+  for end_point in glyph.endPtsOfContours:
+    curves = []
+    for point in range(start_point, end_point + 1):
+      if glyph.flags[point] & 1:
+        next_point = point
+        while True:
+          next_point = noto_lint.next_circular_point(
+              next_point, start_point, end_point)
+          if glyph.flags[next_point] & 1:
+            break
+        curves.append(noto_lint.curve_between(
+            glyph.coordinates, point, next_point, start_point, end_point))
+    contours.append(curves)
+    start_point = end_point + 1
+  return contours
+
+
+def _time_check(contours, prune):
+  start = time.time()
+  result = noto_lint.curves_intersect(contours, prune=prune)
+  return result, time.time() - start
+
+
+def benchmark_font(font_file, num_slowest):
+  font = ttLib.TTFont(font_file)
+  if 'glyf' not in font:
+    print '%s: no glyf table' % font_file
+    return 0, 0
+
+  glyf_table = font['glyf']
+  times = []
+  mismatches = 0
+  for glyph_name in glyf_table.glyphOrder:
+    glyph = glyf_table[glyph_name]
+    if glyph.numberOfContours <= 0:
+      continue
+    contours = glyph_contours(glyph)
+    old_result, old_time = _time_check(contours, False)
+    new_result, new_time = _time_check(contours, True)
+    if old_result != new_result:
+      mismatches += 1
+      print 'mismatch in %s:\n  exhaustive: %s\n  pruned: %s' % (
+          glyph_name, old_result, new_result)
+    times.append((old_time, new_time, glyph_name))
+
+  old_total = sum(t[0] for t in times)
+  new_total = sum(t[1] for t in times)
+  print '%s: %d glyphs, exhaustive %.3fs, pruned %.3fs (%.1fx), %d mismatches' % (
+      font_file, len(times), old_total, new_total,
+      old_total / new_total if new_total else 0, mismatches)
+  for old_time, new_time, glyph_name in sorted(times, reverse=True)[
+      :num_slowest]:
+    print '  %-24s exhaustive %.4fs, pruned %.4fs' % (
+        glyph_name, old_time, new_time)
+  return old_total, new_total
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+      'fonts', help='font files to check', metavar='font', nargs='+')
+  parser.add_argument(
+      '-n', '--num_slowest', help='number of slowest glyphs to list per font '
+      '(default 5)', metavar='n', type=int, default=5)
+  args = parser.parse_args()
+
+  old_total = new_total = 0
+  for font_file in args.fonts:
+    old_time, new_time = benchmark_font(font_file, args.num_slowest)
+    old_total += old_time
+    new_total += new_time
+  if len(args.fonts) > 1:
+    print 'total: exhaustive %.3fs, pruned %.3fs' % (old_total, new_total)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,345 @@
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A compact set of code points.
+
+Code point sets in the noto tools are mostly made of long runs of consecutive
+code points (blocks, scripts, font cmaps), so a CodepointSet stores the runs
+instead of the individual code points.  It keeps a sorted list of range
+boundaries: the first code point of each run followed by the code point after
+its last one.  A code point is in the set if an odd number of boundaries are
+less than or equal to it.  Set algebra merges the boundary lists, so its cost
+depends on the number of runs rather than the number of code points.
+
+CodepointSet supports the same API as set, and set operations that mix a
+CodepointSet with a set or frozenset return a CodepointSet.  Like set, it is
+mutable and so is not hashable.  tool_utils.parse_int_ranges and
+tool_utils.write_int_ranges convert between CodepointSets and the hex range
+string format.
+"""
+
+import bisect
+import collections
+import itertools
+
+
+class CodepointSet(collections.MutableSet):
+  """A mutable set of code points stored as sorted runs."""
+
+  __slots__ = ('_bounds',)
+
+  def __init__(self, cps=()):
+    """Creates a set from an iterable of code points."""
+    if isinstance(cps, CodepointSet):
+      self._bounds = cps._bounds[:]
+      return
+    bounds = []
+    for cp in sorted(set(cps)):
+      if bounds and bounds[-1] == cp:
+        bounds[-1] = cp + 1
+      else:
+        bounds.extend((cp, cp + 1))
+    self._bounds = bounds
+
+  @classmethod
+  def from_ranges(cls, ranges):
+    """Creates a set from an iterable of inclusive (first, last) ranges.  The
+    ranges can be in any order and can overlap."""
+    bounds = []
+    for first, last in sorted(ranges):
+      if first > last:
+        raise ValueError('range %04x-%04x is reversed' % (first, last))
+      if bounds and first <= bounds[-1]:
+        bounds[-1] = max(bounds[-1], last + 1)
+      else:
+        bounds.extend((first, last + 1))
+    return cls._from_bounds(bounds)
+
+  @classmethod
+  def _from_bounds(cls, bounds):
+    result = cls.__new__(cls)
+    result._bounds = bounds
+    return result
+
+  @classmethod
+  def _from_iterable(cls, it):
+    # used by the collections.Set mixin methods
+    return cls(it)
+
+  def ranges(self):
+    """Returns the list of inclusive (first, last) ranges in the set, in
+    order."""
+    bounds = self._bounds
+    return [(bounds[i], bounds[i + 1] - 1) for i in xrange(0, len(bounds), 2)]
+
+  def range_count(self):
+    """Returns the number of runs in the set."""
+    return len(self._bounds) // 2
+
+  # Set
+
+  def __contains__(self, cp):
+    return bisect.bisect_right(self._bounds, cp) & 1 == 1
+
+  def __iter__(self):
+    bounds = self._bounds
+    return itertools.chain.from_iterable(
+        xrange(bounds[i], bounds[i + 1]) for i in xrange(0, len(bounds), 2))
+
+  def __reversed__(self):
+    bounds = self._bounds
+    return itertools.chain.from_iterable(
+        xrange(bounds[i + 1] - 1, bounds[i] - 1, -1)
+        for i in xrange(len(bounds) - 2, -1, -2))
+
+  def __len__(self):
+    bounds = self._bounds
+    return sum(bounds[i + 1] - bounds[i] for i in xrange(0, len(bounds), 2))
+
+  def __nonzero__(self):
+    return bool(self._bounds)
+
+  def __repr__(self):
+    return '%s.from_ranges(%r)' % (type(self).__name__, self.ranges())
+
+  def __eq__(self, other):
+    if isinstance(other, CodepointSet):
+      return self._bounds == other._bounds
+    if isinstance(other, collections.Set):
+      return len(self) == len(other) and all(cp in self for cp in other)
+    return NotImplemented
+
+  def __ne__(self, other):
+    result = self.__eq__(other)
+    return result if result is NotImplemented else not result
+
+  __hash__ = None
+
+  def __le__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return not self._combine(other, _DIFFERENCE)
+
+  def __lt__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return self <= other and self != other
+
+  def __ge__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return not _as_codepoint_set(other)._combine(self, _DIFFERENCE)
+
+  def __gt__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return self >= other and self != other
+
+  def __and__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return self._from_bounds(self._combine(other, _INTERSECTION))
+
+  def __or__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return self._from_bounds(self._combine(other, _UNION))
+
+  def __sub__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return self._from_bounds(self._combine(other, _DIFFERENCE))
+
+  def __xor__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return self._from_bounds(self._combine(other, _SYMMETRIC_DIFFERENCE))
+
+  __rand__ = __and__
+  __ror__ = __or__
+  __rxor__ = __xor__
+
+  def __rsub__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    return _as_codepoint_set(other) - self
+
+  def isdisjoint(self, other):
+    return not self._combine(other, _INTERSECTION)
+
+  def issubset(self, other):
+    return self <= _as_codepoint_set(other)
+
+  def issuperset(self, other):
+    return self >= _as_codepoint_set(other)
+
+  def union(self, *others):
+    result = self.copy()
+    result.update(*others)
+    return result
+
+  def intersection(self, *others):
+    result = self.copy()
+    result.intersection_update(*others)
+    return result
+
+  def difference(self, *others):
+    result = self.copy()
+    result.difference_update(*others)
+    return result
+
+  def symmetric_difference(self, other):
+    result = self.copy()
+    result.symmetric_difference_update(other)
+    return result
+
+  def copy(self):
+    return self._from_bounds(self._bounds[:])
+
+  # MutableSet
+
+  def add(self, cp):
+    bounds = self._bounds
+    i = bisect.bisect_right(bounds, cp)
+    if i & 1:
+      return
+    if i > 0 and bounds[i - 1] == cp:
+      # extends the previous run, possibly joining it to the next one
+      if i < len(bounds) and bounds[i] == cp + 1:
+        del bounds[i - 1:i + 1]
+      else:
+        bounds[i - 1] = cp + 1
+    elif i < len(bounds) and bounds[i] == cp + 1:
+      bounds[i] = cp
+    else:
+      bounds[i:i] = [cp, cp + 1]
+
+  def discard(self, cp):
+    bounds = self._bounds
+    i = bisect.bisect_right(bounds, cp)
+    if not i & 1:
+      return
+    start, limit = bounds[i - 1], bounds[i]
+    if start == cp and limit == cp + 1:
+      del bounds[i - 1:i + 1]
+    elif start == cp:
+      bounds[i - 1] = cp + 1
+    elif limit == cp + 1:
+      bounds[i] = cp
+    else:
+      bounds[i:i] = [cp, cp + 1]
+
+  def remove(self, cp):
+    if cp not in self:
+      raise KeyError(cp)
+    self.discard(cp)
+
+  def pop(self):
+    if not self._bounds:
+      raise KeyError('pop from an empty CodepointSet')
+    cp = self._bounds[0]
+    self.discard(cp)
+    return cp
+
+  def clear(self):
+    self._bounds = []
+
+  def update(self, *others):
+    for other in others:
+      self._bounds = self._combine(other, _UNION)
+
+  def intersection_update(self, *others):
+    for other in others:
+      self._bounds = self._combine(other, _INTERSECTION)
+
+  def difference_update(self, *others):
+    for other in others:
+      self._bounds = self._combine(other, _DIFFERENCE)
+
+  def symmetric_difference_update(self, other):
+    self._bounds = self._combine(other, _SYMMETRIC_DIFFERENCE)
+
+  def __ior__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    self.update(other)
+    return self
+
+  def __iand__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    self.intersection_update(other)
+    return self
+
+  def __isub__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    self.difference_update(other)
+    return self
+
+  def __ixor__(self, other):
+    if not isinstance(other, collections.Set):
+      return NotImplemented
+    self.symmetric_difference_update(other)
+    return self
+
+  # pickle support, __slots__ classes have no __dict__.  The state is wrapped
+  # in a tuple since pickle skips __setstate__ for a false state, such as the
+  # bounds of an empty set.
+
+  def __getstate__(self):
+    return (self._bounds,)
+
+  def __setstate__(self, state):
+    self._bounds = state[0]
+
+  def _combine(self, other, keep):
+    """Returns the boundary list of the code points for which
+    keep[in self][in other] is true."""
+    a = self._bounds
+    b = _as_codepoint_set(other)._bounds
+    result = []
+    len_a = len(a)
+    len_b = len(b)
+    i = j = 0
+    inside = False
+    while i < len_a or j < len_b:
+      if j == len_b or (i < len_a and a[i] < b[j]):
+        cp = a[i]
+        i += 1
+      elif i == len_a or b[j] < a[i]:
+        cp = b[j]
+        j += 1
+      else:
+        cp = a[i]
+        i += 1
+        j += 1
+      # i and j are now the counts of bounds <= cp, odd means cp is inside
+      now_inside = keep[i & 1][j & 1]
+      if now_inside != inside:
+        result.append(cp)
+        inside = now_inside
+    return result
+
+
+def _as_codepoint_set(cps):
+  return cps if isinstance(cps, CodepointSet) else CodepointSet(cps)
+
+
+# Tables for CodepointSet._combine, indexed by whether a code point is in the
+# first set and then by whether it is in the second.
+_UNION = ((False, True), (True, True))
+_INTERSECTION = ((False, False), (False, True))
+_DIFFERENCE = ((False, False), (True, False))
+_SYMMETRIC_DIFFERENCE = ((False, True), (True, False))
@@ -22,9 +22,8 @@ import os
 from os import path
 import re
 
-from fontTools import ttLib
-
 import cldr_data
+import font_caching
 import font_data
 import lint_config
 import render
@@ -448,8 +447,8 @@ class FontCompare(object):
 
 def check_font(target_file, test_file, incremental_version=False, emit_config=False,
                reverse=False, ignored_cp=None, only_cp=None, enabled_tests=None):
-  target = ttLib.TTFont(target_file)
-  test = ttLib.TTFont(test_file)
+  target = font_caching.open_font(target_file)
+  test = font_caching.open_font(test_file)
   if reverse:
     print 'reversing comparison'
     temp = target
@@ -184,9 +184,9 @@ def tuple_compare_no_size(base_t, target_t):
 
 def compare_summary(base_root, target_root, name=None, comparefn=tuple_compare,
                     show_added=True, show_removed=True, show_identical=True,
-                    show_paths=True):
-  base_map = summary_to_map(summary.summarize(base_root, name))
-  target_map = summary_to_map(summary.summarize(target_root, name))
+                    show_paths=True, jobs=1):
+  base_map = summary_to_map(summary.summarize(base_root, name, jobs))
+  target_map = summary_to_map(summary.summarize(target_root, name, jobs))
   added, removed, changed, identical = get_key_lists(base_map, target_map,
                                                      base_root, target_root)
 
@@ -233,6 +233,9 @@ def main():
                       action='store_true')
   parser.add_argument('--nopaths', help='do not print root paths', action='store_false',
                       default=True, dest='show_paths')
+  parser.add_argument('-j', '--jobs', help='number of fonts to read in parallel '
+                      '(default 1, 0 for one per cpu)', type=int, default=1,
+                      metavar='n')
   args = parser.parse_args()
 
   args.base_root = tool_utils.resolve_path(args.base_root)
@@ -249,7 +252,8 @@ def main():
   comparefn = tuple_compare if args.compare_size else tuple_compare_no_size
 
   compare_summary(args.base_root, args.target_root, args.name, comparefn,
-                  args.added, args.removed, args.identical, args.show_paths)
+                  args.added, args.removed, args.identical, args.show_paths,
+                  args.jobs)
 
 if __name__ == '__main__':
   main()
@@ -25,9 +25,10 @@ import re
 import sys
 import unicode_data
 
+from nototools import font_caching
 from nototools import lint_config
-
-from fontTools import ttLib
+from nototools import tool_utils
+from nototools.codepoint_set import CodepointSet
 
 
 def character_set(font):
@@ -37,10 +38,10 @@ def character_set(font):
     font: The input font's file name, or a TTFont.
 
   Returns:
-    A frozenset listing the characters supported in the font.
+    A CodepointSet listing the characters supported in the font.
   """
   if type(font) is str:
-    font = ttLib.TTFont(font, fontNumber=0)
+    font = font_caching.open_font(font, fontNumber=0)
   cmap_table = font['cmap']
   cmaps = {}
   for table in cmap_table.tables:
@@ -54,21 +55,12 @@ def character_set(font):
     cmap = cmaps[4]
   else:
     cmap = {}
-  return frozenset(cmap.keys())
+  return CodepointSet(cmap)
 
 
 def convert_set_to_ranges(charset):
   """Converts a set of characters to a list of ranges."""
-  working_set = set(charset)
-  output_list = []
-  while working_set:
-    start = min(working_set)
-    end = start + 1
-    while end in working_set:
-      end += 1
-    output_list.append((start, end - 1))
-    working_set.difference_update(range(start, end))
-  return output_list
+  return list(tool_utils.iter_int_ranges(charset))
 
 
 def _print_char_info(chars):
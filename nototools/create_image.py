@@ -21,6 +21,7 @@ __author__ = 'roozbeh@google.com (Roozbeh Pournader)'
 
 import argparse
 import codecs
+import collections
 import os
 from os import path
 import string
@@ -122,11 +123,8 @@ def make_drawparams(**kwargs):
   return dp
 
 
-def draw_on_surface(surface, text, params):
-    """Draw the string on a pre-created surface and return height."""
-    pangocairo_ctx = pangocairo.CairoContext(cairo.Context(surface))
-    layout = pangocairo_ctx.create_layout()
-
+def _set_up_layout(layout, params):
+    """Sets the font, direction and dimensions of a layout from params."""
     pango_ctx = layout.get_context()
     if params.language is not None:
         pango_ctx.set_language(pango.Language(params.language))
@@ -196,6 +194,12 @@ def draw_on_surface(surface, text, params):
     layout.set_spacing((params.line_spacing - params.font_size) * pango.SCALE)
     pango_ctx.set_base_dir(base_dir)
     layout.context_changed()
+
+
+def _set_layout_text(layout, text, params):
+    """Sets the text of a layout set up by _set_up_layout, truncated to
+    params.maxheight, and returns the top and bottom of its extents."""
+    width = params.width - 2 * params.horiz_margin
     layout.set_text(text)
 
     if params.maxheight:
@@ -227,61 +231,129 @@ def draw_on_surface(surface, text, params):
           extents, params.width, params.horiz_margin)
     top_usage = min(extents[0][1], extents[1][1], 0)
     bottom_usage = max(extents[0][3], extents[1][3])
+    return top_usage, bottom_usage
+
 
+def _draw_layout(pangocairo_ctx, layout, params, top_usage):
+    """Draws a layout with its text set by _set_layout_text."""
     pangocairo_ctx.set_antialias(cairo.ANTIALIAS_GRAY)
     pangocairo_ctx.set_source_rgb(1, 1, 1)  # White background
     pangocairo_ctx.paint()
 
     pangocairo_ctx.translate(params.horiz_margin, -top_usage)
     pangocairo_ctx.set_source_rgb(0, 0, 0)  # Black text color
+    pangocairo_ctx.update_layout(layout)
     pangocairo_ctx.show_layout(layout)
 
-    return bottom_usage - top_usage
 
+def draw_on_surface(surface, text, params):
+    """Draw the string on a pre-created surface and return height."""
+    pangocairo_ctx = pangocairo.CairoContext(cairo.Context(surface))
+    layout = pangocairo_ctx.create_layout()
+    _set_up_layout(layout, params)
+    top_usage, bottom_usage = _set_layout_text(layout, text, params)
+    _draw_layout(pangocairo_ctx, layout, params, top_usage)
+    return bottom_usage - top_usage
 
-def create_svg(text, output_path, **kwargs):
-    """Creates an SVG image from the given text."""
 
-    setup_fonts_conf()
+class Renderer(object):
+    """Renders text to images, for rendering many images in a row.
+
+    Fontconfig is set up once.  The text is measured using a layout on an
+    empty surface of the image's type, and the layouts for the most recently
+    used max_layouts sets of DrawParams are kept, so rendering with the same
+    font and parameters again only sets the text."""
+
+    def __init__(self, max_layouts=256):
+        setup_fonts_conf()
+        self.max_layouts = max_layouts
+        self._measure_ctxs = {
+            'svg': pangocairo.CairoContext(cairo.Context(
+                cairo.SVGSurface(None, 0, 0))),
+            'png': pangocairo.CairoContext(cairo.Context(
+                cairo.ImageSurface(cairo.FORMAT_ARGB32, 0, 0)))}
+        self._layouts = collections.OrderedDict()
+
+    def _layout(self, image_type, params):
+        """Returns the layout for the image type and params, set up to
+        measure text."""
+        key = (image_type, tuple(sorted(params.__dict__.iteritems())))
+        layout = self._layouts.pop(key, None)
+        measure_ctx = self._measure_ctxs[image_type]
+        if layout is None:
+            layout = measure_ctx.create_layout()
+            _set_up_layout(layout, params)
+            if len(self._layouts) >= self.max_layouts:
+                self._layouts.popitem(last=False)
+        else:
+            # drawing the layout matched it to another cairo context
+            measure_ctx.update_layout(layout)
+        self._layouts[key] = layout
+        return layout
+
+    def create_svg(self, text, output_path, **kwargs):
+        """Creates an SVG image from the given text."""
+        params = make_drawparams(**kwargs)
+        layout = self._layout('svg', params)
+        top_usage, bottom_usage = _set_layout_text(layout, text, params)
+
+        surface = cairo.SVGSurface(
+            output_path, params.width, bottom_usage - top_usage)
+        print 'writing', output_path
+        _draw_layout(pangocairo.CairoContext(cairo.Context(surface)), layout,
+                     params, top_usage)
+        surface.flush()
+        surface.finish()
+
+    def create_png(self, text, output_path, **kwargs):
+        """Creates a PNG image from the given text."""
+        params = make_drawparams(**kwargs)
+        layout = self._layout('png', params)
+        top_usage, bottom_usage = _set_layout_text(layout, text, params)
+
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32, params.width, bottom_usage - top_usage)
+        _draw_layout(pangocairo.CairoContext(cairo.Context(surface)), layout,
+                     params, top_usage)
+        print 'writing', output_path
+        surface.write_to_png(output_path)
+
+    def create_img(self, text, output_path, **kwargs):
+        """Creates a PNG or SVG image based on the output_path extension,
+           from the given text"""
+        ext = (path.splitext(output_path)[1]).lower()
+        if ext == '.png':
+            self.create_png(text, output_path, **kwargs)
+        elif ext == '.svg':
+            self.create_svg(text, output_path, **kwargs)
+        else:
+            print 'extension % not supported' % ext
 
-    params = make_drawparams(**kwargs);
-    temp_surface = cairo.SVGSurface(None, 0, 0)
-    calculated_height = draw_on_surface(temp_surface, text, params)
 
-    real_surface = cairo.SVGSurface(
-        output_path, params.width, calculated_height)
-    print 'writing', output_path
-    draw_on_surface(real_surface, text, params)
-    real_surface.flush()
-    real_surface.finish()
+_renderer = None
 
+def get_renderer():
+    """Returns the Renderer shared by the functions below."""
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer()
+    return _renderer
 
-def create_png(text, output_path, **kwargs):
-    """Creates a PNG image from the given text."""
 
-    setup_fonts_conf()
+def create_svg(text, output_path, **kwargs):
+    """Creates an SVG image from the given text."""
+    get_renderer().create_svg(text, output_path, **kwargs)
 
-    params = make_drawparams(**kwargs);
-    temp_surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, 0, 0)
-    calculated_height = draw_on_surface(temp_surface, text, params)
 
-    real_surface = cairo.ImageSurface(cairo.FORMAT_ARGB32,
-        params.width, calculated_height)
-    draw_on_surface(real_surface, text, params)
-    print 'writing', output_path
-    real_surface.write_to_png(output_path)
+def create_png(text, output_path, **kwargs):
+    """Creates a PNG image from the given text."""
+    get_renderer().create_png(text, output_path, **kwargs)
 
 
 def create_img(text, output_path, **kwargs):
     """Creates a PNG or SVG image based on the output_path extension,
        from the given text"""
-    ext = (path.splitext(output_path)[1]).lower()
-    if ext == '.png':
-        create_png(text, output_path, **kwargs)
-    elif ext == '.svg':
-        create_svg(text, output_path, **kwargs)
-    else:
-        print 'extension % not supported' % ext
+    get_renderer().create_img(text, output_path, **kwargs)
 
 
 def test():
@@ -14,21 +14,73 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-"""Saves memory by reusing an already-open font."""
+"""Saves memory and time by reusing already-open fonts."""
 
 __author__ = 'roozbeh@google.com (Roozbeh Pournader)'
 
+import collections
+import os
+from os import path
+
 from fontTools import ttLib
 
 
-_font_cache = {}
+def _is_collection(font_file_name):
+    with open(font_file_name, 'rb') as f:
+        return f.read(4) == 'ttcf'
+
+
+class FontCache(object):
+    """A cache of open fonts, for reusing them rather than reading a font file
+    several times.
+
+    Fonts are keyed by path and font number, and are reopened if the file's
+    modification time or size has changed.  Font numbers only select fonts in
+    collections, so other files have one entry whatever number is passed.  At
+    most max_fonts fonts are kept, dropping the least recently used.  The
+    fonts are opened lazily, so each table is only read when it is first
+    accessed.  Since the fonts are shared, callers shouldn't modify them.
+    """
+
+    def __init__(self, max_fonts=64):
+        self.max_fonts = max_fonts
+        self._fonts = collections.OrderedDict()
+
+    def open_font(self, font_file_name, fontNumber=-1):
+        """Opens a font using ttLib, returning a cached value if the file has
+        not changed since it was opened."""
+        if not _is_collection(font_file_name):
+            fontNumber = -1
+        key = (path.abspath(font_file_name), fontNumber)
+        st = os.stat(font_file_name)
+        stamp = (st.st_mtime, st.st_size)
+        entry = self._fonts.pop(key, None)
+        if entry is None or entry[0] != stamp:
+            entry = stamp, ttLib.TTFont(font_file_name, fontNumber=fontNumber)
+            while len(self._fonts) >= self.max_fonts:
+                self._fonts.popitem(last=False)
+        self._fonts[key] = entry
+        return entry[1]
+
+    def evict(self, font_file_name=None):
+        """Drops the fonts from the file from the cache, or all fonts if
+        font_file_name is None."""
+        if font_file_name is None:
+            self._fonts.clear()
+            return
+        font_file_name = path.abspath(font_file_name)
+        for key in [key for key in self._fonts if key[0] == font_file_name]:
+            del self._fonts[key]
+
+
+_font_cache = FontCache()
+
+
+def open_font(font_file_name, fontNumber=-1):
+    """Opens a font using ttLib, returning a cached value if already open."""
+    return _font_cache.open_font(font_file_name, fontNumber)
 
 
-def open_font(font_file_name):
-    """Opens a font using ttLib, returned a cached value if already open."""
-    try:
-        return _font_cache[font_file_name]
-    except KeyError:
-        font = ttLib.TTFont(font_file_name)
-        _font_cache[font_file_name] = font
-        return font
+def evict(font_file_name=None):
+    """Drops fonts from the shared cache, see FontCache.evict."""
+    _font_cache.evict(font_file_name)
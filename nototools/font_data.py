@@ -168,7 +168,11 @@ def font_name(font):
 
 def printable_font_revision(font, accuracy=2):
     """Returns the font revision as a string from the 'head' table."""
-    font_revision = font['head'].fontRevision
+    return format_font_revision(font['head'].fontRevision, accuracy)
+
+
+def format_font_revision(font_revision, accuracy=2):
+    """Returns a font revision number as a string."""
     font_revision_int = int(font_revision)
     font_revision_frac = int(
         round((font_revision - font_revision_int) * 10**accuracy))
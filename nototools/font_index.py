@@ -0,0 +1,148 @@
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A persistent index of font metadata, to avoid opening unchanged fonts.
+
+The index is an sqlite database under the noto cache directory.  For each font
+file and font number it records the English Windows name records, the cmap
+(see coverage.character_set), the head table's font revision, whether the font
+has TrueType hinting, and the table checksums.  An entry is reused while the
+file's modification time and size are unchanged, or if a file with the same
+contents was indexed before, so only new or changed fonts are opened.
+"""
+
+import collections
+import json
+import os
+from os import path
+import sqlite3
+
+from nototools import coverage
+from nototools import font_caching
+from nototools import font_data
+from nototools import notoconfig
+from nototools import tool_utils
+
+# Bump this when the recorded information changes, to rebuild the index.
+_FONT_INDEX_VERSION = 1
+
+# - names: map from name id to the English Windows name record
+# - cmap: CodepointSet of the characters in the cmap
+# - version: the font revision from the head table
+# - is_hinted: true if the font has an fpgm or prep table
+# - table_checksums: map from table tag to checksum
+FontInfo = collections.namedtuple(
+    'FontInfo', 'names, cmap, version, is_hinted, table_checksums')
+
+
+def font_index_path():
+  return path.join(notoconfig.noto_cache(), 'font_index.sqlite')
+
+
+def read_font_info(font_file, font_number=0):
+  """Returns the FontInfo of a font, reading it from the file."""
+  font = font_caching.open_font(font_file, fontNumber=font_number)
+  table_checksums = dict(
+      (tag, int(entry.checkSum) & 0xffffffff)
+      for tag, entry in font.reader.tables.iteritems())
+  return FontInfo(
+      font_data.get_name_records(font),
+      coverage.character_set(font),
+      font['head'].fontRevision,
+      'fpgm' in font or 'prep' in font,
+      table_checksums)
+
+
+def _info_to_row(info):
+  return (
+      json.dumps(sorted(info.names.iteritems())),
+      tool_utils.write_int_ranges(info.cmap),
+      info.version,
+      int(info.is_hinted),
+      json.dumps(sorted(info.table_checksums.iteritems())))
+
+
+def _row_to_info(row):
+  names, cmap, version, is_hinted, table_checksums = row
+  return FontInfo(
+      dict(json.loads(names)),
+      tool_utils.parse_int_ranges(cmap),
+      version,
+      bool(is_hinted),
+      dict((str(tag), checksum) for tag, checksum in json.loads(table_checksums)))
+
+
+class FontIndex(object):
+  """The index of font metadata in the sqlite database at index_path, by
+  default font_index_path()."""
+
+  _INFO_COLUMNS = 'names, cmap, version, is_hinted, table_checksums'
+
+  def __init__(self, index_path=None):
+    index_path = index_path or font_index_path()
+    tool_utils.ensure_dir_exists(path.dirname(index_path))
+    self.db = sqlite3.connect(index_path)
+    # the index can be rebuilt, so don't wait for writes to reach the disk
+    self.db.execute('PRAGMA synchronous = OFF')
+    version = self.db.execute('PRAGMA user_version').fetchone()[0]
+    if version != _FONT_INDEX_VERSION:
+      self.db.execute('DROP TABLE IF EXISTS fonts')
+      self.db.execute('PRAGMA user_version = %d' % _FONT_INDEX_VERSION)
+    self.db.execute(
+        'CREATE TABLE IF NOT EXISTS fonts ('
+        'path TEXT, font_number INTEGER, mtime REAL, size INTEGER, '
+        'hash TEXT, names TEXT, cmap TEXT, version REAL, is_hinted INTEGER, '
+        'table_checksums TEXT, PRIMARY KEY (path, font_number))')
+    self.db.execute('CREATE INDEX IF NOT EXISTS fonts_hash ON fonts (hash)')
+    self.db.commit()
+
+  def close(self):
+    self.db.close()
+
+  def get(self, font_file, font_number=0):
+    """Returns the FontInfo of a font, opening it only if the file is not in
+    the index or has changed."""
+    font_file = path.abspath(font_file)
+    st = os.stat(font_file)
+    row = self.db.execute(
+        'SELECT mtime, size, %s FROM fonts WHERE path = ? AND font_number = ?'
+        % self._INFO_COLUMNS, (font_file, font_number)).fetchone()
+    if row and tuple(row[:2]) == (st.st_mtime, st.st_size):
+      return _row_to_info(row[2:])
+
+    file_hash = tool_utils.file_sha1(font_file)
+    row = self.db.execute(
+        'SELECT %s FROM fonts WHERE hash = ? AND font_number = ?'
+        % self._INFO_COLUMNS, (file_hash, font_number)).fetchone()
+    if row:
+      info = _row_to_info(row)
+    else:
+      info = read_font_info(font_file, font_number)
+      row = _info_to_row(info)
+    self.db.execute(
+        'INSERT OR REPLACE INTO fonts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        (font_file, font_number, st.st_mtime, st.st_size, file_hash) +
+        tuple(row))
+    self.db.commit()
+    return info
+
+
+_font_index = None
+
+def get_font_info(font_file, font_number=0):
+  """Returns the FontInfo of a font from the shared index."""
+  global _font_index
+  if _font_index is None:
+    _font_index = FontIndex()
+  return _font_index.get(font_file, font_number)
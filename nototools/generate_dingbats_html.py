@@ -21,12 +21,12 @@ import re
 import string
 import sys
 
-from fontTools import ttLib
 from fontTools.pens.boundsPen import BoundsPen
 
 from os import path
 
 from nototools import cmap_data
+from nototools import font_caching
 from nototools import font_data
 from nototools import tool_utils
 from nototools import unicode_data
@@ -121,7 +121,7 @@ class CodeList(object):
 
   @staticmethod
   def fromfontcmap(fontname):
-    font = ttLib.TTFont(fontname)
+    font = font_caching.open_font(fontname)
     return CodeList.fromset(font_data.get_cmap(font))
 
   @staticmethod
@@ -411,7 +411,7 @@ class CodeTableTarget(Target):
       # the metrics apply to the rightmost font
       fontname = self.used_fonts[-1][1][0][0]
       if fontname:
-        metrics_font = _get_font(fontname)
+        metrics_font = font_caching.open_font(fontname)
       else:
         metrics_font = None
         print >> sys.stderr, 'no metrics font'
@@ -520,7 +520,7 @@ def _load_fonts(data_list, data_dir, codelist_map):
       codelist = _load_codelist(codelistfile, data_dir, codelist_map)
 
     if fname and (not codelistfile or not name):
-      font = ttLib.TTFont(fontpath)
+      font = font_caching.open_font(fontpath)
       if not name:
         names = font_data.get_name_records(font)
         name = names[16] if 16 in names else names[1] if 1 in names else None
@@ -966,15 +966,6 @@ def _character_string_html(codelist, used_font):
   return ''.join(line)
 
 
-_FONT_CACHE = {}
-def _get_font(fontname):
-  font = _FONT_CACHE.get(fontname)
-  if not font:
-    font = ttLib.TTFont(fontname)
-    _FONT_CACHE[fontname] = font
-  return font
-
-
 GMetrics = collections.namedtuple('GMetrics', 'lsb, rsb, wid, adv, cy')
 
 
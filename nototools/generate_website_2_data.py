@@ -29,6 +29,7 @@ import datetime
 import glob
 import json
 import locale
+import multiprocessing
 import os
 from os import path
 import shutil
@@ -617,6 +618,40 @@ _DEBUG_KEYS = frozenset([
   'family_id_to_default_lang_scr',
     ])
 
+def font_has_lang_sys(font_path):
+  """Returns true if the GSUB or GPOS table of the font has a language system
+  other than the default one for a script, so that shaping can depend on the
+  language."""
+  font = ttLib.TTFont(font_path, fontNumber=0)
+  for table_name in ['GSUB', 'GPOS']:
+    if table_name in font and font[table_name].table.ScriptList:
+      for script_record in font[table_name].table.ScriptList.ScriptRecord:
+        if script_record.Script.LangSysRecord:
+          return True
+  return False
+
+
+def _create_image(job):
+  """Renders an image, for WebGen.render_images."""
+  sample_text, image_location, kwargs = job
+  # render to a temporary file and rename it, so that rendering doesn't write
+  # through an existing image to the duplicates linked to it
+  root, ext = path.splitext(image_location)
+  temp_location = '%s.%d.tmp%s' % (root, os.getpid(), ext)
+  create_image.create_img(sample_text, temp_location, **kwargs)
+  os.rename(temp_location, image_location)
+  return image_location
+
+
+def _link_or_copy(src, dst):
+  if path.lexists(dst):
+    os.remove(dst)
+  try:
+    os.link(src, dst)
+  except OSError:
+    shutil.copyfile(src, dst)
+
+
 def check_debug(debug):
   if debug == None:
     return frozenset()
@@ -636,7 +671,8 @@ class WebGen(object):
 
   def __init__(
       self, target, clean, repo_info, pretty_json, no_zips=False,
-      no_images=False, no_css=False, no_data=False, no_build=False, debug=None):
+      no_images=False, no_css=False, no_data=False, no_build=False, debug=None,
+      jobs=1):
     self.target = target
     self.clean = clean
     self.repo_info = repo_info
@@ -647,28 +683,43 @@ class WebGen(object):
     self.no_data = no_data
     self.no_build = no_build or (no_zips and no_images and no_css and no_data)
     self.debug = check_debug(debug)
+    self.jobs = jobs
+    self.font_has_lang_sys = {}
+    self.readme_inputs = {}
+    self.manifest = None
+    self.zip_source_hashes = set()
 
     self.pkgs = path.join(target, 'pkgs')
     self.fonts = path.join(target, 'fonts')
     self.css = path.join(target, 'css')
     self.samples = path.join(target, 'samples')
     self.data = path.join(target, 'data')
+    # compressed fonts for the zips, see tool_utils.deflate_file
+    self.deflated = path.join(target, 'deflated')
 
   def clean_target_dir(self):
     if path.exists(self.target):
         print 'Removing the old website directory from %s...' % self.target
         shutil.rmtree(self.target)
 
+  def write_text(self, filepath, text):
+    """Writes text to filepath, unless the manifest shows it's already
+    there."""
+    inputs_hash = self.manifest.inputs_hash(values=[text])
+    if not self.manifest.is_current(filepath, inputs_hash):
+      with codecs.open(filepath, 'w', encoding='UTF-8') as f:
+        f.write(text)
+      self.manifest.record(filepath, inputs_hash)
+
   def write_json(self, obj, name):
     filepath = path.join(self.data, name + '.json')
-    with codecs.open(filepath, 'w', encoding='UTF-8') as f:
-      json.dump(obj, f, ensure_ascii=False, separators=(',', ':'))
+    self.write_text(filepath, json.dumps(
+        obj, ensure_ascii=False, separators=(',', ':')))
 
     if self.pretty_json:
       filepath = path.join(self.data, 'pretty', name + '-pretty.json')
-      with codecs.open(filepath, 'w', encoding='UTF-8') as f:
-        json.dump(obj, f, ensure_ascii=False, separators=(',', ': '),
-                       indent=4)
+      self.write_text(filepath, json.dumps(
+          obj, ensure_ascii=False, separators=(',', ': '), indent=4))
 
   def ensure_target_dirs_exist(self):
     def mkdirs(p):
@@ -683,23 +734,52 @@ class WebGen(object):
     if self.pretty_json:
       mkdirs(path.join(self.data, 'pretty'))
 
-  def create_zip(self, name, fonts, readme_path):
-    zipname = name + '.zip'
-    zippath = path.join(self.pkgs, zipname)
-    if path.isfile(zippath):
-      print('Assuming %s is valid.' % zipname)
-    else:
-      pairs = [(readme_path, path.basename(readme_path))]
-      license_types = set(font.license_type for font in fonts)
-      if 'apache' in license_types:
-        pairs.append((APACHE_LICENSE_LOC, 'LICENSE_APACHE.txt'))
-      if 'sil' in license_types:
-        pairs.append((SIL_LICENSE_LOC, 'LICENSE_OFL.txt'))
-      for font in fonts:
-        pairs.append((font.filepath, path.basename(font.filepath)))
-      tool_utils.generate_zip_with_7za_from_filepairs(pairs, zippath)
+  def zip_inputs_hash(self, pairs):
+    """Returns the manifest hash of the inputs of a zip of the file pairs.
+    READMEs are represented by their text without the build date."""
+    files = [src for src, _ in pairs if src not in self.readme_inputs]
+    values = [[dst for _, dst in pairs],
+              [self.readme_inputs[src] for src, _ in pairs
+               if src in self.readme_inputs]]
+    return self.manifest.inputs_hash(files, values)
+
+  def create_zips(self, archives):
+    """Creates the zips in a list of (file pairs, zip path) that the manifest
+    doesn't show are up to date, in a pool of self.jobs processes.  Returns a
+    map from zip path to size."""
+    path_to_hash = {}
+    source_hashes = {}
+    stale = []
+    for pairs, zippath in archives:
+      for src, _ in pairs:
+        src = path.abspath(src)
+        source_hashes[src] = self.manifest.file_hash(src)
+      inputs_hash = self.zip_inputs_hash(pairs)
+      if self.manifest.is_current(zippath, inputs_hash):
+        print '%s is up to date.' % path.basename(zippath)
+      else:
+        path_to_hash[zippath] = inputs_hash
+        stale.append((pairs, zippath))
+    self.zip_source_hashes.update(source_hashes.values())
+    for zippath in tool_utils.generate_zips_from_filepairs(
+        stale, self.jobs, self.deflated, source_hashes):
+      self.manifest.record(zippath, path_to_hash[zippath])
       print 'Created zip %s' % zippath
-    return os.stat(zippath).st_size
+    return dict((zippath, os.stat(zippath).st_size)
+                for _, zippath in archives)
+
+  def font_zip(self, name, fonts, readme_path):
+    """Returns the (file pairs, zip path) of a zip of the fonts."""
+    zippath = path.join(self.pkgs, name + '.zip')
+    pairs = [(readme_path, path.basename(readme_path))]
+    license_types = set(font.license_type for font in fonts)
+    if 'apache' in license_types:
+      pairs.append((APACHE_LICENSE_LOC, 'LICENSE_APACHE.txt'))
+    if 'sil' in license_types:
+      pairs.append((SIL_LICENSE_LOC, 'LICENSE_OFL.txt'))
+    for font in fonts:
+      pairs.append((font.filepath, path.basename(font.filepath)))
+    return pairs, zippath
 
   def get_readme_keys(self):
     return 'fonts cjk emoji all'.split()
@@ -720,43 +800,59 @@ class WebGen(object):
     and are put into /tmp/readmes/{fonts|cjk|emoji|all} before
     being copied to zip files."""
 
+    def readme_text(name, date_str):
+      if name == 'all':
+        text = README_HEADER % (date_str, 'ies')
+        for i, n in enumerate(names[:-1]):
+          if i > 0:
+            text += '-----\n'
+          text += self.repo_info[n] + '\n'
+      else:
+        text = README_HEADER % (date_str, 'y')
+        text += self.repo_info[name] + '\n'
+      return text
+
     date_str = str(datetime.date.today())
     names = self.get_readme_keys()
     for name in names:
       fname = self.get_readme_path(name)
       tool_utils.ensure_dir_exists(path.dirname(fname))
       with open(fname, 'w') as f:
-        if name == 'all':
-          f.write(README_HEADER % (date_str, 'ies'))
-          for i, n in enumerate(names[:-1]):
-            if i > 0:
-              f.write('-----\n')
-            f.write(self.repo_info[n])
-            f.write('\n')
-        else:
-          f.write(README_HEADER % (date_str, 'y'))
-          f.write(self.repo_info[name])
-          f.write('\n')
+        f.write(readme_text(name, date_str))
+      # zips don't need rebuilding just because the date changed
+      self.readme_inputs[fname] = readme_text(name, '')
 
   def build_family_zips(self, key, family):
+    """Returns the zip name of the family and the font_zip of its hinted and
+    unhinted members, or None if it has none."""
     readme_key = self.get_readme_key_for_filepath(family.rep_member.filepath)
     readme_path = self.get_readme_path(readme_key)
 
     zip_name = noto_fonts.get_family_filename(family)
-    hinted_size = 0
-    unhinted_size = 0
+    hinted_zip = None
+    unhinted_zip = None
     if family.hinted_members:
-      hinted_size = self.create_zip(
+      hinted_zip = self.font_zip(
           zip_name + '-hinted', family.hinted_members, readme_path)
     if family.unhinted_members:
-      unhinted_size = self.create_zip(
+      unhinted_zip = self.font_zip(
           zip_name + '-unhinted', family.unhinted_members, readme_path)
-    return zip_name, hinted_size, unhinted_size
+    return zip_name, hinted_zip, unhinted_zip
 
   def build_zips(self, families):
-    zip_info = {}
+    family_zips = {}
     for key, family_data in families.iteritems():
-      zip_info[key] = self.build_family_zips(key, family_data)
+      family_zips[key] = self.build_family_zips(key, family_data)
+    sizes = self.create_zips(
+        [font_zip for _, hinted_zip, unhinted_zip in family_zips.values()
+         for font_zip in (hinted_zip, unhinted_zip) if font_zip])
+
+    def zip_size(font_zip):
+      return sizes[font_zip[1]] if font_zip else 0
+
+    zip_info = {}
+    for key, (zip_name, hinted_zip, unhinted_zip) in family_zips.iteritems():
+      zip_info[key] = zip_name, zip_size(hinted_zip), zip_size(unhinted_zip)
     return zip_info
 
   def build_universal_zips(self, families):
@@ -768,16 +864,20 @@ class WebGen(object):
           family_data.hinted_members or family_data.unhinted_members)
       unhinted_fonts.extend(
           family_data.unhinted_members or family_data.hinted_members)
-    hinted_size = self.create_zip(
-        'Noto-hinted', hinted_fonts, readme_path)
-    unhinted_size = self.create_zip(
-        'Noto-unhinted', unhinted_fonts, readme_path)
-    return 'Noto', hinted_size, unhinted_size
+    # the fonts were compressed for the family zips, so these are assembled
+    # from the compressed data
+    hinted_zip = self.font_zip('Noto-hinted', hinted_fonts, readme_path)
+    unhinted_zip = self.font_zip('Noto-unhinted', unhinted_fonts, readme_path)
+    sizes = self.create_zips([hinted_zip, unhinted_zip])
+    return 'Noto', sizes[hinted_zip[1]], sizes[unhinted_zip[1]]
 
   def copy_font(self, fontpath):
     basename = path.basename(fontpath)
     dst = path.join(self.fonts, basename)
-    shutil.copy(fontpath, dst)
+    inputs_hash = self.manifest.inputs_hash([fontpath])
+    if not self.manifest.is_current(dst, inputs_hash):
+      shutil.copy(fontpath, dst)
+      self.manifest.record(dst, inputs_hash)
     return basename
 
   def build_family_css(self, key, family):
@@ -790,30 +890,31 @@ class WebGen(object):
     css_name = key + '.css'
     css_path = path.join(self.css, css_name)
     max_font_size = 0
-    with open(css_path, 'w') as css_file:
-      for font in fonts:
-        font_path = self.copy_font(font.filepath)
-        max_font_size = max(max_font_size, os.stat(font.filepath).st_size)
-        # Make it possible to access Mono cjk variants and those with irregular
-        # css values by assigning them other names.
-        css_family = family.name
-        if font.is_cjk and font.is_mono:
-          css_family += ' ' + 'Mono'
-        weight = css_weight(font.weight)
-        if weight % 100 != 0:
-          css_family += ' ' + str(weight)
-          # prevent auto-bolding of this font by describing it as bold
-          weight = 700
-        slope = css_style(font.slope)
-        stretch = css_stretch(font.width)
-        css_file.write(
-          '@font-face {\n'
-          '  font-family: "%s";\n'
-          '  font-stretch: %s;\n'
-          '  font-weight: %d;\n'
-          '  font-style: %s;\n'
-          '  src: url(../fonts/%s) format("truetype");\n'
-          '}\n' % (css_family, stretch, weight, slope, font_path))
+    css_text = []
+    for font in fonts:
+      font_path = self.copy_font(font.filepath)
+      max_font_size = max(max_font_size, os.stat(font.filepath).st_size)
+      # Make it possible to access Mono cjk variants and those with irregular
+      # css values by assigning them other names.
+      css_family = family.name
+      if font.is_cjk and font.is_mono:
+        css_family += ' ' + 'Mono'
+      weight = css_weight(font.weight)
+      if weight % 100 != 0:
+        css_family += ' ' + str(weight)
+        # prevent auto-bolding of this font by describing it as bold
+        weight = 700
+      slope = css_style(font.slope)
+      stretch = css_stretch(font.width)
+      css_text.append(
+        '@font-face {\n'
+        '  font-family: "%s";\n'
+        '  font-stretch: %s;\n'
+        '  font-weight: %d;\n'
+        '  font-style: %s;\n'
+        '  src: url(../fonts/%s) format("truetype");\n'
+        '}\n' % (css_family, stretch, weight, slope, font_path))
+    self.write_text(css_path, ''.join(css_text))
     return max_font_size
 
   def build_css(self, families):
@@ -1035,8 +1136,22 @@ class WebGen(object):
     self.write_json(meta_obj, 'meta')
 
 
+  def lang_key(self, font, lang_scr):
+    """Returns the part of lang_scr that can change images of the font: all of
+    it if the font's layout has language systems, else just the script."""
+    if font.filepath not in self.font_has_lang_sys:
+      self.font_has_lang_sys[font.filepath] = font_has_lang_sys(font.filepath)
+    if self.font_has_lang_sys[font.filepath]:
+      return lang_scr
+    return lang_scr.split('-')[1]
+
   def build_family_images(
       self, family, lang_scr, sample_text, attrib, sample_key):
+    """Returns a list of (sample text, image location, create_img arguments,
+    content key, inputs hash) for the images of the family's fonts that the
+    manifest doesn't show are up to date.  Images with the same content key
+    are identical."""
+    image_jobs = []
     family_id = family.family_id
     is_cjk = family.rep_member.is_cjk
     is_rtl = cldr_data.is_rtl(lang_scr)
@@ -1077,14 +1192,7 @@ class WebGen(object):
       else:
         family_name = family.name
       image_location = path.join(self.samples, image_file_name)
-      if path.isfile(image_location):
-        # Don't rebuild images when continuing.
-        print "Continue: assuming image file '%s' is valid." % image_location
-        continue
-      print 'create %s' % image_file_name
-      create_image.create_img(
-          sample_text,
-          image_location,
+      kwargs = dict(
           family=family_name,
           language=lang_scr,
           rtl=is_rtl,
@@ -1097,25 +1205,75 @@ class WebGen(object):
           stretch=stretch,
           maxheight=maxheight,
           horiz_margin=horiz_margin)
+      content_key = (
+          sample_text, imgtype, self.lang_key(font, lang_scr),
+          tuple(sorted((k, v) for k, v in kwargs.iteritems()
+                       if k != 'language')))
+      inputs_hash = self.manifest.inputs_hash([font.filepath], content_key)
+      if self.manifest.is_current(image_location, inputs_hash):
+        print "Continue: image file '%s' is up to date." % image_location
+        continue
+      image_jobs.append(
+          (sample_text, image_location, kwargs, content_key, inputs_hash))
+    return image_jobs
+
+  def render_images(self, image_jobs):
+    """Renders the images of a list of jobs from build_family_images.  Only
+    the first image with each content key is rendered, in a pool of self.jobs
+    processes (0 for one per cpu); the others are linked to or copied from
+    it."""
+    key_to_location = {}
+    location_to_hash = {}
+    to_render = []
+    duplicates = []
+    for (sample_text, image_location, kwargs, content_key,
+         inputs_hash) in image_jobs:
+      location_to_hash[image_location] = inputs_hash
+      if content_key in key_to_location:
+        duplicates.append((key_to_location[content_key], image_location))
+      else:
+        key_to_location[content_key] = image_location
+        to_render.append((sample_text, image_location, kwargs))
+
+    num_procs = self.jobs or multiprocessing.cpu_count()
+    pool = None
+    if num_procs > 1 and len(to_render) > 1:
+      pool = multiprocessing.Pool(min(num_procs, len(to_render)))
+      rendered = pool.imap(_create_image, to_render)
+    else:
+      rendered = (_create_image(job) for job in to_render)
+    for image_location in rendered:
+      print 'create %s' % path.basename(image_location)
+      self.manifest.record(image_location, location_to_hash[image_location])
+    if pool:
+      pool.close()
+      pool.join()
+
+    for src, dst in duplicates:
+      print 'link %s to %s' % (path.basename(dst), path.basename(src))
+      _link_or_copy(src, dst)
+      self.manifest.record(dst, location_to_hash[dst])
 
   def build_images(self, family_id_to_lang_scr_to_sample_key,
                    families, family_id_to_default_lang_scr,
                    sample_key_to_info):
+    image_jobs = []
     for family_id in sorted(family_id_to_lang_scr_to_sample_key):
       family = families[family_id]
       print 'Generating images for %s...' % family.name
       default_lang = family_id_to_default_lang_scr[family_id]
       lang_scr_to_sample_key = family_id_to_lang_scr_to_sample_key[family_id]
 
-      # We don't know that rendering the same sample text with different
-      # languages is the same, so we have to generate all the samples and
-      # name them based on the language.  But most of the samples with the
-      # same font and text will be the same, because the fonts generally
-      # only customize for a few language tags.  Sad!
+      # The samples are named based on the language, but most of the samples
+      # with the same font and text will be the same, because the fonts
+      # generally only customize for a few language tags.  So only those
+      # that can differ are rendered, see lang_key.
       for lang_scr, sample_key in sorted(lang_scr_to_sample_key.iteritems()):
         sample_text, attrib, _ = sample_key_to_info[sample_key]
-        self.build_family_images(
-            family, lang_scr, sample_text, attrib, sample_key)
+        image_jobs.extend(self.build_family_images(
+            family, lang_scr, sample_text, attrib, sample_key))
+
+    self.render_images(image_jobs)
 
   def build_ttc_zips(self):
     """Generate zipped versions of the ttc files and put in pkgs directory."""
@@ -1130,21 +1288,16 @@ class WebGen(object):
     readme_pair = (readme_path, path.basename(readme_path))
     filenames = [path.basename(f) for f in os.listdir(CJK_DIR)
                  if f.endswith('.ttc')]
+    archives = []
     for filename in filenames:
       zip_basename = filename + '.zip'
       zip_path = path.join(self.pkgs, zip_basename)
-      if path.isfile(zip_path):
-          print("Assuming built %s is valid." % zip_basename)
-          continue
-      oldsize = os.stat(path.join(CJK_DIR, filename)).st_size
       pairs = [
           readme_pair,
           (SIL_LICENSE_LOC, 'LICENSE_OFL.txt'),
           (path.join(CJK_DIR, filename), filename)]
-      tool_utils.generate_zip_with_7za_from_filepairs(pairs, zip_path)
-      newsize = os.stat(zip_path).st_size
-      print "Wrote " + zip_path
-      print 'Compressed from {0:,}B to {1:,}B.'.format(oldsize, newsize)
+      archives.append((pairs, zip_path))
+    self.create_zips(archives)
 
     # NotoSans/SerifCJK.ttc.zip already has been zipped for size reasons
     # because git doesn't like very large files. So it wasn't in the above
@@ -1166,8 +1319,14 @@ class WebGen(object):
       if os.stat(src_zip).st_size < 100000000:  # lower than 100MB
         pairs.append(readme_pair)
       dst_zip = path.join(self.pkgs, filename)
+      inputs_hash = self.manifest.inputs_hash(
+          [src_zip], self.zip_inputs_hash(pairs))
+      if self.manifest.is_current(dst_zip, inputs_hash):
+        print '%s is up to date.' % filename
+        continue
       shutil.copy2(src_zip, dst_zip)
-      tool_utils.generate_zip_with_7za_from_filepairs(pairs, dst_zip)
+      tool_utils.add_to_zip_from_filepairs(pairs, dst_zip)
+      self.manifest.record(dst_zip, inputs_hash)
 
 
   def build_subset_zips(self):
@@ -1179,29 +1338,22 @@ class WebGen(object):
 
     readme_path = self.get_readme_path('cjk')
     readme_pair = (readme_path, path.basename(readme_path))
+    archives = []
     for style in ['Sans', 'Serif']:
       for subset in ['KR', 'JP', 'SC', 'TC']:
         base_name = 'Noto%s%s' % (style, subset)
         zip_name = '%s.zip' % base_name
         zip_path = path.join(self.pkgs, zip_name)
-        if path.isfile(zip_path):
-          print("Assuming built %s is valid." % zip_name)
-          continue
-
         filenames = glob.glob(path.join(CJK_DIR, base_name + '-*.otf'))
         if not filenames:
           raise Exception('no file in %s matched "%s"' % (CJK_DIR, family_pat))
 
-        oldsize = sum(os.stat(f).st_size for f in filenames)
         pairs = [
             readme_pair,
             (SIL_LICENSE_LOC, 'LICENSE_OFL.txt')]
-        pairs.extend((f, path.basename(f)) for f in filenames)
-
-        tool_utils.generate_zip_with_7za_from_filepairs(pairs, zip_path)
-        newsize = os.stat(zip_path).st_size
-        print "Wrote " + zip_path
-        print 'Compressed from {0:,}B to {1:,}B.'.format(oldsize, newsize)
+        pairs.extend((f, path.basename(f)) for f in sorted(filenames))
+        archives.append((pairs, zip_path))
+    self.create_zips(archives)
 
   def generate(self):
     if self.clean:
@@ -1209,6 +1361,8 @@ class WebGen(object):
 
     if not self.no_build:
       self.ensure_target_dirs_exist()
+      self.manifest = tool_utils.BuildManifest(
+          path.join(self.target, 'build_manifest.json'))
 
     def use_in_web(font):
       return (not font.subset and
@@ -1366,46 +1520,55 @@ class WebGen(object):
       print 'skipping build output'
       return
 
-    # build outputs
-    # zips are required for data
-    if self.no_zips and self.no_data:
-      print 'skipping zip output'
-    else:
-      self.build_readmes()
-
-      family_zip_info = self.build_zips(families)
-      universal_zip_info = self.build_universal_zips(families)
-
-      # build outputs not used by the json but linked to from the web page
-      if not self.no_zips:
-        self.build_ttc_zips()
-        self.build_subset_zips()
-
-    if self.no_css:
-      print 'skipping css output'
-    else:
-      family_css_info = self.build_css(families)
+    # The manifest is saved even if the build fails, so that a rerun doesn't
+    # rebuild the outputs that were completed.
+    try:
+      # build outputs
+      # zips are required for data
+      if self.no_zips and self.no_data:
+        print 'skipping zip output'
+      else:
+        self.build_readmes()
+
+        family_zip_info = self.build_zips(families)
+        universal_zip_info = self.build_universal_zips(families)
+
+        # build outputs not used by the json but linked to from the web page
+        if not self.no_zips:
+          self.build_ttc_zips()
+          self.build_subset_zips()
+          # every zip has been considered, so drop the compressed data of
+          # fonts that none of them contain anymore
+          tool_utils.prune_deflate_cache(
+              self.zip_source_hashes, self.deflated)
+
+      if self.no_css:
+        print 'skipping css output'
+      else:
+        family_css_info = self.build_css(families)
 
-    if self.no_data:
-      print 'skipping data output'
-    else:
-      self.build_data_json(family_id_to_lang_scr_to_sample_key,
-                           families, family_zip_info, universal_zip_info,
-                           family_id_to_regions, region_to_family_ids)
+      if self.no_data:
+        print 'skipping data output'
+      else:
+        self.build_data_json(family_id_to_lang_scr_to_sample_key,
+                             families, family_zip_info, universal_zip_info,
+                             family_id_to_regions, region_to_family_ids)
 
-      self.build_families_json(family_id_to_lang_scr_to_sample_key,
-                               families, family_id_to_default_lang_scr,
-                               family_id_to_regions, family_css_info,
-                               lang_scr_sort_order)
+        self.build_families_json(family_id_to_lang_scr_to_sample_key,
+                                 families, family_id_to_default_lang_scr,
+                                 family_id_to_regions, family_css_info,
+                                 lang_scr_sort_order)
 
-      self.build_misc_json(sample_key_to_info, region_data)
+        self.build_misc_json(sample_key_to_info, region_data)
 
-    if self.no_images:
-      print 'skipping image output'
-    else:
-      self.build_images(family_id_to_lang_scr_to_sample_key,
-                        families,  family_id_to_default_lang_scr,
-                        sample_key_to_info)
+      if self.no_images:
+        print 'skipping image output'
+      else:
+        self.build_images(family_id_to_lang_scr_to_sample_key,
+                          families,  family_id_to_default_lang_scr,
+                          sample_key_to_info)
+    finally:
+      self.manifest.save()
 
 
 def get_repo_info(skip_checks):
@@ -1487,6 +1650,10 @@ def main():
     parser.add_argument('-n', '--no_build',
                         help='skip build of zip, image, data, and css',
                         action='store_true')
+    parser.add_argument('-j', '--jobs',
+                        help='number of images to render or zips to '
+                        'compress in parallel (default 1, 0 for one per cpu)',
+                        type=int, default=1, metavar='n')
     parser.add_argument('--debug',
                         help='types of information to dump during build',
                         nargs='*')
@@ -1497,7 +1664,8 @@ def main():
     webgen = WebGen(args.dest, args.clean, repo_info, args.pretty_json,
                     no_zips=args.no_zips, no_images=args.no_images,
                     no_css=args.no_css, no_data=args.no_data,
-                    no_build=args.no_build, debug=args.debug)
+                    no_build=args.no_build, debug=args.debug,
+                    jobs=args.jobs)
     webgen.generate()
 
 
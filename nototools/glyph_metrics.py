@@ -0,0 +1,194 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Computes and caches metrics of glyph outlines.
+
+The metrics of a glyph are its area (as computed by GlyphAreaPen), its bounds,
+the number of contours, and a hash of its outline with components decomposed.
+Two glyphs with the same outline hash have identical outlines, so comparisons
+of their shapes can be skipped.
+
+Each outline is drawn once and replayed into the pens computing the metrics.
+font_glyph_metrics caches the metrics of all glyphs of a font file under the
+noto cache directory, keyed by a hash of the file's contents.
+
+raw_glyph_hashes hashes the glyph data in the font without drawing it, which
+is cheaper but also changes with hinting.
+"""
+
+import collections
+import hashlib
+import os
+from os import path
+import pickle
+
+from fontTools.pens.boundsPen import BoundsPen
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.pens.transformPen import TransformPen
+from fontTools.ttLib import TTFont
+
+from nototools import notoconfig
+from nototools.glyph_area_pen import GlyphAreaPen
+
+# Bump this when the computed metrics change, to invalidate cached ones.
+_GLYPH_METRICS_CACHE_VERSION = 1
+
+GlyphMetrics = collections.namedtuple(
+    'GlyphMetrics', 'area bounds contours outline_hash')
+
+
+class DecomposingRecordingPen(RecordingPen):
+    """A RecordingPen which records the outlines of components instead of the
+    components themselves."""
+
+    def __init__(self, glyph_set):
+        RecordingPen.__init__(self)
+        self.glyph_set = glyph_set
+
+    def addComponent(self, glyph_name, transformation):
+        # like BasePen, ignore components missing from the glyph set
+        try:
+            glyph = self.glyph_set[glyph_name]
+        except KeyError:
+            return
+        glyph.draw(TransformPen(self, transformation))
+
+
+def outline_metrics(recording):
+    """Returns the GlyphMetrics of an outline recorded by a RecordingPen."""
+
+    area_pen = GlyphAreaPen(None)
+    bounds_pen = BoundsPen(None)
+    contours = 0
+    for operator, operands in recording:
+        getattr(area_pen, operator)(*operands)
+        getattr(bounds_pen, operator)(*operands)
+        if operator in ('closePath', 'endPath'):
+            contours += 1
+    outline_hash = hashlib.sha1(repr(recording)).hexdigest()
+    return GlyphMetrics(area_pen.pop(), bounds_pen.bounds, contours,
+                        outline_hash)
+
+
+def glyph_metrics(glyph_set, names=None):
+    """Returns a map from glyph name to GlyphMetrics for the named glyphs in a
+    glyph set, or all of them if names is None."""
+
+    if names is None:
+        names = glyph_set.keys()
+    metrics = {}
+    for name in names:
+        pen = DecomposingRecordingPen(glyph_set)
+        glyph_set[name].draw(pen)
+        metrics[name] = outline_metrics(pen.value)
+    return metrics
+
+
+def raw_glyph_hashes(font):
+    """Returns a map from glyph name to a hash of the glyph's data in the glyf
+    or CFF table of a font, or an empty map if the font has neither.
+
+    Components are resolved, and a change to any CFF subroutine changes the
+    hashes of all glyphs.  So glyphs with equal hashes have the same outline,
+    though glyphs with different hashes may too.  Since drawing a glyf glyph
+    can change its data, call this before drawing any glyphs of the font.
+    """
+
+    hashes = {}
+    if 'glyf' in font:
+        glyf_table = font['glyf']
+
+        def glyph_hash(name):
+            if name not in hashes:
+                glyph = glyf_table.glyphs[name]
+                data_hash = hashlib.sha1(
+                    glyph.compile(glyf_table, recalcBBoxes=False))
+                if glyph.isComposite():
+                    for component in glyf_table[name].components:
+                        data_hash.update(component.glyphName)
+                        data_hash.update(glyph_hash(component.glyphName))
+                hashes[name] = data_hash.hexdigest()
+            return hashes[name]
+
+        for name in font.getGlyphOrder():
+            glyph_hash(name)
+
+    elif 'CFF ' in font:
+        cff = font['CFF '].cff
+        top_dict = cff.topDictIndex[0]
+        subrs = list(cff.GlobalSubrs)
+        if hasattr(top_dict, 'FDArray'):
+            private_dicts = [fd.Private for fd in top_dict.FDArray]
+        else:
+            private_dicts = [top_dict.Private]
+        for private_dict in private_dicts:
+            subrs.extend(getattr(private_dict, 'Subrs', []))
+        subrs_hash = hashlib.sha1()
+        for char_string in subrs:
+            char_string.compile()
+            subrs_hash.update(char_string.bytecode)
+
+        char_strings = top_dict.CharStrings
+        for name in font.getGlyphOrder():
+            char_string = char_strings[name]
+            char_string.compile()
+            data_hash = subrs_hash.copy()
+            data_hash.update(char_string.bytecode)
+            hashes[name] = data_hash.hexdigest()
+    return hashes
+
+
+def glyph_metrics_cache_dir():
+    return path.join(notoconfig.noto_cache(), 'glyph_metrics')
+
+
+def _file_hash(file_path):
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def font_glyph_metrics(font_file, font=None, cache_dir=None, use_cache=True):
+    """Returns a map from glyph name to GlyphMetrics for all glyphs of a font
+    file.
+
+    font is the loaded font, if it is already open.  Unless use_cache is
+    false, the metrics are read from and written to cache_dir, by default
+    glyph_metrics_cache_dir().
+    """
+
+    if use_cache:
+        cache_dir = cache_dir or glyph_metrics_cache_dir()
+        cache_path = path.join(cache_dir, '%s.%d.pickle' % (
+            _file_hash(font_file), _GLYPH_METRICS_CACHE_VERSION))
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            pass
+
+    if font is None:
+        font = TTFont(font_file)
+    metrics = glyph_metrics(font.getGlyphSet(), font.getGlyphOrder())
+
+    if use_cache:
+        temp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+        try:
+            if not path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            with open(temp_path, 'wb') as f:
+                pickle.dump(metrics, f, pickle.HIGHEST_PROTOCOL)
+            os.rename(temp_path, cache_path)
+        except (IOError, OSError):
+            pass
+    return metrics
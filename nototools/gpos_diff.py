@@ -13,12 +13,12 @@
 # limitations under the License.
 
 
-"""Provides GposDiffFinder, which finds differences in ttxn feature output.
+"""Provides GposDiffFinder, which finds differences in GPOS tables.
 
-GposDiffFinder takes in two paths, to font binaries from which ttxn output is
-made. It provides methods that compare the OpenType feature contents of these
-files: `find_kerning_diffs`, `find_mark_class_diffs`, and
-`find_positioning_diffs`.
+GposDiffFinder takes in two paths, to font binaries from which the GPOS rules
+are extracted with otl_rules. It provides methods that compare the OpenType
+feature contents of these files: `find_kerning_diffs`,
+`find_mark_class_diffs`, and `find_positioning_diffs`.
 
 Unlike ShapeDiffFinder, the methods don't have a `stats` argument and can't
 accumulate a report between method calls (yet?). They simply report the
@@ -27,39 +27,29 @@ differences via a returned string.
 
 
 from collections import defaultdict
-import re
-import subprocess
-import tempfile
+
+from fontTools import ttLib
+
+from nototools import otl_rules
 
 
 class GposDiffFinder:
-    """Provides methods to report diffs in GPOS content between ttxn outputs."""
-
-    def __init__(self, file_a, file_b, error_bound, output_lines=6):
-        ttxn_file_a = tempfile.NamedTemporaryFile()
-        ttxn_file_b = tempfile.NamedTemporaryFile()
-        subprocess.call(['ttxn', '-q', '-t', 'GPOS', '-o', ttxn_file_a.name,
-                                                     '-f', file_a])
-        subprocess.call(['ttxn', '-q', '-t', 'GPOS', '-o', ttxn_file_b.name,
-                                                     '-f', file_b])
-        self.text_a = ttxn_file_a.read()
-        self.text_b = ttxn_file_b.read()
+    """Provides methods to report diffs in GPOS content between fonts."""
+
+    def __init__(self, file_a, file_b, error_bound, output_lines=6,
+                 font_a=None, font_b=None):
+        self.font_a = font_a if font_a is not None else ttLib.TTFont(file_a)
+        self.font_b = font_b if font_b is not None else ttLib.TTFont(file_b)
         self.err = error_bound
         self.out_lines = output_lines
 
     def find_kerning_diffs(self):
         """Report differences in kerning rules."""
 
-        classes_a, classes_b = {}, {}
-        rx = re.compile(r'(@[\w\d_.]+) = \[([\s\w\d_.]+)\];')
-        self._parse_kerning_classes(rx, self.text_a, classes_a)
-        self._parse_kerning_classes(rx, self.text_b, classes_b)
-
         unmatched = defaultdict(list)
         mismatched = defaultdict(list)
-        rx = re.compile('pos \[?([\w\d@_.]+)\]? \[?([\w\d@_.]+)\]? (-?\d+);')
-        self._parse_kerning(rx, '-', self.text_a, classes_a, unmatched)
-        self._parse_kerning(rx, '+', self.text_b, classes_b, unmatched)
+        self._add_kerning('-', otl_rules.kerning_pairs(self.font_a), unmatched)
+        self._add_kerning('+', otl_rules.kerning_pairs(self.font_b), unmatched)
         self._organize_kerning_diffs(unmatched, mismatched)
 
         unmatched = [(k, v) for k, v in unmatched.iteritems() if v]
@@ -98,10 +88,10 @@ class GposDiffFinder:
 
         unmatched = {}
         mismatched = {}
-        rx = re.compile('mark \[([\w\d\s@_.]+)\] <anchor (-?\d+) (-?\d+)> '
-                        '(@[\w\d_.]+);')
-        self._parse_anchor_info(rx, '-', self.text_a, unmatched, mismatched)
-        self._parse_anchor_info(rx, '+', self.text_b, unmatched, mismatched)
+        self._add_anchor_info('-', otl_rules.mark_classes(self.font_a),
+                              unmatched, mismatched)
+        self._add_anchor_info('+', otl_rules.mark_classes(self.font_b),
+                              unmatched, mismatched)
 
         res = ['%d differences in mark class definitions' % len(unmatched)]
         unmatched = unmatched.items()
@@ -138,10 +128,12 @@ class GposDiffFinder:
 
         unmatched = {}
         mismatched = {}
-        rx = re.compile('pos %s \[([\w\d\s@_.]+)\]\s+<anchor (-?\d+) (-?\d+)> '
-                        'mark (@[\w\d_.]+);' % mark_type)
-        self._parse_anchor_info(rx, '-', self.text_a, unmatched, mismatched)
-        self._parse_anchor_info(rx, '+', self.text_b, unmatched, mismatched)
+        self._add_anchor_info(
+            '-', otl_rules.mark_attachments(self.font_a, mark_type),
+            unmatched, mismatched)
+        self._add_anchor_info(
+            '+', otl_rules.mark_attachments(self.font_b, mark_type),
+            unmatched, mismatched)
 
         res = ['%d differences in mark-to-%s positioning rule coverage' %
                (len(unmatched), mark_type)]
@@ -168,37 +160,18 @@ class GposDiffFinder:
         res.append('')
         return '\n'.join(res)
 
-    def _parse_kerning_classes(self, rx, text, classes):
-        """Parse kerning class definitions."""
+    def _add_kerning(self, sign, pairs, unmatched):
+        """Add kerning values, cancelling out matching values of the other
+        font."""
 
-        for definition in rx.findall(text):
-            name, members = definition
-            classes[name] = members.split()
-
-    def _parse_kerning(self, rx, sign, text, classes, unmatched):
-        """Parse kerning rules."""
-
-        for rule in rx.findall(text):
-            left, right, val = rule
-            val = int(val)
-            if left in classes:
-                left = classes[left]
-            else:
-                left = [left]
-            if right in classes:
-                right = classes[right]
-            else:
-                right = [right]
-
-            for left_glyph in left:
-                for right_glyph in right:
-                    key = sign, left_glyph, right_glyph
-                    key_match = (self._reverse_sign(sign), left_glyph,
-                                 right_glyph)
-                    if val in unmatched[key_match]:
-                        unmatched[key_match].remove(val)
-                    else:
-                        unmatched[key].append(val)
+        for (left, right), vals in pairs.iteritems():
+            key = sign, left, right
+            key_match = self._reverse_sign(sign), left, right
+            for val in vals:
+                if val in unmatched[key_match]:
+                    unmatched[key_match].remove(val)
+                else:
+                    unmatched[key].append(val)
 
     def _organize_kerning_diffs(self, unmatched, mismatched):
         """Move mismatched kerning rules into a separate dictionary."""
@@ -216,22 +189,18 @@ class GposDiffFinder:
                 mismatched[left, right] = (
                     unmatched.pop(key), unmatched.pop(key_match))
 
-    def _parse_anchor_info(self, rx, sign, text, unmatched, mismatched):
-        """Parse unmatched and mismatched mark classes."""
-
-        for members, x, y, mark_class in rx.findall(text):
-            # hack to get around unexpected class naming differences (ttxn bug?)
-            mark_class = '_'.join(mark_class.split('_', 2)[:2])
-            for member in members.split():
-                val = int(x), int(y)
-                key_match = self._reverse_sign(sign), member, mark_class
-                if key_match in unmatched:
-                    if unmatched[key_match] != val:
-                        mismatched[member, mark_class] = (
-                            unmatched[key_match], val)
-                    del unmatched[key_match]
-                else:
-                    unmatched[sign, member, mark_class] = val
+    def _add_anchor_info(self, sign, anchors, unmatched, mismatched):
+        """Add anchors, sorting them into unmatched and mismatched ones."""
+
+        for (member, mark_class), val in anchors.iteritems():
+            key_match = self._reverse_sign(sign), member, mark_class
+            if key_match in unmatched:
+                if unmatched[key_match] != val:
+                    mismatched[member, mark_class] = (
+                        unmatched[key_match], val)
+                del unmatched[key_match]
+            else:
+                unmatched[sign, member, mark_class] = val
 
     def _reverse_sign(self, sign):
         """Return the reverse of a sign contained in a string."""
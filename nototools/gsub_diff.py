@@ -15,47 +15,35 @@
 
 """Provides GsubDiffFinder, which finds differences in GSUB tables.
 
-GsubDiffFinder takes in two paths, to font binaries from which ttxn output is
-made. It provides `find_gsub_diffs` which compares the OpenType substitution
-rules in these files, reporting the differences via a returned string.
+GsubDiffFinder takes in two paths, to font binaries from which the GSUB rules
+are extracted with otl_rules. It provides `find_gsub_diffs` which compares the
+OpenType substitution rules in these files, reporting the differences via a
+returned string.
 """
 
 
-import re
-import subprocess
-import tempfile
+from fontTools import ttLib
+
+from nototools import otl_rules
 
 
 class GsubDiffFinder(object):
-    """Provides methods to report diffs in GSUB content between ttxn outputs."""
+    """Provides methods to report diffs in GSUB content between fonts."""
 
-    def __init__(self, file_a, file_b, output_lines=20):
-        ttxn_file_a = tempfile.NamedTemporaryFile()
-        ttxn_file_b = tempfile.NamedTemporaryFile()
-        subprocess.call(['ttxn', '-q', '-t', 'GSUB', '-o', ttxn_file_a.name,
-                                                     '-f', file_a])
-        subprocess.call(['ttxn', '-q', '-t', 'GSUB', '-o', ttxn_file_b.name,
-                                                     '-f', file_b])
-        self.text_a = ttxn_file_a.read()
-        self.text_b = ttxn_file_b.read()
-        self.file_a = file_a
-        self.file_b = file_b
+    def __init__(self, file_a, file_b, output_lines=20, font_a=None,
+                 font_b=None):
+        self.font_a = font_a if font_a is not None else ttLib.TTFont(file_a)
+        self.font_b = font_b if font_b is not None else ttLib.TTFont(file_b)
         self.output_lines = output_lines
 
     def find_gsub_diffs(self):
         """Report differences in substitution rules."""
 
-        rules_a = self._get_gsub_rules(self.text_a, self.file_a)
-        rules_b = self._get_gsub_rules(self.text_b, self.file_b)
+        rules_a = otl_rules.gsub_rules(self.font_a)
+        rules_b = otl_rules.gsub_rules(self.font_b)
 
-        diffs = []
-        report = ['']  # first line replaced by difference count
-        for rule in rules_a:
-            if rule not in rules_b:
-                diffs.append(('-',) + rule)
-        for rule in rules_b:
-            if rule not in rules_a:
-                diffs.append(('+',) + rule)
+        diffs = [('-',) + rule for rule in rules_a - rules_b]
+        diffs.extend(('+',) + rule for rule in rules_b - rules_a)
         # ('+', 'smcp', 'Q', 'Q.sc')
         # Sort order:
         # 1. Feature tag
@@ -65,20 +53,3 @@ class GsubDiffFinder(object):
         report = ['%d differences in GSUB rules' % len(diffs)]
         report.extend(' '.join(diff) for diff in diffs)
         return '\n'.join(report[:self.output_lines + 1])
-
-    def _get_gsub_rules(self, text, filename):
-        """Get substitution rules in this ttxn output."""
-
-        feature_name_rx = r'feature (\w+) {'
-        contents_rx = r'feature %s {(.*?)} %s;'
-        rule_rx = r'sub ([\w.]+) by ([\w.]+);'
-
-        rules = set()
-        for name in re.findall(feature_name_rx, text):
-            contents = re.findall(contents_rx % (name, name), text, re.S)
-            assert len(contents) == 1, 'Multiple %s features in %s' % (
-                name, filename)
-            contents = contents[0]
-            for lhs, rhs in re.findall(rule_rx, contents):
-                rules.add((name, lhs, rhs))
-        return rules
@@ -30,6 +30,9 @@
 import argparse
 import re
 
+from nototools import tool_utils
+from nototools.codepoint_set import CodepointSet
+
 
 spec_format = """
 A spec defines a list of conditions to be run in sequence.  A condition consists of
@@ -90,12 +93,12 @@ def parse_int_ranges(range_string, is_hex=True, sep=' '):
   """Returns a set of ints from a string of numbers or ranges separated by sep.
   A range is two values separated by hyphen with no intervening separator.
   Result can be empty if range_string is empty."""
-  result = set()
+  ranges = []
   count = 0
   base = 16 if is_hex else 10
   range_string = range_string.strip()
   if not range_string:
-    return set()
+    return CodepointSet()
   value_list = range_string.split(sep)
   for val in value_list:
     if '-' in val: # assume range
@@ -106,48 +109,23 @@ def parse_int_ranges(range_string, is_hex=True, sep=' '):
       hi = int(val_list[1], base)
       if lo >= hi:
         raise ValueError('val range must have high > low')
-      result.update(range(lo, hi + 1))
+      ranges.append((lo, hi))
       count += hi - lo + 1
     else:
-      result.add(int(val, base))
+      v = int(val, base)
+      ranges.append((v, v))
       count += 1
+  result = CodepointSet.from_ranges(ranges)
   if len(result) != count:
     raise ValueError('duplicate values in %s, expected count is %d but result is %s' % (
-        hexlist, count, result))
+        range_string, count, write_int_ranges(result, is_hex)))
   return result
 
 
 def write_int_ranges(int_values, in_hex=True, sep=' '):
   """From a set or list of ints, generate a string representation that can
   be parsed by parse_int_ranges to return the original values (not order_preserving)."""
-
-  if not int_values:
-    return ''
-
-  num_list = []
-
-  if type(int_values) is not list:
-    int_values = [v for v in int_values]
-  int_values.sort()
-  start = prev = int_values[0]
-  single_fmt = '%04x' if in_hex else '%d'
-  pair_fmt = single_fmt + '-' + single_fmt
-
-  def emit():
-    if prev == start:
-      num_list.append(single_fmt % prev)
-    else:
-      num_list.append(pair_fmt % (start, prev))
-
-  for v in int_values[1:]:
-    if v == prev + 1:
-      prev += 1
-      continue
-    else:
-      emit()
-    start = prev = v
-  emit()
-  return sep.join(num_list)
+  return tool_utils.write_int_ranges(int_values, in_hex, sep)
 
 
 class IntSetFilter(object):
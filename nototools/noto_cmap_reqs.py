@@ -50,6 +50,7 @@ from nototools import noto_data
 from nototools import opentype_data
 from nototools import tool_utils
 from nototools import unicode_data
+from nototools.codepoint_set import CodepointSet
 
 _MERGED_SCRIPTS_BY_TARGET = {
     'CJK': 'Bopo Hang Hani Hans Hant Hira Jpan Kana Kore'.split(),
@@ -72,7 +73,7 @@ class CmapOps(object):
       self._script_to_chars = {}
     else:
       self._script_to_chars = {
-          script: set(script_to_chars[script])
+          script: CodepointSet(script_to_chars[script])
           for script in script_to_chars
       }
     self._log_events = log_events
@@ -193,7 +194,7 @@ class CmapOps(object):
 
   def create_script(self, script):
     self._verify_script_does_not_exist(script)
-    self._script_to_chars[script] = set()
+    self._script_to_chars[script] = CodepointSet()
     self._report('# create script: ' + script)
 
   def delete_script(self, script):
@@ -268,7 +269,7 @@ class CmapOps(object):
 
   def create_script_to_chars(self):
     return {
-        script: set(self._script_to_chars[script])
+        script: CodepointSet(self._script_to_chars[script])
         for script in self._script_to_chars
     }
 
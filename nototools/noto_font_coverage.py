@@ -17,9 +17,13 @@
 """A tool to output charmap coverage of the noto font families."""
 
 import argparse
+import bisect
 import collections
+import sys
 
 from nototools import noto_fonts
+from nototools import tool_utils
+from nototools.codepoint_set import CodepointSet
 
 def print_names(families):
   """Write the names of the families in sorted order."""
@@ -28,12 +32,104 @@ def print_names(families):
     print name
 
 
-def check_cp(families, cp):
-  return set([family.name for family in families.itervalues() if cp in family.charset])
+class CoverageIndex(object):
+  """An index from code points to the names of the families that support
+  them.
+
+  The code points are split into intervals each supported by the same
+  families, so a query is answered by joining its ranges with the intervals
+  rather than by checking each code point in each family."""
+
+  def __init__(self, families):
+    self.all_names = frozenset(
+        family.name for family in families.itervalues())
+    changes = collections.defaultdict(list)
+    for family in families.itervalues():
+      if not family.charset:
+        continue
+      for first, last in family.charset.ranges():
+        changes[first].append((family.name, 1))
+        changes[last + 1].append((family.name, -1))
+
+    # starts[i] is the first code point of the ith interval, and names[i]
+    # the families supporting it
+    self.starts = [0]
+    self.names = [frozenset()]
+    counts = collections.Counter()
+    active = set()
+    for cp in sorted(changes):
+      for name, delta in changes[cp]:
+        counts[name] += delta
+        if counts[name]:
+          active.add(name)
+        else:
+          active.discard(name)
+      names = frozenset(active)
+      if names == self.names[-1]:
+        continue
+      if self.starts[-1] == cp:
+        self.starts.pop()
+        self.names.pop()
+      self.starts.append(cp)
+      self.names.append(names)
+
+  def families(self, cp):
+    """Returns the names of the families supporting cp."""
+    return self.names[bisect.bisect_right(self.starts, cp) - 1]
+
+  def segments(self, cps):
+    """Yields (first, last, names) for the runs of the CodepointSet cps that
+    are supported by the same families, in order."""
+    for first, last in cps.ranges():
+      i = bisect.bisect_right(self.starts, first) - 1
+      while first <= last:
+        if i + 1 < len(self.starts):
+          end = min(last, self.starts[i + 1] - 1)
+        else:
+          end = last
+        yield first, end, self.names[i]
+        first = end + 1
+        i += 1
+
+  def each_coverage(self, cps):
+    """Returns a list of (CodepointSet, names) grouping successive code points
+    of cps supported by the same families."""
+    result = []
+    for first, last, names in self.segments(cps):
+      if result and result[-1][1] == names:
+        result[-1][0].append((first, last))
+      else:
+        result.append(([(first, last)], names))
+    return [(CodepointSet.from_ranges(ranges), names)
+            for ranges, names in result]
+
+  def any_coverage(self, cps):
+    """Returns a map from the name of each family supporting any of cps to
+    the CodepointSet of those it supports, and the CodepointSet of those no
+    family supports."""
+    name_to_ranges = collections.defaultdict(list)
+    missing = []
+    for first, last, names in self.segments(cps):
+      for name in names:
+        name_to_ranges[name].append((first, last))
+      if not names:
+        missing.append((first, last))
+    return (dict((name, CodepointSet.from_ranges(ranges))
+                 for name, ranges in name_to_ranges.iteritems()),
+            CodepointSet.from_ranges(missing))
+
+  def all_coverage(self, cps):
+    """Returns the names of the families supporting all of cps."""
+    result = self.all_names
+    for _, _, names in self.segments(cps):
+      result &= names
+      if not result:
+        break
+    return result
 
 
 def codepoints(cp_list):
-  result = set()
+  ranges = []
   for cp in cp_list:
     if '-' in cp:
       low, high = cp.split('-')
@@ -43,108 +139,87 @@ def codepoints(cp_list):
         temp = low
         low = high
         high = temp
-      for cp in range(low, high + 1):
-        result.add(cp)
+      ranges.append((low, high))
     else:
-      result.add(int(cp, 16))
-  return result
+      ranges.append((int(cp, 16), int(cp, 16)))
+  return CodepointSet.from_ranges(ranges)
 
 
 def to_ranges_str(cps):
-  if not cps:
-    return ''
+  return tool_utils.write_int_ranges(cps)
 
-  cps = sorted(cps)
-  ranges = []
 
-  def emit(first, last):
-    if first != last:
-      ranges.append('%04x-%04x' % (first, last))
+def print_each(index, cps):
+  def each_emit(out_cps, out_families):
+    if out_families:
+      out_family_str = '\n  '.join(sorted(out_families))
     else:
-      ranges.append('%04x' % first)
+      out_family_str = '<no coverage>'
+    print '%s:\n  %s' % (to_ranges_str(out_cps), out_family_str)
+
+  print 'families that contain any of %s, by cp' % to_ranges_str(cps)
+  coverage = index.each_coverage(cps)
+  if not any(out_families for _, out_families in coverage):
+    print 'no family supports any codepoint'
+  else:
+    for out_cps, out_families in coverage:
+      each_emit(out_cps, out_families)
 
-  first = cps[0]
-  last = first
-  for cp in cps[1:]:
-    if cp == last + 1:
-      last = cp
-    else:
-      emit(first, last)
-      first = cp
-      last = cp
-  emit(first, last)
-  return ' '.join(ranges)
+
+def print_any(index, cps):
+  print 'families that contain any of %s' % to_ranges_str(cps)
+  result, missing = index.any_coverage(cps)
+  if result:
+    for k, v in sorted(result.iteritems()):
+      print '  %s: %s' % (k, to_ranges_str(v))
+  if missing:
+    print '  not supported: %s' % to_ranges_str(missing)
+
+
+def print_all(index, cps):
+  print 'families that contain all of %s' % to_ranges_str(cps)
+  result = index.all_coverage(cps)
+  if result:
+    print '\n'.join(['  %s' % name for name in sorted(result)])
+  else:
+    print 'no family contains all the codepoints'
+
+
+_QUERY_PRINTERS = {'each': print_each, 'any': print_any, 'all': print_all}
+
+def run_batch(index, batch_file):
+  """Runs the queries in batch_file, one per line, each a query type (each,
+  any, or all) followed by code points as for the command line options."""
+  for line in batch_file:
+    line = line.split('#', 1)[0].split()
+    if not line:
+      continue
+    if line[0] not in _QUERY_PRINTERS or len(line) < 2:
+      print 'bad query: %s' % ' '.join(line)
+      continue
+    _QUERY_PRINTERS[line[0]](index, codepoints(line[1:]))
 
 
 def run(args, families):
   if args.names:
     print_names(families)
 
-  cp_to_families = collections.defaultdict(set)
+  index = CoverageIndex(families)
   if args.each:
-    def each_emit(out_cps, out_families):
-      if out_families:
-        out_family_str = '\n  '.join(sorted(out_families))
-      else:
-        out_family_str = '<no coverage>'
-      print '%s:\n  %s' % (to_ranges_str(out_cps), out_family_str)
-
-    cps = codepoints(args.each)
-    print 'families that contain any of %s, by cp' % to_ranges_str(cps)
-    for family in families.itervalues():
-      family_cps = family.charset & cps
-      for cp in family_cps:
-        cp_to_families[cp].add(family.name)
-
-    if not cp_to_families:
-      print 'no family supports any codepoint'
-    else:
-      cp_list = sorted(cps)
-      cp = cp_list[0]
-      out_cps = [cp]
-      out_families = cp_to_families[cp]
-      for cp in cp_list[1:]:
-        next_families = cp_to_families[cp]
-        if out_families == next_families:
-          out_cps.append(cp)
-        else:
-          each_emit(out_cps, out_families)
-          out_cps = [cp]
-          out_families = next_families
-      each_emit(out_cps, out_families)
+    print_each(index, codepoints(args.each))
 
   if args.any:
-    missing = set()
-    result = {}
-    cps = sorted(codepoints(args.any))
-    print 'families that contain any of %s' % to_ranges_str(cps)
-    for cp in cps:
-      family_names = check_cp(families, cp)
-      if family_names:
-        for family in family_names:
-          if family in result:
-            result[family].add(cp)
-          else:
-            result[family] = set([cp])
-      else:
-        missing.add(cp)
-    if result:
-      for k, v in sorted(result.iteritems()):
-        print '  %s: %s' % (k, to_ranges_str(v))
-    if missing:
-      print '  not supported: %s' % to_ranges_str(missing)
+    print_any(index, codepoints(args.any))
 
   if args.all:
-    cps = sorted(codepoints(args.all))
-    print 'families that contain all of %s' % to_ranges_str(cps)
-    result = set([family.name for family in families.itervalues()])
-    for cp in cps:
-      family_names = check_cp(families, cp)
-      result &= family_names
-    if result:
-      print '\n'.join(['  %s' % name for name in sorted(result)])
+    print_all(index, codepoints(args.all))
+
+  if args.batch:
+    if args.batch == '-':
+      run_batch(index, sys.stdin)
     else:
-      print 'no family contains all the codepoints'
+      with open(args.batch) as f:
+        run_batch(index, f)
 
 
 def main():
@@ -156,6 +231,9 @@ def main():
                       metavar='cp', nargs='+')
   parser.add_argument('--all', help='show families that support all of the codepoints',
                       metavar='cp', nargs='+')
+  parser.add_argument('--batch', help='file of queries, one per line, each '
+                      '\'each\', \'any\', or \'all\' followed by code points '
+                      '(- for stdin)', metavar='file')
   args = parser.parse_args()
 
   fonts = noto_fonts.get_noto_fonts()
@@ -21,11 +21,8 @@ from os import path
 import re
 import sys
 
-from fontTools import ttLib
-
 from nototools import cldr_data
-from nototools import coverage
-from nototools import font_data
+from nototools import font_index
 from nototools import lang_data
 from nototools import notoconfig
 from nototools import noto_data
@@ -467,8 +464,7 @@ def get_noto_fonts(paths=NOTO_FONT_PATHS):
 
 
 def get_font_family_name(font_file):
-    font = ttLib.TTFont(font_file, fontNumber=0)
-    name_record = font_data.get_name_records(font)
+    name_record = font_index.get_font_info(font_file).names
     try:
       name = name_record[16]
     except KeyError:
@@ -535,7 +531,7 @@ def get_families(fonts):
     name = get_font_family_name(rep_member.filepath)
 
     if rep_member.fmt in {'ttf', 'otf'}:
-      charset = coverage.character_set(rep_member.filepath)
+      charset = font_index.get_font_info(rep_member.filepath).cmap
     else:
       # was NotImplemented, but bool(NotImplemented) is True
       charset = None
@@ -550,8 +546,7 @@ def get_family_filename(family):
   """Returns a filename to use for a family zip of hinted/unhinted members.
      This is basically the postscript name with weight/style removed.
   """
-  font = ttLib.TTFont(family.rep_member.filepath, fontNumber=0)
-  name_record = font_data.get_name_records(font)
+  name_record = font_index.get_font_info(family.rep_member.filepath).names
   try:
     name = name_record[6]
     ix = name.find('-')
@@ -24,16 +24,18 @@ __author__ = (
 
 import argparse
 import collections
+import hashlib
 import itertools
 import json
 import math
+import multiprocessing
 import os
 from os import path
+import pickle
 import re
-import subprocess
 import sys
-import tempfile
 
+import fontTools
 from fontTools import subset
 from fontTools import ttLib
 from fontTools.ttLib.tables import otTables
@@ -51,6 +53,7 @@ from nototools import noto_fonts
 from nototools import noto_names
 from nototools import opentype_data
 from nototools import render
+from nototools import shaper
 from nototools import tool_utils
 from nototools import unicode_data
 
@@ -285,9 +288,42 @@ def to_float_tuples(curve):
     return tuple(coord_list)
 
 
-def curves_intersect(contour_list):
+def overlapping_piece_pairs(pieces):
+    """Returns the index pairs (i, j), i < j, of the pieces whose bounding
+    boxes overlap or touch, in the order itertools.combinations would produce
+    them.
+
+    This is a sweep over the boxes sorted by their left edge, keeping the boxes
+    that still extend to the right of the current one.  Boxes are padded by
+    _EPSILON so that rounding in curve_pieces_intersect's subdivision can never
+    find an intersection between pieces that were pruned here.
+    """
+    boxes = []
+    for piece in pieces:
+        x_min, y_min, x_max, y_max = calc_bounds(piece)
+        boxes.append((x_min - _EPSILON, y_min - _EPSILON,
+                      x_max + _EPSILON, y_max + _EPSILON))
+
+    pairs = []
+    active = []
+    for i in sorted(range(len(boxes)), key=lambda i: boxes[i][0]):
+        x_min, y_min, x_max, y_max = boxes[i]
+        active = [j for j in active if boxes[j][2] >= x_min]
+        for j in active:
+            if boxes[j][1] <= y_max and y_min <= boxes[j][3]:
+                pairs.append((i, j) if i < j else (j, i))
+        active.append(i)
+    pairs.sort()
+    return pairs
+
+
+def curves_intersect(contour_list, prune=True):
     """Takes a list of contours and tells if any two curves in them intersect.
     Returns a message string with an error, or None if ok.
+
+    Only pairs of pieces whose bounds overlap are tested exactly, unless prune
+    is false, in which case every pair is (this is only useful to compare the
+    two).  Either way the first intersecting pair is reported.
     """
     all_contours = []
     for contour in contour_list:
@@ -321,7 +357,13 @@ def curves_intersect(contour_list):
             adjacent_pairs.add(
                 frozenset({contour_pieces[-1], contour_pieces[0]}))
 
-    for piece1, piece2 in itertools.combinations(all_pieces, 2):
+    if prune:
+        pairs = overlapping_piece_pairs(all_pieces)
+    else:
+        pairs = itertools.combinations(range(len(all_pieces)), 2)
+    for i, j in pairs:
+        piece1 = all_pieces[i]
+        piece2 = all_pieces[j]
         # FIXME(roozbeh): we are ignoring one edge case: where end points
         # of the wrong side of an adjacent pair overlap. For example, if
         # a contour curves from A to B, then immediately back to A, and then
@@ -412,12 +454,6 @@ UI_ASCENT = 2189
 UI_DESCENT = -600
 
 
-_cur_file_name = None
-_printed_file_name = False
-_processed_files = 0
-_processed_files_with_errors = 0
-_processed_files_with_warnings = 0
-
 FontProps = collections.namedtuple(
     'FontProps',
     'is_google, vendor, char_version, '
@@ -456,14 +492,38 @@ def get_font_properties_with_fallback(file_path, phase):
         False, False, bool(ui), bool(ui), False, ''), 'name'
 
 
+class LintResult(object):
+    """The output of check_font for one font, and whether it found errors or
+    warnings."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.lines = []
+        self.has_errors = False
+        self.has_warnings = False
+
+    def write(self):
+        for line in self.lines:
+            print line
+        sys.stdout.flush()
+
+
 def check_font(font_props, filename_error,
                lint_spec, runlog=False, skiplog=False,
                csv_flag=False, info_flag=False,
                extrema_details=True, nowarn=False,
-               quiet=False, noto_phase=3, variable=False):
-    global _processed_files
+               quiet=False, noto_phase=3, variable=False,
+               echo=True):
+    """Checks the font and returns a LintResult with the output.  If echo is
+    true, the output is also printed as it is produced."""
 
-    _processed_files += 1
+    result = LintResult(font_props.filepath)
+
+    def emit(line):
+        result.lines.append(line)
+        if echo:
+            print line
+            sys.stdout.flush()
 
     def _noto_font_from_font_props(font_props):
       fields = """
@@ -476,26 +536,21 @@ def check_font(font_props, filename_error,
 
     noto_font = _noto_font_from_font_props(font_props)
 
+    interesting_part_of_file_name = ",".join(font_props.filepath.split("/")[-2:])
+    printed_file_name = [False]
+
     def warn(test_name, category_name, message, details=True, is_error=True, check_test=True):
-        global _cur_file_name, _printed_file_name
-        global _processed_files_with_errors, _processed_files_with_warnings
 
         def print_file_name():
-            global _printed_file_name
-            if not _printed_file_name:
-                _printed_file_name = True
-                print "---\nAutomatic testing for '%s', %s:" % (
-                    _cur_file_name,
-                    printable_font_versions(font))
+            if not printed_file_name[0]:
+                printed_file_name[0] = True
+                emit("---\nAutomatic testing for '%s', %s:" % (
+                    interesting_part_of_file_name,
+                    printable_font_versions(font)))
 
         if check_test and not tests.check(test_name):
           return
 
-        interesting_part_of_file_name = ",".join(font_props.filepath.split("/")[-2:])
-        if interesting_part_of_file_name != _cur_file_name:
-            _cur_file_name = interesting_part_of_file_name
-            _printed_file_name = False
-
         # Assumes "info" only and always comes at the end of
         # processing a file.
         if category_name is "info":
@@ -514,22 +569,22 @@ def check_font(font_props, filename_error,
                 print_file_name()
                 se = suppressed_err_count[0]
                 if not se:
-                    print "Found %s." % pluralize_errmsg(ec)
+                    emit("Found %s." % pluralize_errmsg(ec))
                 else:
-                    print "Found %s (%s hidden)." % (pluralize_errmsg(ec),
-                                                     "all" if se == ec else se)
+                    emit("Found %s (%s hidden)." % (pluralize_errmsg(ec),
+                                                    "all" if se == ec else se))
                 if wc and not nowarn:
                     sw = suppressed_warn_count[0]
                     if not sw and wc:
-                        print "Found %s." % pluralize_errmsg(wc, False)
+                        emit("Found %s." % pluralize_errmsg(wc, False))
                     elif wc:
-                        print "Found %s (%s hidden)." % (pluralize_errmsg(wc, False),
-                                                         "all" if sw == wc else sw)
+                        emit("Found %s (%s hidden)." % (pluralize_errmsg(wc, False),
+                                                        "all" if sw == wc else sw))
 
             if ec:
-                _processed_files_with_errors += 1
+                result.has_errors = True
             elif wc:
-                _processed_files_with_warnings += 1
+                result.has_warnings = True
 
             if not info_flag:
                 return
@@ -563,7 +618,7 @@ def check_font(font_props, filename_error,
             if font_props.slope:
                 names.append(font_props.slope)
             subfamily = ''.join(names)
-            print ('%s,%s,%s,%s,%s,%s,%s,%s,%s,"%s"' % (
+            emit(('%s,%s,%s,%s,%s,%s,%s,%s,%s,"%s"' % (
                 err_type,
                 noto_fonts.script_name_for_report(font_props.script),
                 font_props.style if font_props.style else '',
@@ -573,10 +628,9 @@ def check_font(font_props, filename_error,
                 category_name,
                 interesting_part_of_file_name,
                 printable_font_revision(font),
-                message)).encode('UTF-8')
+                message)).encode('UTF-8'))
         else:
-            print "%s <%s> %s" % (err_type[0], test_name, message.encode('UTF-8'))
-        sys.stdout.flush()
+            emit("%s <%s> %s" % (err_type[0], test_name, message.encode('UTF-8')))
 
 
     _script_key_to_font_name = {
@@ -1464,26 +1518,16 @@ def check_font(font_props, filename_error,
 
 
     def check_shaping(font_file, strs, context, errors):
-        text = '\n'.join(strs)
-        temp_file = tempfile.NamedTemporaryFile(suffix='.txt')
-        try:
-            temp_file.write(text.encode("utf-8"))
-            temp_file.flush()
-            command = ['hb-shape', '--font-file=%s' % font_file,
-                       '--text-file=%s' % temp_file.name]
-            features = []
-            if context != 'isol':
-                features.append('-isol')
-            if context:
-                features.append(context)
-            command.append('--features=%s' % ','.join(features))
-            # print "command: %s" % ' '.join(command)
-            result = subprocess.check_output(command)
-            for src, res in zip(strs, result.splitlines()):
-                if res.find('|') != -1:
-                    errors.append((src, context, res))
-        finally:
-            temp_file.close()
+        features = []
+        if context != 'isol':
+            features.append('-isol')
+        if context:
+            features.append(context)
+        results = shaper.get_shaper(font_file).shape_lines(
+            strs, features=','.join(features), glyph_names=True)
+        for src, glyphs in zip(strs, results):
+            if len(glyphs) > 1:
+                errors.append((src, context, shaper.format_glyphs(glyphs)))
 
 
     def check_gsub_variants():
@@ -1964,18 +2008,20 @@ def check_font(font_props, filename_error,
         log = sorted(tests.runlog())
         count = len(log)
         if count:
-          print 'Ran %d test%s:\n  %s' % (count, 's' if count != 1 else '',
-                                        '\n  '.join(log))
+          emit('Ran %d test%s:\n  %s' % (count, 's' if count != 1 else '',
+                                        '\n  '.join(log)))
         else:
-          print 'Ran no tests.'
+          emit('Ran no tests.')
     if skiplog:
         log = sorted(tests.skiplog())
         count = len(log)
         if len(log):
-          print 'Skipped %d test/group%s:\n  %s' % (count, 's' if count != 1 else '',
-                                            '\n  '.join(log))
+          emit('Skipped %d test/group%s:\n  %s' % (count, 's' if count != 1 else '',
+                                            '\n  '.join(log)))
         else:
-          print 'Skipped no tests'
+          emit('Skipped no tests')
+
+    return result
 
     # TODO(roozbeh):
     # * Check that hintedness based on data in the glyf table
@@ -2008,6 +2054,126 @@ def write_font_props(font_props):
   print json.dumps(font_props._asdict())
 
 
+# lint spec and check_font options for fonts checked in a worker process
+_worker_lint_spec = None
+_worker_options = None
+
+def _init_lint_worker(config_file, extra_specs, options):
+  global _worker_lint_spec, _worker_options
+  _worker_lint_spec = get_lint_spec(config_file, extra_specs)
+  _worker_options = options
+
+
+def _lint_in_worker(job):
+  font_props, filename_error = job
+  return check_font(font_props, filename_error, _worker_lint_spec,
+                    echo=False, **_worker_options)
+
+
+# Results of check_font are cached by a hash of everything that determines
+# them: the font data, the lint spec, the options (including the phase), and
+# the version of the lint code, the data it loads, and the shaper it uses.
+# Bump this to invalidate existing entries.
+_LINT_CACHE_VERSION = 2
+
+_TOOLS_DIR = path.abspath(path.join(path.dirname(__file__), os.pardir))
+
+# Data loaded by the modules noto_lint uses, such as unicode_data, cmap_data,
+# cldr_data and noto_data.
+_LINT_DATA_DIRS = [
+    path.join(_TOOLS_DIR, 'nototools', 'data'),
+    path.join(_TOOLS_DIR, 'third_party', 'cldr'),
+    path.join(_TOOLS_DIR, 'third_party', 'ucd'),
+    path.join(_TOOLS_DIR, 'third_party', 'unicode'),
+]
+
+def _lint_cache_dir():
+  return path.join(notoconfig.noto_cache(), 'noto_lint')
+
+
+def _file_hash(file_path):
+  with open(file_path, 'rb') as f:
+    return hashlib.sha1(f.read()).hexdigest()
+
+
+def _nototools_source_files():
+  """Returns the sorted source paths of the loaded nototools modules, which
+  include every module noto_lint imports directly or indirectly."""
+  package_dir = path.join(_TOOLS_DIR, 'nototools') + os.sep
+  sources = set()
+  for module in sys.modules.values():
+    module_file = getattr(module, '__file__', None)
+    if not module_file:
+      continue
+    source_path = path.splitext(path.abspath(module_file))[0] + '.py'
+    if source_path.startswith(package_dir) and path.isfile(source_path):
+      sources.add(source_path)
+  return sorted(sources)
+
+
+def _data_files():
+  """Returns the sorted paths of the files under _LINT_DATA_DIRS."""
+  files = []
+  for data_dir in _LINT_DATA_DIRS:
+    for dirpath, dirnames, filenames in os.walk(data_dir):
+      files.extend(path.join(dirpath, name) for name in filenames
+                   if not name.endswith(('.pyc', '.pyo')))
+  return sorted(files)
+
+
+def _tool_version():
+  """Returns a hash of the source of the lint code and the modules it uses,
+  the data files they load, and the versions of fontTools and the shaper."""
+  version = hashlib.sha1(repr((
+      getattr(fontTools, 'version', None), shaper.backend_version())))
+  for file_path in _nototools_source_files() + _data_files():
+    version.update(path.relpath(file_path, _TOOLS_DIR))
+    version.update(_file_hash(file_path))
+  return version.hexdigest()
+
+
+def _lint_spec_hash(config_file, extra_specs):
+  spec_hash = hashlib.sha1(repr(extra_specs))
+  if config_file != 'None':
+    with open(config_file, 'rb') as f:
+      spec_hash.update(f.read())
+  return spec_hash.hexdigest()
+
+
+def _lint_cache_key(font_props, filename_error, spec_hash, tool_version,
+                    options):
+  key = hashlib.sha1(repr((
+      _LINT_CACHE_VERSION, tool_version, spec_hash, sorted(options.items()),
+      tuple(font_props), filename_error)))
+  key.update(_file_hash(path.expanduser(font_props.filepath)))
+  return key.hexdigest()
+
+
+def _read_cached_result(cache_dir, key, filepath):
+  """Returns the LintResult cached under key, or None."""
+  try:
+    with open(path.join(cache_dir, key + '.pickle'), 'rb') as f:
+      lines, has_errors, has_warnings = pickle.load(f)
+  except Exception:
+    return None
+  result = LintResult(filepath)
+  result.lines = lines
+  result.has_errors = has_errors
+  result.has_warnings = has_warnings
+  return result
+
+
+def _write_cached_result(cache_dir, key, result):
+  if not path.isdir(cache_dir):
+    os.makedirs(cache_dir)
+  cache_path = path.join(cache_dir, key + '.pickle')
+  temp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+  with open(temp_path, 'wb') as f:
+    pickle.dump((result.lines, result.has_errors, result.has_warnings), f,
+                pickle.HIGHEST_PROTOCOL)
+  os.rename(temp_path, cache_path)
+
+
 def main():
     default_config_file = notoconfig.get(
         'lint_config', '[tools]/nototools/data/lint_config.txt')
@@ -2077,6 +2243,20 @@ def main():
         "-v", "--variable",
         help="do checks appropriate to masters for variable fonts.",
         action="store_true")
+    parser.add_argument(
+        "-j", "--jobs",
+        help="number of fonts to check in parallel (default 1, 0 for one "
+        "per cpu); output is still in the order of the fonts",
+        metavar='n', type=int, default=1)
+    parser.add_argument(
+        "--cache",
+        help="replay the cached results of fonts that have already been "
+        "checked with the same spec and options, and cache the others",
+        action="store_true")
+    parser.add_argument(
+        "--cache_dir",
+        help="directory for cached results (default %s)" % _lint_cache_dir(),
+        metavar='dir')
 
     arguments = parser.parse_args()
 
@@ -2098,56 +2278,104 @@ def main():
         print("Type,Script,Style,Variant,Subfamily,Manufacturer,Category,"
               "Hint Status,File Name,Revision,Issue")
 
+    # (font_props, filename_error), or (None, message) if the file name
+    # couldn't be parsed
+    jobs = []
     for font_file_path in arguments.font_files:
         font_file_path = tool_utils.resolve_path(font_file_path)
         font_props, filename_error = get_font_properties_with_fallback(
             font_file_path, phase=arguments.phase)
         if not font_props:
-            print '## ERROR: cannot parse %s' % font_file_path
+            jobs.append((None, '## ERROR: cannot parse %s' % font_file_path))
         else:
-            check_font(font_props,
-                       filename_error,
-                       lint_spec,
-                       arguments.runlog,
-                       arguments.skiplog,
-                       arguments.csv,
-                       arguments.info,
-                       arguments.extrema_details,
-                       arguments.nowarn,
-                       arguments.quiet,
-                       arguments.phase,
-                       arguments.variable)
+            jobs.append((font_props, filename_error))
     if arguments.font_props_file:
         font_props_list = parse_font_props(arguments.font_props_file)
-        for font_props in font_props_list:
-             check_font(font_props,
-                        '',
-                        lint_spec,
-                        arguments.runlog,
-                        arguments.skiplog,
-                        arguments.csv,
-                        arguments.info,
-                        arguments.extrema_details,
-                        arguments.nowarn,
-                        arguments.quiet,
-                        arguments.phase,
-                        arguments.variable)
+        jobs.extend((font_props, '') for font_props in font_props_list)
+
+    options = dict(
+        runlog=arguments.runlog,
+        skiplog=arguments.skiplog,
+        csv_flag=arguments.csv,
+        info_flag=arguments.info,
+        extrema_details=arguments.extrema_details,
+        nowarn=arguments.nowarn,
+        quiet=arguments.quiet,
+        noto_phase=arguments.phase,
+        variable=arguments.variable)
+    font_jobs = [job for job in jobs if job[0]]
+
+    # look up the cached results, and only check the fonts without one
+    cache_dir = None
+    if arguments.cache:
+        cache_dir = tool_utils.resolve_path(
+            arguments.cache_dir or _lint_cache_dir())
+        spec_hash = _lint_spec_hash(config_file, arguments.config)
+        tool_version = _tool_version()
+    cache_keys = []
+    cached_results = []
+    for font_props, filename_error in font_jobs:
+        key = cached = None
+        if cache_dir:
+            key = _lint_cache_key(
+                font_props, filename_error, spec_hash, tool_version, options)
+            cached = _read_cached_result(cache_dir, key, font_props.filepath)
+        cache_keys.append(key)
+        cached_results.append(cached)
+    jobs_to_check = [
+        job for job, cached in zip(font_jobs, cached_results) if not cached]
+
+    num_procs = arguments.jobs or multiprocessing.cpu_count()
+    pool = None
+    if num_procs > 1 and len(jobs_to_check) > 1:
+        pool = multiprocessing.Pool(
+            min(num_procs, len(jobs_to_check)), _init_lint_worker,
+            (config_file, arguments.config, options))
+        lint_results = pool.imap(_lint_in_worker, jobs_to_check)
+    else:
+        lint_results = (
+            check_font(font_props, filename_error, lint_spec, **options)
+            for font_props, filename_error in jobs_to_check)
+
+    results = []
+    font_job_results = iter(zip(cache_keys, cached_results))
+    for font_props, message in jobs:
+        if not font_props:
+            print message
+            continue
+        key, result = next(font_job_results)
+        if result:
+            result.write()
+        else:
+            result = next(lint_results)
+            if pool:
+                result.write()
+            if key:
+                try:
+                    _write_cached_result(cache_dir, key, result)
+                except (IOError, OSError):
+                    pass
+        results.append(result)
+    if pool:
+        pool.close()
+        pool.join()
 
     if not arguments.csv:
+        num_files = len(results)
+        num_with_errors = sum(1 for r in results if r.has_errors)
+        num_with_warnings = sum(1 for r in results if r.has_warnings)
         print "------"
-        if _processed_files == 1:
+        if num_files == 1:
             print "Finished linting 1 file."
         else:
-            print "Finished linting %d files." % _processed_files
-        if _processed_files > 1:
-            if _processed_files_with_errors:
+            print "Finished linting %d files." % num_files
+        if num_files > 1:
+            if num_with_errors:
                 print "%d file%s had errors." % (
-                    _processed_files_with_errors,
-                    '' if _processed_files_with_errors == 1 else 's')
-            if _processed_files_with_warnings:
+                    num_with_errors, '' if num_with_errors == 1 else 's')
+            if num_with_warnings:
                 print "%d file%s had warnings." % (
-                    _processed_files_with_warnings,
-                    '' if _processed_files_with_warnings == 1 else 's')
+                    num_with_warnings, '' if num_with_warnings == 1 else 's')
 
 if __name__ == "__main__":
     main()
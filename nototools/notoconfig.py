@@ -21,7 +21,9 @@ This expects a file named '.notoconfig' in the users home directory.
 It should contain lines consisting of a name, '=' and a path.  The
 expected names are 'noto_tools', 'noto_fonts', 'noto_cjk',
 'noto_emoji', and 'noto_source'.  The values are absolute paths
-to the base directories of these noto repositories.
+to the base directories of these noto repositories.  The optional
+name 'noto_cache' is the directory where tools keep caches of data
+they derive from these repositories.
 
 Formerly these were a single repository so the paths could all be reached
 from a single root, but that is no longer the case.
@@ -108,6 +110,10 @@ def noto_fonts_alpha(default=''):
   """Local path to noto-fonts-alpha git repo"""
   return _values.get('noto_fonts_alpha', default)
 
+def noto_cache(default=path.expanduser('~/.cache/nototools')):
+  """Local path to the directory for caches of derived data."""
+  return _values.get('noto_cache', default)
+
 def get(key, default=''):
   return _values.get(key, default)
 
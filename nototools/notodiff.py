@@ -26,7 +26,9 @@ from __future__ import print_function
 
 import argparse
 import glob
+import heapq
 import logging
+import multiprocessing
 import os
 import sys
 
@@ -34,20 +36,32 @@ from nototools import gpos_diff, gsub_diff, shape_diff
 
 logger = logging.getLogger('notodiff')
 
+SHAPE_DIFF_TYPES = ('area', 'shape', 'area-shape-product', 'rendered')
+
+# shape comparisons done by the 'all' diff type; area-shape-product would
+# repeat the area and shape comparisons
+ALL_SHAPE_DIFF_TYPES = ('area', 'shape', 'rendered')
+
 
 def _shape(
         path_a, path_b, stats, diff_type, font_size, render_path,
-        diff_threshold=0):
+        diff_threshold=0, renderer='hb-view'):
     """Do a shape comparison (glyph area or rendered) and add results to stats.
 
     path_a and b refer to binary font files (OTF or TTF). stats should be a
     list (possibly empty) of <diff, glyph-name, font-name> tuples, for sorting.
-    diff_type and render_path are passed through from the original call to
-    notodiff.
+    diff_type, render_path and renderer are passed through from the original
+    call to notodiff.
     """
 
     diff_finder = shape_diff.ShapeDiffFinder(
         path_a, path_b, stats, ratio_diffs=True, diff_threshold=diff_threshold)
+    _find_shape_diffs(diff_finder, diff_type, font_size, render_path, renderer)
+
+
+def _find_shape_diffs(diff_finder, diff_type, font_size, render_path,
+                      renderer):
+    """Run the diff_finder method for diff_type."""
 
     if diff_type == 'area':
         diff_finder.find_area_diffs()
@@ -56,62 +70,151 @@ def _shape(
     elif diff_type == 'area-shape-product':
         diff_finder.find_area_shape_diff_products()
     else:
-        diff_finder.find_rendered_diffs(font_size, render_path)
+        diff_finder.find_rendered_diffs(font_size, render_path, renderer)
+
+
+def _shape_pair(path_a, path_b, *args):
+    """Do a shape comparison of one pair of fonts and return its stats.
+
+    Variable arguments are passed through to _shape after stats.
+    """
 
+    stats = {}
+    _shape(path_a, path_b, stats, *args)
+    return stats
 
-def _gpos(path_a, path_b, error_bound, out_lines, print_font=False):
-    """Do a GPOS table comparison and print results.
 
-    path_a and b refer to binaries from which ttxn output is made. print_font
-    is a boolean flag designating whether to print path_a (useful if _gpos is
+def _merge_shape_stats(stats, pair_stats, whitelist, out_lines):
+    """Add the stats of one pair of fonts to the accumulated stats.
+
+    Compared glyphs in whitelist are dropped, and only the out_lines largest
+    differences are kept, since no more will be reported.  The number of
+    differences is kept in 'compared_count' for the report.
+    """
+
+    compared = [s for s in pair_stats.pop('compared') if s[1] not in whitelist]
+    stats['compared_count'] = stats.get('compared_count', 0) + len(compared)
+    stats['compared'] = heapq.nlargest(
+        out_lines, stats.get('compared', []) + compared)
+    for stat_type, values in pair_stats.items():
+        stats.setdefault(stat_type, []).extend(values)
+
+
+def _gpos(path_a, path_b, error_bound, out_lines, print_font=False,
+          font_a=None, font_b=None):
+    """Do a GPOS table comparison and return the report.
+
+    path_a and b refer to binaries from which the GPOS rules are read, unless
+    the loaded fonts are passed as font_a and b. print_font is a boolean flag
+    designating whether to include path_a in the report (useful if _gpos is
     being called multiple times in succession).
     """
 
+    report = []
     if print_font:
-        print('-- %s --' % os.path.basename(path_a))
+        report.append('-- %s --' % os.path.basename(path_a))
     diff_finder = gpos_diff.GposDiffFinder(path_a, path_b, error_bound,
-                                           out_lines)
-    print(diff_finder.find_kerning_diffs())
-    print(diff_finder.find_mark_class_diffs())
-    print(diff_finder.find_positioning_diffs())
-    print(diff_finder.find_positioning_diffs(mark_type='mark'))
-    print()
+                                           out_lines, font_a, font_b)
+    report.append(diff_finder.find_kerning_diffs())
+    report.append(diff_finder.find_mark_class_diffs())
+    report.append(diff_finder.find_positioning_diffs())
+    report.append(diff_finder.find_positioning_diffs(mark_type='mark'))
+    report.append('')
+    return '\n'.join(report)
+
+
+def _gsub(path_a, path_b, out_lines, print_font=False, font_a=None,
+          font_b=None):
+    """Do a GSUB table comparison and return the report.
+
+    path_a and b refer to binaries from which the GSUB rules are read, unless
+    the loaded fonts are passed as font_a and b. print_font is a boolean flag
+    designating whether to include path_a in the report (useful if _gsub is
+    being called multiple times in succession).
+    """
 
+    report = []
+    if print_font:
+        report.append('-- %s --' % os.path.basename(path_a))
+    diff_finder = gsub_diff.GsubDiffFinder(path_a, path_b, out_lines,
+                                           font_a, font_b)
+    report.append(diff_finder.find_gsub_diffs())
+    report.append('')
+    return '\n'.join(report)
 
-def _gsub(path_a, path_b, out_lines, print_font=False):
-    """Do a GSUB table comparison and print results.
 
-    path_a and b refer to binaries from which ttxn output is made. print_font
-    is a boolean flag designating whether to print path_a (useful if _gsub is
-    being called multiple times in succession).
+def _all(path_a, path_b, font_size, render_path, diff_threshold, out_lines,
+         renderer='hb-view', print_font=False):
+    """Do all comparisons of a pair of fonts, loading each font once.
+
+    Returns a map from each of ALL_SHAPE_DIFF_TYPES to its stats, the GPOS
+    report and the GSUB report. Each of the stats holds what a comparison of
+    that type alone would report.
     """
 
-    if print_font:
-        print('-- %s --' % os.path.basename(path_a))
-    diff_finder = gsub_diff.GsubDiffFinder(path_a, path_b, out_lines)
-    print(diff_finder.find_gsub_diffs())
-    print()
+    shape_stats = {}
+    diff_finder = shape_diff.ShapeDiffFinder(
+        path_a, path_b, {}, ratio_diffs=True, diff_threshold=diff_threshold)
+    for diff_type in ALL_SHAPE_DIFF_TYPES:
+        shape_stats[diff_type] = {}
+        diff_finder.set_stats(shape_stats[diff_type])
+        _find_shape_diffs(
+            diff_finder, diff_type, font_size, render_path, renderer)
+
+    # the glyph names are only matched once, by the first comparison, so
+    # copy the glyph coverage and unicode value mismatches into the others
+    first_stats = shape_stats[ALL_SHAPE_DIFF_TYPES[0]]
+    for diff_type in ALL_SHAPE_DIFF_TYPES[1:]:
+        for stat_type in ('unmatched', 'unicode_mismatch'):
+            shape_stats[diff_type][stat_type] = list(first_stats[stat_type])
+
+    fonts = diff_finder.font_a, diff_finder.font_b
+    return (shape_stats,
+            _gpos(path_a, path_b, diff_threshold, out_lines, print_font,
+                  *fonts),
+            _gsub(path_a, path_b, out_lines, print_font, *fonts))
+
 
+def _run_pair(job):
+    func, path_a, path_b, args = job
+    return func(path_a, path_b, *args)
 
-def _run_multiple(func, filematch, dir_a, dir_b, *args):
-    """Run a comparison function (probably _shape or _gpos) multiple times.
+
+def _run_multiple(func, filematch, dir_a, dir_b, jobs, *args):
+    """Run a comparison function (probably _shape_pair or _gpos) multiple times.
 
     Runs the given function "func" for each file in dir_a matching filematch,
-    comparing it with a respective file of the same name in dir_b. Variable
-    arguments are passed through when calling func.
+    comparing it with a respective file of the same name in dir_b, and
+    generates the results in the order of the file names. Variable arguments
+    are passed through when calling func. If jobs is greater than one (or 0,
+    for one per cpu) the pairs are compared in that many processes.
     """
 
-    compared = 0
-    for path_a in glob.glob(os.path.join(dir_a, filematch)):
+    pairs = []
+    for path_a in sorted(glob.glob(os.path.join(dir_a, filematch))):
         path_b = path_a.replace(dir_a, dir_b)
         if os.path.exists(path_b):
-            compared += 1
-            tail = path_a[len(dir_a):]
-            if tail.startswith('/'):
-                tail = tail[1:]
-            logger.info('Compare %s' % tail)
-            func(path_a, path_b, *args)
-    logger.info('Compared %d fonts' % compared)
+            pairs.append((path_a, path_b))
+
+    pool = None
+    num_procs = jobs or multiprocessing.cpu_count()
+    if num_procs > 1 and len(pairs) > 1:
+        pool = multiprocessing.Pool(min(num_procs, len(pairs)))
+        results = pool.imap(
+            _run_pair, [(func, path_a, path_b, args) for path_a, path_b in pairs])
+    else:
+        results = (func(path_a, path_b, *args) for path_a, path_b in pairs)
+
+    for (path_a, _), result in zip(pairs, results):
+        tail = path_a[len(dir_a):]
+        if tail.startswith('/'):
+            tail = tail[1:]
+        logger.info('Compare %s' % tail)
+        yield result
+    if pool:
+        pool.close()
+        pool.join()
+    logger.info('Compared %d fonts' % len(pairs))
 
 
 def _validate_paths(before_path, after_path):
@@ -133,15 +236,19 @@ def main():
     parser.add_argument('--after', required=True,
                         help='second font, or directory if match is used')
     parser.add_argument('-t', '--diff-type', default='area',
-                        choices=('area', 'shape', 'area-shape-product',
-                                 'rendered', 'gpos', 'gsub'),
-                        help='type of comparison to run (defaults to "area")')
+                        choices=SHAPE_DIFF_TYPES + ('gpos', 'gsub', 'all'),
+                        help='type of comparison to run (defaults to "area"), '
+                        'or "all" to run the area, shape, rendered, gpos and '
+                        'gsub comparisons in one pass')
     parser.add_argument('-m', '--match',
                         help='glob to match files under the BEFORE directory, '
                         'to compare against those with the same names under '
                         'the AFTER directory.')
     parser.add_argument('-l', '--out-lines', type=int, default=20,
                         help='number of differences to print (default 20)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='if MATCH is provided, number of font pairs to '
+                        'compare in parallel (default 1, 0 for one per cpu)')
     parser.add_argument('-w', '--whitelist', nargs='+', default=(),
                         help='list of one or more glyph names to ignore for '
                         'area or rendered differences')
@@ -150,25 +257,37 @@ def main():
                         'samples at (default 128)')
     parser.add_argument('--render-path', help='if provided and DIFF_TYPE is '
                         '"rendered", saves comparison renderings here')
+    parser.add_argument('--renderer', choices=('hb-view', 'freetype'),
+                        default='hb-view',
+                        help='if DIFF_TYPE is "rendered", how to render '
+                        'samples (default "hb-view"); "freetype" renders '
+                        'in-process with freetype-py, and its diffs are not '
+                        'comparable with those of hb-view')
     parser.add_argument('--diff-threshold', type=float, default=0,
                         help='minimal diff to report (default 0)')
     parser.add_argument('--verbose', default='WARNING')
     args = parser.parse_args()
+    if args.renderer == 'freetype' and not shape_diff._HAVE_FREETYPE:
+        parser.error('the freetype renderer requires freetype-py')
 
     logging.basicConfig(level=getattr(logging, args.verbose.upper()))
 
     if not _validate_paths(args.before, args.after):
         return 1
 
-    if args.diff_type in ('area', 'shape', 'area-shape-product', 'rendered'):
+    if args.diff_type in SHAPE_DIFF_TYPES:
         stats = {}
         if args.match:
-            _run_multiple(_shape, args.match, args.before, args.after, stats,
-                          args.diff_type, args.font_size, args.render_path,
-                          args.diff_threshold)
+            for pair_stats in _run_multiple(
+                    _shape_pair, args.match, args.before, args.after,
+                    args.jobs, args.diff_type, args.font_size,
+                    args.render_path, args.diff_threshold, args.renderer):
+                _merge_shape_stats(
+                    stats, pair_stats, args.whitelist, args.out_lines)
         else:
             _shape(args.before, args.after, stats, args.diff_type,
-                   args.font_size, args.render_path, args.diff_threshold)
+                   args.font_size, args.render_path, args.diff_threshold,
+                   args.renderer)
 
         if stats:
             print(shape_diff.ShapeDiffFinder.dump(
@@ -178,17 +297,56 @@ def main():
 
     elif args.diff_type == 'gpos':
         if args.match:
-            _run_multiple(_gpos, args.match, args.before, args.after,
-                          args.diff_threshold, args.out_lines, True)
+            for report in _run_multiple(
+                    _gpos, args.match, args.before, args.after, args.jobs,
+                    args.diff_threshold, args.out_lines, True):
+                print(report)
         else:
-            _gpos(args.before, args.after, args.diff_threshold, args.out_lines)
+            print(_gpos(args.before, args.after, args.diff_threshold,
+                        args.out_lines))
 
     elif args.diff_type == 'gsub':
         if args.match:
-            _run_multiple(_gsub, args.match, args.before, args.after,
-                          args.out_lines, True)
+            for report in _run_multiple(
+                    _gsub, args.match, args.before, args.after, args.jobs,
+                    args.out_lines, True):
+                print(report)
+        else:
+            print(_gsub(args.before, args.after, args.out_lines))
+
+    elif args.diff_type == 'all':
+        shape_stats = dict((diff_type, {})
+                           for diff_type in ALL_SHAPE_DIFF_TYPES)
+        gpos_reports = []
+        gsub_reports = []
+        if args.match:
+            results = _run_multiple(
+                _all, args.match, args.before, args.after, args.jobs,
+                args.font_size, args.render_path, args.diff_threshold,
+                args.out_lines, args.renderer, True)
         else:
-            _gsub(args.before, args.after, args.out_lines)
+            results = [_all(args.before, args.after, args.font_size,
+                            args.render_path, args.diff_threshold,
+                            args.out_lines, args.renderer)]
+        for pair_shape_stats, gpos_report, gsub_report in results:
+            for diff_type in ALL_SHAPE_DIFF_TYPES:
+                _merge_shape_stats(shape_stats[diff_type],
+                                   pair_shape_stats[diff_type],
+                                   args.whitelist, args.out_lines)
+            gpos_reports.append(gpos_report)
+            gsub_reports.append(gsub_report)
+
+        for diff_type in ALL_SHAPE_DIFF_TYPES:
+            print('== %s ==' % diff_type)
+            print(shape_diff.ShapeDiffFinder.dump(
+                shape_stats[diff_type], args.whitelist, args.out_lines,
+                include_vals=(diff_type == 'area'),
+                multiple_fonts=bool(args.match)))
+        for diff_type, reports in (('gpos', gpos_reports),
+                                   ('gsub', gsub_reports)):
+            print('== %s ==' % diff_type)
+            for report in reports:
+                print(report)
 
     else:
         assert 0, 'Got unhandled diff type "%s"' % args.diff_type
@@ -30,9 +30,8 @@ def _set_ompl():
     """
 
     global OMPL
-    unicode_data.load_data()
-    bmg_data = unicode_data._bidi_mirroring_glyph_data
-    OMPL = {char:bmg for (char, bmg) in bmg_data.items()
+    OMPL = {char: unicode_data.bidi_mirroring_glyph(char)
+            for char in unicode_data.mirrored_chars()
             if float(unicode_data.age(char)) <= 5.1}
 
 
@@ -0,0 +1,233 @@
+# Copyright 2017 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""Extracts OpenType Layout rules from a font for comparison.
+
+The rules are read from the compiled GPOS and GSUB tables, the same structures
+dump_otl prints, and returned as sets and dicts keyed by glyph names so that
+the rules of two fonts can be compared directly:
+
+- `kerning_pairs` maps (left, right) glyph pairs to kerning values.
+- `mark_classes` maps (mark, mark class) to the mark's anchor.
+- `mark_attachments` maps (base, mark class) to the base's anchor.
+- `gsub_rules` is the set of (feature, input, output) substitutions.
+
+Compiled tables don't keep mark class names, so a mark class is named after
+its first member in glyph name order, as '@<glyph>'.
+"""
+
+
+from nototools import dump_otl
+
+
+_EXTENSION_TYPES = {'GSUB': 7, 'GPOS': 9}
+
+
+def subtables(lookup, table_name):
+    """Yields (lookup type, subtable) for each subtable in a lookup, looking
+    through extension subtables."""
+
+    for subtable in lookup.SubTable:
+        if lookup.LookupType == _EXTENSION_TYPES[table_name]:
+            yield subtable.ExtensionLookupType, subtable.ExtSubTable
+        else:
+            yield lookup.LookupType, subtable
+
+
+def table_subtables(font, table_name):
+    """Yields (lookup type, subtable) for each subtable in a GPOS or GSUB
+    table, in lookup order."""
+
+    if table_name not in font:
+        return
+    for lookup in font[table_name].table.LookupList.Lookup:
+        for subtable in subtables(lookup, table_name):
+            yield subtable
+
+
+def feature_lookups(font, table_name):
+    """Returns a map from feature tag to the sorted indices of the lookups the
+    feature uses, in any script or language."""
+
+    result = {}
+    if table_name not in font:
+        return result
+    for record in font[table_name].table.FeatureList.FeatureRecord:
+        result.setdefault(record.FeatureTag, set()).update(
+            record.Feature.LookupListIndex)
+    return dict((tag, sorted(indices)) for tag, indices in result.iteritems())
+
+
+def _class_glyphs(class_def, coverage=None):
+    """Returns a map from class to the glyphs in a ClassDef.  Class 0 is only
+    included if coverage is given, and holds the covered glyphs not assigned
+    to another class."""
+
+    classes = dump_otl.reverse_class_def(class_def.classDefs)
+    classes.pop(0, None)
+    if coverage is not None:
+        class_zero = set(coverage.glyphs).difference(class_def.classDefs)
+        if class_zero:
+            classes[0] = class_zero
+    return classes
+
+
+def _kerning_value(value_record):
+    """Returns the x advance of a value record adjusting only that, or None."""
+
+    if value_record is None or vars(value_record).keys() != ['XAdvance']:
+        return None
+    return value_record.XAdvance
+
+
+def kerning_pairs(font):
+    """Returns a map from (left, right) glyph names to the list of kerning
+    values in the font's pair positioning rules, in lookup order.
+
+    Only pairs adjusting just the x advance of the first glyph are included.
+    """
+
+    pairs = {}
+    for lookup_type, subtable in table_subtables(font, 'GPOS'):
+        if lookup_type != 2:
+            continue
+
+        if subtable.Format == 1:
+            for left, pair_set in zip(subtable.Coverage.glyphs,
+                                      subtable.PairSet):
+                for record in pair_set.PairValueRecord:
+                    value = _kerning_value(record.Value1)
+                    if value is not None and record.Value2 is None:
+                        pairs.setdefault(
+                            (left, record.SecondGlyph), []).append(value)
+
+        elif subtable.Format == 2:
+            classes1 = _class_glyphs(subtable.ClassDef1, subtable.Coverage)
+            classes2 = _class_glyphs(subtable.ClassDef2)
+            for index1, class1_record in enumerate(subtable.Class1Record):
+                if index1 not in classes1:
+                    continue
+                for index2, record in enumerate(class1_record.Class2Record):
+                    value = _kerning_value(record.Value1)
+                    if (index2 not in classes2 or not value or
+                        record.Value2 is not None):
+                        continue
+                    for left in sorted(classes1[index1]):
+                        for right in sorted(classes2[index2]):
+                            pairs.setdefault((left, right), []).append(value)
+    return pairs
+
+
+def _anchor_point(anchor):
+    return anchor.XCoordinate, anchor.YCoordinate
+
+
+def _mark_class_names(mark_coverage, mark_array):
+    """Returns a map from mark class index to the name of the class."""
+
+    classes = {}
+    for glyph, record in zip(mark_coverage.glyphs, mark_array.MarkRecord):
+        classes.setdefault(record.Class, []).append(glyph)
+    return dict((index, '@' + min(members))
+                for index, members in classes.iteritems())
+
+
+def _mark_subtables(font):
+    """Yields (lookup type, mark coverage, mark array, base coverage, base
+    records, base anchors attribute) for each mark-to-base and mark-to-mark
+    subtable."""
+
+    for lookup_type, subtable in table_subtables(font, 'GPOS'):
+        if lookup_type == 4:
+            yield (lookup_type, subtable.MarkCoverage, subtable.MarkArray,
+                   subtable.BaseCoverage, subtable.BaseArray.BaseRecord,
+                   'BaseAnchor')
+        elif lookup_type == 6:
+            yield (lookup_type, subtable.Mark1Coverage, subtable.Mark1Array,
+                   subtable.Mark2Coverage, subtable.Mark2Array.Mark2Record,
+                   'Mark2Anchor')
+
+
+def mark_classes(font):
+    """Returns a map from (mark, mark class) to the (x, y) anchor of the mark,
+    for the marks in mark-to-base and mark-to-mark rules."""
+
+    marks = {}
+    for _, mark_coverage, mark_array, _, _, _ in _mark_subtables(font):
+        names = _mark_class_names(mark_coverage, mark_array)
+        for glyph, record in zip(mark_coverage.glyphs, mark_array.MarkRecord):
+            marks[glyph, names[record.Class]] = _anchor_point(
+                record.MarkAnchor)
+    return marks
+
+
+def mark_attachments(font, mark_type='base'):
+    """Returns a map from (glyph, mark class) to the (x, y) anchor of the
+    glyph, for mark-to-base rules if mark_type is 'base' or mark-to-mark rules
+    if it is 'mark'."""
+
+    lookup_types = {'base': 4, 'mark': 6}
+    if mark_type not in lookup_types:
+        raise ValueError('Bad mark type "%s".' % mark_type)
+
+    attachments = {}
+    for (lookup_type, mark_coverage, mark_array, base_coverage, base_records,
+         anchors_attr) in _mark_subtables(font):
+        if lookup_type != lookup_types[mark_type]:
+            continue
+        names = _mark_class_names(mark_coverage, mark_array)
+        for glyph, record in zip(base_coverage.glyphs, base_records):
+            for index, anchor in enumerate(getattr(record, anchors_attr)):
+                if anchor is not None and index in names:
+                    attachments[glyph, names[index]] = _anchor_point(anchor)
+    return attachments
+
+
+def _single_substitutions(lookup_type, subtable):
+    """Yields the (input, output) pairs of the one-to-one substitutions in a
+    GSUB subtable."""
+
+    if lookup_type == 1:
+        for pair in subtable.mapping.iteritems():
+            yield pair
+    elif lookup_type == 2:
+        for glyph, sequence in subtable.mapping.iteritems():
+            if len(sequence) == 1:
+                yield glyph, sequence[0]
+    elif lookup_type == 4:
+        for glyph, ligatures in subtable.ligatures.iteritems():
+            for ligature in ligatures:
+                if not ligature.Component:
+                    yield glyph, ligature.LigGlyph
+
+
+def gsub_rules(font):
+    """Returns the set of (feature, input, output) one-to-one substitutions in
+    the lookups used directly by each GSUB feature."""
+
+    rules = set()
+    if 'GSUB' not in font:
+        return rules
+    lookups = font['GSUB'].table.LookupList.Lookup
+    lookup_rules = {}
+    for feature, indices in feature_lookups(font, 'GSUB').iteritems():
+        for index in indices:
+            if index not in lookup_rules:
+                lookup_rules[index] = set()
+                for lookup_type, subtable in subtables(lookups[index], 'GSUB'):
+                    lookup_rules[index].update(
+                        _single_substitutions(lookup_type, subtable))
+            rules.update((feature, lhs, rhs) for lhs, rhs in lookup_rules[index])
+    return rules
@@ -19,10 +19,9 @@
 __author__ = 'roozbeh@google.com (Roozbeh Pournader)'
 
 import json
-import os
-import subprocess
 
 import font_caching
+from nototools import shaper
 
 from fontTools.pens.boundsPen import BoundsPen
 
@@ -131,38 +130,31 @@ def get_glyph_vertical_extents(glyph_id, font_file_name):
     return get_glyph_cleaned_extents(ttglyph, glyf_set)
 
 
-# FIXME: figure out how to make this configurable
-HARFBUZZ_DIR = os.getenv('HOME') + os.sep + 'harfbuzz'
-HB_SHAPE_PATH = HARFBUZZ_DIR + os.sep + 'util' + os.sep + 'hb-shape'
+def shape_text(text, font_file_name, language, extra_parameters=None):
+    """Runs HarfBuzz on the lines of the input text and returns a list of the
+    shaped glyphs for each line, see shaper.Shaper.  Glyphs are identified by
+    id, since some fonts have empty glyph names."""
+    return shaper.get_shaper(font_file_name).shape_lines(
+        text.split('\n'), language, hb_shape_options=extra_parameters)
 
 
 def run_harfbuzz_on_text(text, font_file_name, language, extra_parameters=None):
     """Runs HarfBuzz on input text and return JSON shaping information."""
-    hb_parameters = [
-        HB_SHAPE_PATH,
-        '--output-format=json',
-        '--no-glyph-names',  # Some fonts have empty glyph names
-        '--font-file=%s' % font_file_name]
-
-    if language:
-        hb_parameters.append('--language=%s' % language)
-
-    if extra_parameters is not None:
-        hb_parameters += extra_parameters
-
-    hb_process = subprocess.Popen(
-        hb_parameters,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE)
-
-    return hb_process.communicate(input=text.encode('UTF-8'))[0]
+    return '\n'.join(
+        json.dumps(glyphs) for glyphs in shape_text(
+            text, font_file_name, language, extra_parameters))
 
 
 def get_line_extents_from_json(json_data, font_file_name):
     """Find the vertical extents of a line based on HarfBuzz JSON output."""
+    return get_line_extents(json.loads(json_data), font_file_name)
+
+
+def get_line_extents(glyphs, font_file_name):
+    """Find the vertical extents of a line of shaped glyphs."""
     max_height = None
     min_height = None
-    for glyph_position in json.loads(json_data):
+    for glyph_position in glyphs:
         glyph_id = glyph_position['g']
         glyph_ymin, glyph_ymax = get_glyph_vertical_extents(
             glyph_id, font_file_name)
@@ -181,16 +173,12 @@ def test_text_vertical_extents(
     text, font_file_name, min_allowed, max_allowed, language=None):
     """Runs given text through HarfBuzz to find cases that go out of bounds."""
 
-    hb_output = run_harfbuzz_on_text(text, font_file_name, language)
+    shaped_lines = shape_text(text, font_file_name, language)
 
     split_text = text.split('\n')
     exceeding_lines = []
-    for line_no, output_line in enumerate(hb_output.split('\n')):
-        if not output_line:
-            continue
-
-        min_height, max_height = get_line_extents_from_json(
-            output_line, font_file_name)
+    for line_no, glyphs in enumerate(shaped_lines):
+        min_height, max_height = get_line_extents(glyphs, font_file_name)
 
         if min_height is None:
             continue
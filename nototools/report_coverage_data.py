@@ -26,6 +26,7 @@ from nototools import coverage
 from nototools import generate_coverage_data
 from nototools import tool_utils
 from nototools import unicode_data
+from nototools.codepoint_set import CodepointSet
 
 from fontTools import ttLib
 
@@ -45,13 +46,13 @@ def get_coverages(coverage_files):
 
 def get_block_data(defined_cps, coverages, no_empty=False):
   block_data = []
+  defined_cps = CodepointSet(defined_cps)
   covered_cps_list = [
       tool_utils.parse_int_ranges(cov.cmapdata.ranges)
       for cov in coverages]
   for block_name in unicode_data.block_names():
     block_range = unicode_data.block_range(block_name)
-    block_cps = unicode_data.block_chars(block_name)
-    block_cps &= defined_cps
+    block_cps = CodepointSet.from_ranges([block_range]) & defined_cps
     if not block_cps:
       continue
     cov_info = []
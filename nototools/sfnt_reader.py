@@ -0,0 +1,133 @@
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Reads the table directories of sfnt and TTC files, and a few small tables.
+
+This is for tools that only need table lengths and checksums, names, glyph
+counts or cmaps of many fonts, without decompiling fonts with fontTools.  The
+file is mapped into memory, so only the parts that are read are loaded.
+"""
+
+import collections
+import mmap
+import struct
+
+TableEntry = collections.namedtuple('TableEntry', 'checksum, offset, length')
+
+
+class SfntFont(object):
+  """One font in an sfnt or TTC file.  tables is an ordered map from tag to
+  TableEntry, in table directory order."""
+
+  def __init__(self, data, offset=0):
+    self.data = data
+    self.offset = offset
+    self.sfnt_version, num_tables = struct.unpack_from('>4sH', data, offset)
+    self.tables = collections.OrderedDict()
+    for i in range(num_tables):
+      tag, checksum, table_offset, length = struct.unpack_from(
+          '>4sLLL', data, offset + 12 + 16 * i)
+      self.tables[tag] = TableEntry(checksum, table_offset, length)
+
+  def __contains__(self, tag):
+    return tag in self.tables
+
+  def table_data(self, tag):
+    entry = self.tables[tag]
+    return self.data[entry.offset:entry.offset + entry.length]
+
+  def name_records(self):
+    """Returns a map from name id to the Windows English name record, like
+    font_data.get_name_records."""
+    data = self.table_data('name')
+    _, count, string_offset = struct.unpack_from('>3H', data)
+    names = {}
+    for i in range(count):
+      platform_id, encoding_id, language_id, name_id, length, offset = (
+          struct.unpack_from('>6H', data, 6 + 12 * i))
+      if (platform_id, encoding_id, language_id) != (3, 1, 0x409):
+        continue
+      start = string_offset + offset
+      names[name_id] = unicode(data[start:start + length], 'UTF-16BE')
+    return names
+
+  def num_glyphs(self):
+    return struct.unpack_from('>H', self.table_data('maxp'), 4)[0]
+
+  def font_revision(self):
+    """Returns the head table's font revision as a float, as fontTools
+    does."""
+    return struct.unpack_from('>l', self.table_data('head'), 4)[0] / 65536.0
+
+  def cmap_codepoints(self):
+    """Returns the set of code points in the format 12 (3, 10) cmap subtable,
+    or if there is none the format 4 (3, 1) subtable, like
+    summary.get_largest_cmap; or None if there is neither."""
+    data = self.table_data('cmap')
+    _, num_subtables = struct.unpack_from('>2H', data)
+    subtable_offset = None
+    for i in range(num_subtables):
+      platform_id, encoding_id, offset = struct.unpack_from(
+          '>2HL', data, 4 + 8 * i)
+      subtable_format = struct.unpack_from('>H', data, offset)[0]
+      subtable = (subtable_format, platform_id, encoding_id)
+      if subtable == (4, 3, 1):
+        subtable_offset = offset
+      elif subtable == (12, 3, 10):
+        subtable_offset = offset
+        break
+    if subtable_offset is None:
+      return None
+
+    codepoints = set()
+    if struct.unpack_from('>H', data, subtable_offset)[0] == 12:
+      num_groups = struct.unpack_from('>L', data, subtable_offset + 12)[0]
+      for i in range(num_groups):
+        first, last = struct.unpack_from(
+            '>2L', data, subtable_offset + 16 + 12 * i)
+        codepoints.update(xrange(first, last + 1))
+    else:
+      seg_count = struct.unpack_from('>H', data, subtable_offset + 6)[0] // 2
+      end_codes = struct.unpack_from(
+          '>%dH' % seg_count, data, subtable_offset + 14)
+      start_codes = struct.unpack_from(
+          '>%dH' % seg_count, data, subtable_offset + 16 + 2 * seg_count)
+      # like fontTools, skip the final 0xffff segment
+      for first, last in zip(start_codes, end_codes)[:-1]:
+        codepoints.update(xrange(first, last + 1))
+    return codepoints
+
+
+class SfntFile(object):
+  """An sfnt or TTC file mapped into memory.  fonts is the list of SfntFonts
+  in the file."""
+
+  def __init__(self, filepath):
+    with open(filepath, 'rb') as f:
+      self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if self.data[:4] == 'ttcf':
+      num_fonts = struct.unpack_from('>L', self.data, 8)[0]
+      offsets = struct.unpack_from('>%dL' % num_fonts, self.data, 12)
+    else:
+      offsets = [0]
+    self.fonts = [SfntFont(self.data, offset) for offset in offsets]
+
+  def close(self):
+    self.data.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
@@ -21,6 +21,11 @@ are `find_area_diffs`, which compares glyph areas, `find_rendered_diffs`, which
 compares harfbuzz output using PIL, and `find_shape_diffs`, which takes the
 difference of shapes and calculates the area.
 
+Glyphs whose glyph data is identical in both fonts are not compared by
+`find_shape_diffs`, nor by `find_rendered_diffs` if their horizontal metrics
+are identical too (this assumes the layout of their input is unchanged); they
+are only counted in the report.
+
 Some caveats: glyph areas can be the same even if the shapes are wildly
 different (though they're useful for shapes that should be identical except
 for some offset). Image comparison is usually either slow (hi-res) or inaccurate
@@ -30,8 +35,12 @@ large errors.
 
 from __future__ import division
 
+import itertools
+import math
 import os
 from PIL import Image
+from PIL import ImageChops
+from PIL import ImageOps
 import re
 import StringIO
 import subprocess
@@ -44,7 +53,21 @@ from fontTools.ttLib import TTFont
 from ufoLib.pointPen import PointToSegmentPen
 
 from nototools.glyph_area_pen import GlyphAreaPen
+from nototools import glyph_metrics
 from nototools import hb_input
+from nototools import shaper
+
+try:
+    import numpy
+    _HAVE_NUMPY = True
+except ImportError:
+    _HAVE_NUMPY = False
+
+try:
+    import freetype
+    _HAVE_FREETYPE = True
+except ImportError:
+    _HAVE_FREETYPE = False
 
 GDEF_UNDEF = 0
 GDEF_MARK = 3
@@ -55,46 +78,51 @@ class ShapeDiffFinder:
     """Provides methods to report diffs in glyph shapes between OT Fonts."""
 
     def __init__(
-            self, file_a, file_b, stats, ratio_diffs=False, diff_threshold=0):
+            self, file_a, file_b, stats, ratio_diffs=False, diff_threshold=0,
+            font_a=None, font_b=None):
         self.path_a = file_a
-        self.font_a = TTFont(self.path_a)
+        self.font_a = font_a if font_a is not None else TTFont(self.path_a)
         self.glyph_set_a = self.font_a.getGlyphSet()
         self.gdef_a = {}
         if 'GDEF' in self.font_a and not self.font_a['GDEF'].table.GlyphClassDef is None:
             self.gdef_a = self.font_a['GDEF'].table.GlyphClassDef.classDefs
 
         self.path_b = file_b
-        self.font_b = TTFont(self.path_b)
+        self.font_b = font_b if font_b is not None else TTFont(self.path_b)
         self.glyph_set_b = self.font_b.getGlyphSet()
         self.gdef_b = {}
         if 'GDEF' in self.font_b and not self.font_b['GDEF'].table.GlyphClassDef is None:
             self.gdef_b = self.font_b['GDEF'].table.GlyphClassDef.classDefs
 
+        self.set_stats(stats)
+        self.hb_input_generator_a = None
+        self.hb_input_generator_b = None
+
+        self.ratio_diffs = ratio_diffs
+        self.diff_threshold = diff_threshold
+        self.basepath = os.path.basename(file_a)
+
+    def set_stats(self, stats):
+        """Set the report dictionary that results are added to."""
+
         for stat_type in (
                 'compared', 'untested', 'unmatched', 'unicode_mismatch',
-                'gdef_mark_mismatch', 'zero_width_mismatch', 'input_mismatch'):
+                'gdef_mark_mismatch', 'zero_width_mismatch', 'input_mismatch',
+                'unchanged'):
             if stat_type not in stats:
                 stats[stat_type] = []
         self.stats = stats
 
-        self.ratio_diffs = ratio_diffs
-        self.diff_threshold = diff_threshold
-        self.basepath = os.path.basename(file_a)
-
     def find_area_diffs(self):
         """Report differences in glyph areas."""
 
         self.build_names()
-
-        pen_a = GlyphAreaPen(self.glyph_set_a)
-        pen_b = GlyphAreaPen(self.glyph_set_b)
+        self.build_metrics()
 
         mismatched = {}
         for name in self.names:
-            self.glyph_set_a[name].draw(pen_a)
-            area_a = pen_a.pop()
-            self.glyph_set_b[name].draw(pen_b)
-            area_b = pen_b.pop()
+            area_a = self.metrics_a[name].area
+            area_b = self.metrics_b[name].area
             if area_a != area_b:
                 mismatched[name] = (area_a, area_b)
 
@@ -103,11 +131,24 @@ class ShapeDiffFinder:
         for name, areas in mismatched.items():
             stats.append((calc(areas), name, self.basepath, areas[0], areas[1]))
 
-    def find_rendered_diffs(self, font_size=128, render_path=None):
-        """Find diffs of glyphs as rendered by harfbuzz."""
+    def find_rendered_diffs(self, font_size=128, render_path=None,
+                            renderer='hb-view'):
+        """Find diffs of glyphs as rendered by harfbuzz.
 
-        hb_input_generator_a = hb_input.HbInputGenerator(self.font_a)
-        hb_input_generator_b = hb_input.HbInputGenerator(self.font_b)
+        renderer is 'hb-view', the default, to run hb-view for each input, or
+        'freetype', to shape the glyph inputs in batches and rasterize them
+        in-process with FreeTypeRenderer, which requires freetype-py.  The
+        two don't rasterize identically, so their diffs are not comparable.
+        """
+
+        if renderer not in ('hb-view', 'freetype'):
+            raise ValueError('unknown renderer "%s"' % renderer)
+        if renderer == 'freetype' and not _HAVE_FREETYPE:
+            raise ImportError('the freetype renderer requires freetype-py')
+
+        if self.hb_input_generator_a is None:
+            self.hb_input_generator_a = hb_input.HbInputGenerator(self.font_a)
+            self.hb_input_generator_b = hb_input.HbInputGenerator(self.font_b)
 
         if render_path:
             font_name, _ = os.path.splitext(self.basepath)
@@ -116,7 +157,10 @@ class ShapeDiffFinder:
                 os.makedirs(render_path)
 
         self.build_names()
-        diffs = []
+        hmtx_a = self.font_a['hmtx'].metrics
+        hmtx_b = self.font_b['hmtx'].metrics
+        inputs = []
+        unchanged = 0
         for name in self.names:
             class_a = self.gdef_a.get(name, GDEF_UNDEF)
             class_b = self.gdef_b.get(name, GDEF_UNDEF)
@@ -135,8 +179,10 @@ class ShapeDiffFinder:
                     self.basepath, name, width_a, width_b))
                 continue
 
-            hb_args_a = hb_input_generator_a.input_from_name(name, pad=zwidth_a)
-            hb_args_b = hb_input_generator_b.input_from_name(name, pad=zwidth_b)
+            hb_args_a = self.hb_input_generator_a.input_from_name(
+                name, pad=zwidth_a)
+            hb_args_b = self.hb_input_generator_b.input_from_name(
+                name, pad=zwidth_b)
             if hb_args_a != hb_args_b:
                 self.stats['input_mismatch'].append((
                     self.basepath, name, hb_args_a, hb_args_b))
@@ -153,56 +199,37 @@ class ShapeDiffFinder:
             if unichr(0) in text:
                 continue
 
-            img_file_a = StringIO.StringIO(subprocess.check_output([
-                'hb-view', '--font-size=%d' % font_size,
-                '--features=%s' % ','.join(features), self.path_a, text]))
-            img_file_b = StringIO.StringIO(subprocess.check_output([
-                'hb-view', '--font-size=%d' % font_size,
-                '--features=%s' % ','.join(features), self.path_b, text]))
-            img_a = Image.open(img_file_a)
-            img_b = Image.open(img_file_b)
-            width_a, height_a = img_a.size
-            width_b, height_b = img_b.size
-            data_a = img_a.getdata()
-            data_b = img_b.getdata()
-            img_file_a.close()
-            img_file_b.close()
-
-            width, height = max(width_a, width_b), max(height_a, height_b)
-            offset_ax = (width - width_a) // 2
-            offset_ay = (height - height_a) // 2
-            offset_bx = (width - width_b) // 2
-            offset_by = (height - height_b) // 2
-
-            diff = 0
-            for y in range(height):
-                for x in range(width):
-                    ax, ay = x - offset_ax, y - offset_ay
-                    bx, by = x - offset_bx, y - offset_by
-                    if (ax < 0 or bx < 0 or ax >= width_a or bx >= width_b or
-                        ay < 0 or by < 0 or ay >= height_a or by >= height_b):
-                        diff += 1
-                    else:
-                        diff += abs(data_a[ax + ay * width_a] -
-                                    data_b[bx + by * width_b]) / 255
+            if name in self.unchanged and hmtx_a[name] == hmtx_b[name]:
+                unchanged += 1
+                continue
+
+            inputs.append((name, features, text))
+        self.stats['unchanged'].append((self.basepath, unchanged))
+
+        if renderer == 'freetype':
+            hb_inputs = [(features, text) for _, features, text in inputs]
+            images_a = FreeTypeRenderer(
+                self.path_a, font_size).render_inputs(hb_inputs)
+            images_b = FreeTypeRenderer(
+                self.path_b, font_size).render_inputs(hb_inputs)
+        else:
+            images_a = (self._hb_view(self.path_a, font_size, features, text)
+                        for _, features, text in inputs)
+            images_b = (self._hb_view(self.path_b, font_size, features, text)
+                        for _, features, text in inputs)
+
+        diffs = []
+        for (name, _, _), img_a, img_b in itertools.izip(
+                inputs, images_a, images_b):
+            diff = self._diff_images(img_a, img_b)
 
             if self.ratio_diffs:
+                width = max(img_a.size[0], img_b.size[0])
+                height = max(img_a.size[1], img_b.size[1])
                 diff /= (width * height)
 
             if render_path and diff > self.diff_threshold:
-                img_cmp = Image.new('RGB', (width, height))
-                data_cmp = list(img_cmp.getdata())
-                self._project(data_a, width_a, height_a,
-                              data_cmp, width, height, 1)
-                self._project(data_b, width_b, height_b,
-                              data_cmp, width, height, 0)
-                for y in range(height):
-                    for x in range(width):
-                        i = x + y * width
-                        r, g, b = data_cmp[i]
-                        assert b == 0
-                        data_cmp[i] = r, g, min(r, g)
-                img_cmp.putdata(data_cmp)
+                img_cmp = self._comparison_image(img_a, img_b)
                 img_cmp.save(self._rendered_png(render_path, name))
 
             diffs.append((name, diff))
@@ -216,6 +243,107 @@ class ShapeDiffFinder:
         for name, diff in mismatched.items():
             stats.append((diff, name, self.basepath))
 
+    def _hb_view(self, font_path, font_size, features, text):
+        """Return the image hb-view renders for text."""
+
+        img_file = StringIO.StringIO(subprocess.check_output([
+            'hb-view', '--font-size=%d' % font_size,
+            '--features=%s' % ','.join(features), font_path, text]))
+        img = Image.open(img_file)
+        img.load()
+        img_file.close()
+        return img
+
+    def _diff_images(self, img_a, img_b):
+        """Return the difference between two single-channel images.
+
+        The images are centered on a canvas the size of the larger of each
+        dimension.  Each canvas pixel covered by both images adds the
+        difference of their values divided by 255, any other pixel adds 1.
+        With numpy, the contributions are summed in the same order as the
+        pure Python loop, so the results are identical.
+        """
+
+        width_a, height_a = img_a.size
+        width_b, height_b = img_b.size
+        width, height = max(width_a, width_b), max(height_a, height_b)
+        offset_ax = (width - width_a) // 2
+        offset_ay = (height - height_a) // 2
+        offset_bx = (width - width_b) // 2
+        offset_by = (height - height_b) // 2
+
+        if _HAVE_NUMPY:
+            # the part of the canvas covered by both images
+            x0, x1 = max(offset_ax, offset_bx), min(
+                offset_ax + width_a, offset_bx + width_b)
+            y0, y1 = max(offset_ay, offset_by), min(
+                offset_ay + height_a, offset_by + height_b)
+            if x0 >= x1 or y0 >= y1:
+                return width * height
+            pixels_a = numpy.asarray(img_a, dtype=numpy.float64)
+            pixels_b = numpy.asarray(img_b, dtype=numpy.float64)
+            contributions = numpy.ones((height, width))
+            contributions[y0:y1, x0:x1] = numpy.abs(
+                pixels_a[y0 - offset_ay:y1 - offset_ay,
+                         x0 - offset_ax:x1 - offset_ax] -
+                pixels_b[y0 - offset_by:y1 - offset_by,
+                         x0 - offset_bx:x1 - offset_bx]) / 255
+            # accumulate adds sequentially, unlike sum
+            return float(numpy.add.accumulate(contributions.ravel())[-1])
+
+        data_a = img_a.getdata()
+        data_b = img_b.getdata()
+        diff = 0
+        for y in range(height):
+            for x in range(width):
+                ax, ay = x - offset_ax, y - offset_ay
+                bx, by = x - offset_bx, y - offset_by
+                if (ax < 0 or bx < 0 or ax >= width_a or bx >= width_b or
+                    ay < 0 or by < 0 or ay >= height_a or by >= height_b):
+                    diff += 1
+                else:
+                    diff += abs(data_a[ax + ay * width_a] -
+                                data_b[bx + by * width_b]) / 255
+        return diff
+
+    def _comparison_image(self, img_a, img_b):
+        """Return an RGB image overlaying two single-channel images.
+
+        Image a is centered in the green channel and image b in the red one,
+        and the blue channel is the minimum of the two.
+        """
+
+        width_a, height_a = img_a.size
+        width_b, height_b = img_b.size
+        width, height = max(width_a, width_b), max(height_a, height_b)
+
+        if _HAVE_NUMPY:
+            pixels = numpy.zeros((height, width, 3), dtype=numpy.uint8)
+            for img, channel in ((img_a, 1), (img_b, 0)):
+                src_width, src_height = img.size
+                offset_x = (width - src_width) // 2
+                offset_y = (height - src_height) // 2
+                pixels[offset_y:offset_y + src_height,
+                       offset_x:offset_x + src_width,
+                       channel] = numpy.asarray(img, dtype=numpy.uint8)
+            pixels[:, :, 2] = numpy.minimum(pixels[:, :, 0], pixels[:, :, 1])
+            return Image.fromarray(pixels, 'RGB')
+
+        img_cmp = Image.new('RGB', (width, height))
+        data_cmp = list(img_cmp.getdata())
+        self._project(img_a.getdata(), width_a, height_a,
+                      data_cmp, width, height, 1)
+        self._project(img_b.getdata(), width_b, height_b,
+                      data_cmp, width, height, 0)
+        for y in range(height):
+            for x in range(width):
+                i = x + y * width
+                r, g, b = data_cmp[i]
+                assert b == 0
+                data_cmp[i] = r, g, min(r, g)
+        img_cmp.putdata(data_cmp)
+        return img_cmp
+
     def _project(
             self, src_data, src_width, src_height,
             dst_data, width, height, channel):
@@ -235,11 +363,19 @@ class ShapeDiffFinder:
         """Report differences in glyph shapes, using BooleanOperations."""
 
         self.build_names()
+        self.build_metrics()
 
         area_pen = GlyphAreaPen(None)
         pen = PointToSegmentPen(area_pen)
         mismatched = {}
+        unchanged = 0
         for name in self.names:
+            # the xor of identical outlines is empty
+            if (name in self.unchanged or
+                self.metrics_a[name].outline_hash ==
+                self.metrics_b[name].outline_hash):
+                unchanged += 1
+                continue
             glyph_a = Glyph()
             glyph_b = Glyph()
             self.glyph_set_a[name].draw(
@@ -250,6 +386,7 @@ class ShapeDiffFinder:
             area = abs(area_pen.pop())
             if area:
                 mismatched[name] = (area)
+        self.stats['unchanged'].append((self.basepath, unchanged))
 
         stats = self.stats['compared']
         for name, area in mismatched.items():
@@ -271,11 +408,16 @@ class ShapeDiffFinder:
         self.stats['compared'] = old_compared
 
     def build_names(self):
-        """Build a list of glyph names shared between the fonts."""
+        """Build a list of glyph names shared between the fonts, and the set
+        of those with identical glyph data."""
 
         if hasattr(self, 'names'):
             return
 
+        # hash the glyph data before drawing any glyphs, which can change it
+        hashes_a = glyph_metrics.raw_glyph_hashes(self.font_a)
+        hashes_b = glyph_metrics.raw_glyph_hashes(self.font_b)
+
         stats = self.stats['unmatched']
         names_a = set(self.font_a.getGlyphOrder())
         names_b = set(self.font_b.getGlyphOrder())
@@ -296,6 +438,22 @@ class ShapeDiffFinder:
             stats.append((self.basepath, mismatched.items()))
             self.names -= set(mismatched.keys())
 
+        self.unchanged = set(
+            name for name in self.names
+            if name in hashes_a and hashes_a[name] == hashes_b.get(name))
+
+    def build_metrics(self):
+        """Build the glyph metrics of both fonts, using the cached metrics of
+        the font files if possible."""
+
+        if hasattr(self, 'metrics_a'):
+            return
+
+        self.metrics_a = glyph_metrics.font_glyph_metrics(
+            self.path_a, self.font_a)
+        self.metrics_b = glyph_metrics.font_glyph_metrics(
+            self.path_b, self.font_b)
+
     @staticmethod
     def dump(stats, whitelist, out_lines, include_vals, multiple_fonts):
         """Return the results of run diffs.
@@ -314,12 +472,14 @@ class ShapeDiffFinder:
         compared = sorted(
             s for s in stats['compared'] if s[1] not in whitelist)
         compared.reverse()
+        # stats merged by notodiff only keep the largest differences
+        num_compared = stats.get('compared_count', len(compared))
         fmt = '%s %s'
         if include_vals:
             fmt += ' (%s vs %s)'
         if multiple_fonts:
             fmt = '%s ' + fmt
-        report.append('%d differences in glyph shape' % len(compared))
+        report.append('%d differences in glyph shape' % num_compared)
         for line in compared[:out_lines]:
             # print <font> <glyph> <vals>; stats are sorted in reverse priority
             line = tuple(reversed(line[:3])) + tuple(line[3:])
@@ -327,6 +487,9 @@ class ShapeDiffFinder:
             if not multiple_fonts:
                 line = line[1:]
             report.append(fmt % line)
+        num_unchanged = sum(n for _, n in stats.get('unchanged', []))
+        if num_unchanged:
+            report.append('%d unchanged glyphs not compared' % num_unchanged)
         report.append('')
 
         for font, set_a, set_b in stats['unmatched']:
@@ -386,6 +549,70 @@ class ShapeDiffFinder:
         return os.path.join(render_path, glyph_filename)
 
 
+class FreeTypeRenderer(object):
+    """Renders shaped text with FreeType, approximating hb-view's output.
+
+    The font is kept open, the text is shaped with shaper.Shaper and glyph
+    bitmaps are composited directly into a grayscale image: black text on a
+    white background, with a 16 pixel margin and the height of the font's
+    ascent and descent.
+    """
+
+    MARGIN = 16
+
+    def __init__(self, font_path, font_size):
+        self.shaper = shaper.get_shaper(font_path)
+        self.face = freetype.Face(font_path)
+        self.face.set_char_size(font_size * 64)
+        self.scale = font_size / self.face.units_per_EM
+        self.ascent = self.face.size.ascender / 64
+        self.line_height = int(math.ceil(
+            (self.face.size.ascender - self.face.size.descender) / 64))
+
+    def render_inputs(self, hb_inputs):
+        """Generate the images for a list of (features, text) pairs.  All the
+        texts with the same features are shaped in one batch up front, the
+        images are rendered as they are needed."""
+
+        batches = {}
+        for i, (features, text) in enumerate(hb_inputs):
+            batches.setdefault(tuple(features), []).append(i)
+        shaped = [None] * len(hb_inputs)
+        for features, indices in batches.items():
+            for i, glyphs in zip(indices, self.shaper.shape_lines(
+                    [hb_inputs[i][1] for i in indices],
+                    features=','.join(features))):
+                shaped[i] = glyphs
+        for glyphs in shaped:
+            yield self.render(glyphs)
+
+    def render(self, glyphs):
+        """Return the image of a list of shaped glyphs, see shaper.Shaper."""
+
+        advance = sum(glyph['ax'] for glyph in glyphs) * self.scale
+        width = int(math.ceil(abs(advance))) + 2 * self.MARGIN
+        height = self.line_height + 2 * self.MARGIN
+        ink = Image.new('L', (width, height), 0)
+        x = self.MARGIN if advance >= 0 else width - self.MARGIN
+        y = self.MARGIN + self.ascent
+        for glyph in glyphs:
+            self.face.load_glyph(
+                glyph['g'], freetype.FT_LOAD_RENDER | freetype.FT_LOAD_NO_HINTING)
+            slot = self.face.glyph
+            bitmap = slot.bitmap
+            if bitmap.width and bitmap.rows:
+                left = int(round(x + glyph['dx'] * self.scale)) + slot.bitmap_left
+                top = int(round(y - glyph['dy'] * self.scale)) - slot.bitmap_top
+                glyph_img = Image.frombytes(
+                    'L', (bitmap.width, bitmap.rows),
+                    bytes(bytearray(bitmap.buffer)), 'raw', 'L', bitmap.pitch)
+                box = (left, top, left + bitmap.width, top + bitmap.rows)
+                ink.paste(ImageChops.lighter(ink.crop(box), glyph_img), box)
+            x += glyph['ax'] * self.scale
+            y -= glyph['ay'] * self.scale
+        return ImageOps.invert(ink)
+
+
 class Qu2CuPen(BasePen):
     def __init__(self, pen, glyphSet):
         BasePen.__init__(self, glyphSet)
@@ -0,0 +1,213 @@
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Shape text with HarfBuzz.
+
+A Shaper shapes lines of text with one font.  For each line it returns the
+list of glyphs HarfBuzz produced, as dicts with the keys of hb-shape's json
+output: 'g' (the glyph id, or the glyph name if glyph_names is true), 'cl'
+(the cluster), 'ax' and 'ay' (the advance), and 'dx' and 'dy' (the offset).
+
+If the uharfbuzz module is available the font is loaded once and the text is
+shaped in-process.  Otherwise each batch of lines is shaped by a single run of
+hb-shape, reading the lines from stdin.  hb-shape is found using the 'hb_shape'
+notoconfig value, then ~/harfbuzz/util/hb-shape, then the path.  hb-shape
+buffers its output when it is not writing to a terminal, so one process per
+batch is used rather than a long-lived one.
+"""
+
+import json
+from os import path
+import subprocess
+
+from nototools import notoconfig
+
+try:
+  import uharfbuzz as hb
+  _HAVE_UHARFBUZZ = True
+except ImportError:
+  _HAVE_UHARFBUZZ = False
+
+
+def hb_shape_path():
+  """Returns the path of the hb-shape tool to run."""
+  hb_shape = notoconfig.get('hb_shape')
+  if hb_shape:
+    return hb_shape
+  built = path.expanduser(path.join('~', 'harfbuzz', 'util', 'hb-shape'))
+  return built if path.isfile(built) else 'hb-shape'
+
+
+def backend_version():
+  """Returns a string identifying the shaping backends and their versions,
+  for keying results that depend on how text is shaped."""
+  versions = []
+  if _HAVE_UHARFBUZZ:
+    versions.append('uharfbuzz %s (harfbuzz %s)' % (
+        getattr(hb, '__version__', None), hb.version_string()))
+  try:
+    output = subprocess.check_output([hb_shape_path(), '--version'])
+    versions.append(output.splitlines()[0].strip() if output else '')
+  except (OSError, subprocess.CalledProcessError):
+    versions.append('no hb-shape')
+  return '; '.join(versions)
+
+
+def parse_features(features):
+  """Returns a map from feature tag to value for a comma-separated list of
+  features in hb-shape syntax, or None if the list uses syntax other than
+  '[+-]tag[=value]', such as ranges."""
+  result = {}
+  if not features:
+    return result
+  for feature in features.split(','):
+    feature = feature.strip()
+    if not feature or '[' in feature:
+      return None
+    value = 1
+    if feature[0] in '+-':
+      value = 1 if feature[0] == '+' else 0
+      feature = feature[1:]
+    if '=' in feature:
+      feature, value = feature.split('=', 1)
+      try:
+        value = int(value)
+      except ValueError:
+        return None
+    if len(feature) > 4:
+      return None
+    result[feature] = value
+  return result
+
+
+def codepoints(text):
+  """Returns the list of code points of unicode text.  On narrow Python builds
+  text holds characters outside the BMP as surrogate pairs, which are
+  combined."""
+  result = []
+  i = 0
+  while i < len(text):
+    cp = ord(text[i])
+    if (0xd800 <= cp <= 0xdbff and i + 1 < len(text) and
+        0xdc00 <= ord(text[i + 1]) <= 0xdfff):
+      cp = 0x10000 + ((cp - 0xd800) << 10) + (ord(text[i + 1]) - 0xdc00)
+      i += 1
+    result.append(cp)
+    i += 1
+  return result
+
+
+def format_glyphs(glyphs):
+  """Formats glyphs like hb-shape's default text output."""
+  parts = []
+  for glyph in glyphs:
+    part = '%s=%d' % (glyph['g'], glyph['cl'])
+    if glyph['dx'] or glyph['dy']:
+      part += '@%d,%d' % (glyph['dx'], glyph['dy'])
+    part += '+%d' % glyph['ax']
+    if glyph['ay']:
+      part += ',%d' % glyph['ay']
+    parts.append(part)
+  return '[%s]' % '|'.join(parts)
+
+
+class Shaper(object):
+  """Shapes text with one font."""
+
+  def __init__(self, font_file, hb_shape=None):
+    self.font_file = font_file
+    self.hb_shape = hb_shape or hb_shape_path()
+    self._hb_font = None
+
+  def shape(self, text, language=None, features=None, glyph_names=False,
+            hb_shape_options=None):
+    """Returns the glyphs for text, see shape_lines."""
+    return self.shape_lines(
+        [text], language, features, glyph_names, hb_shape_options)[0]
+
+  def shape_lines(self, lines, language=None, features=None, glyph_names=False,
+                  hb_shape_options=None):
+    """Returns a list of the glyphs for each line.  features is a
+    comma-separated list of features in hb-shape syntax.  hb_shape_options is
+    a list of other hb-shape command line options; '--features=' options are
+    added to features, and any others require running hb-shape."""
+    if not lines:
+      return []
+    options = []
+    features = [features] if features else []
+    for option in hb_shape_options or []:
+      if option.startswith('--features='):
+        features.append(option[len('--features='):])
+      else:
+        options.append(option)
+    features = ','.join(features)
+
+    if _HAVE_UHARFBUZZ and not options:
+      feature_map = parse_features(features)
+      if feature_map is not None:
+        return [self._shape_in_process(line, language, feature_map, glyph_names)
+                for line in lines]
+    return self._run_hb_shape(lines, language, features, glyph_names, options)
+
+  def _shape_in_process(self, text, language, feature_map, glyph_names):
+    if self._hb_font is None:
+      with open(self.font_file, 'rb') as f:
+        self._hb_font = hb.Font(hb.Face(hb.Blob(f.read())))
+    buf = hb.Buffer()
+    buf.add_codepoints(codepoints(text))
+    if language:
+      buf.language = language
+    buf.guess_segment_properties()
+    hb.shape(self._hb_font, buf, feature_map)
+    glyphs = []
+    for info, pos in zip(buf.glyph_infos, buf.glyph_positions):
+      glyph = info.codepoint
+      if glyph_names:
+        glyph = self._hb_font.glyph_to_string(glyph)
+      glyphs.append({
+          'g': glyph, 'cl': info.cluster,
+          'dx': pos.x_offset, 'dy': pos.y_offset,
+          'ax': pos.x_advance, 'ay': pos.y_advance})
+    return glyphs
+
+  def _run_hb_shape(self, lines, language, features, glyph_names, options):
+    command = [
+        self.hb_shape, '--output-format=json',
+        '--font-file=%s' % self.font_file]
+    if not glyph_names:
+      command.append('--no-glyph-names')
+    if language:
+      command.append('--language=%s' % language)
+    if features:
+      command.append('--features=%s' % features)
+    command.extend(options)
+    text = u''.join(line + u'\n' for line in lines)
+    process = subprocess.Popen(
+        command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    output = process.communicate(input=text.encode('UTF-8'))[0]
+    if process.returncode:
+      raise subprocess.CalledProcessError(process.returncode, command[0])
+    return [json.loads(line) for line in output.splitlines()]
+
+
+_shapers = {}
+
+def get_shaper(font_file):
+  """Returns the shared Shaper for the font file."""
+  font_file = path.abspath(font_file)
+  shaper = _shapers.get(font_file)
+  if not shaper:
+    shaper = Shaper(font_file)
+    _shapers[font_file] = shaper
+  return shaper
@@ -19,15 +19,15 @@
 __author__ = "dougfelt@google.com (Doug Felt)"
 
 import argparse
+import multiprocessing
 import os
 import os.path
 import re
 import sys
 
-from fontTools import ttLib
-
 import noto_lint
 import font_data
+import sfnt_reader
 
 def get_largest_cmap(font):
   cmap_table = font['cmap']
@@ -47,40 +47,42 @@ def cmap_count(font):
   return len(get_largest_cmap(font))
 
 def summarize_file(root, path):
-  font = ttLib.TTFont(path)
-  table_info = {}
-  reader = font.reader
-  for tag in reader.keys():
-    entry = reader.tables[tag]
-    entry_len = entry.length
-    entry_checkSum = int(entry.checkSum)
-    if entry_checkSum < 0:
-      entry_checkSum += 0x100000000
-    table_info[tag] = (entry_len, entry_checkSum)
-
-  relpath = path[len(root) + 1:]
-  size = os.path.getsize(path)
-  # Printable_font_revision requires you specify the accuracy of digits.
-  # ttLib apparently reads the fixed values as a float, so it loses the info.
-  # Adobe fonts use 3 digits, so the default from printable_font_revision of 2
-  # is insufficient.
-  # Assume that the name from the name table is accurate, and use it instead.
-  version_string = noto_lint.font_version(font);
-  match = re.match(r'Version (\d+\.\d+)', version_string)
-  if match:
-    version = match.group(1)
-  else:
-    version = noto_lint.printable_font_revision(font) # default 2
-  num_glyphs = len(font.getGlyphOrder())
-  full_name = font_data.get_name_records(font)[4]
-  cmap = set(get_largest_cmap(font).keys()) # copy needed? what's the lifespan?
-  num_chars = len(cmap)
-  font.close()
+  # Only the table directory and the name, maxp, head and cmap tables are
+  # read, without decompiling the font.
+  with sfnt_reader.SfntFile(path) as sfnt_file:
+    font = sfnt_file.fonts[0]
+    table_info = {}
+    for tag, entry in font.tables.iteritems():
+      table_info[tag] = (entry.length, entry.checksum)
+
+    relpath = path[len(root) + 1:]
+    size = os.path.getsize(path)
+    # Printable_font_revision requires you specify the accuracy of digits.
+    # ttLib apparently reads the fixed values as a float, so it loses the info.
+    # Adobe fonts use 3 digits, so the default from printable_font_revision of 2
+    # is insufficient.
+    # Assume that the name from the name table is accurate, and use it instead.
+    names = font.name_records()
+    version_string = names[5]
+    match = re.match(r'Version (\d+\.\d+)', version_string)
+    if match:
+      version = match.group(1)
+    else:
+      version = font_data.format_font_revision(font.font_revision()) # default 2
+    num_glyphs = font.num_glyphs()
+    full_name = names[4]
+    cmap = font.cmap_codepoints()
+    num_chars = len(cmap)
 
   return (relpath, version, full_name, size, num_glyphs, num_chars, cmap, table_info)
 
-def summarize(root, name=None):
-  result = []
+def _summarize_file_job(args):
+  return summarize_file(*args)
+
+def summarize(root, name=None, jobs=1):
+  """Summarizes the fonts under root whose paths match name, in a pool of
+  jobs processes (0 for one per cpu)."""
+  paths = []
   name_re = re.compile(name) if name else None
   for parent, _, files in os.walk(root):
     for f in sorted(files):
@@ -90,7 +92,16 @@ def summarize(root, name=None):
           relpath = path[len(root) + 1:]
           if not name_re.search(relpath):
             continue
-        result.append(summarize_file(root, path))
+        paths.append((root, path))
+
+  num_procs = jobs or multiprocessing.cpu_count()
+  if num_procs > 1 and len(paths) > 1:
+    pool = multiprocessing.Pool(min(num_procs, len(paths)))
+    result = pool.map(_summarize_file_job, paths)
+    pool.close()
+    pool.join()
+  else:
+    result = [summarize_file(root, path) for root, path in paths]
   return result
 
 
@@ -127,6 +138,9 @@ def main():
                         'some portion of the path under root'),
     parser.add_argument('-s', '--short', help='shorter summary format',
                         action='store_true')
+    parser.add_argument('-j', '--jobs', help='number of fonts to read in '
+                        'parallel (default 1, 0 for one per cpu)', type=int,
+                        default=1, metavar='n')
     args = parser.parse_args()
 
     if not os.path.isdir(args.root):
@@ -134,7 +148,7 @@ def main():
     else:
       root = os.path.abspath(args.root)
       print "root: %s, name: %s" % (root, args.name if args.name else '[all]')
-      print_summary(summarize(root, name=args.name), args.short)
+      print_summary(summarize(root, name=args.name, jobs=args.jobs), args.short)
 
 if __name__ == "__main__":
     main()
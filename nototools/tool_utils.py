@@ -17,17 +17,24 @@
 import codecs
 import contextlib
 import glob
+import hashlib
+import itertools
+import json
 import logging
+import multiprocessing
 import os
 import os.path as path
 import re
 import shutil
+import struct
 import subprocess
 import sys
 import time
 import zipfile
+import zlib
 
 from nototools import notoconfig
+from nototools.codepoint_set import CodepointSet
 
 @contextlib.contextmanager
 def temp_chdir(path):
@@ -170,6 +177,280 @@ def generate_zip_with_7za_from_filepairs(pairs, archive_path):
     generate_zip_with_7za(source_root, sorted(dest_set), archive_path)
 
 
+def deflate_cache_dir():
+  return path.join(notoconfig.noto_cache(), 'deflated')
+
+
+_DEFLATED_HEADER = '<LQ'  # crc, uncompressed size
+
+
+_DEFLATE_BLOCK_SIZE = 1 << 20
+
+
+def _read_blocks(f):
+  return iter(lambda: f.read(_DEFLATE_BLOCK_SIZE), '')
+
+
+def file_sha1(source):
+  """Returns the hex sha1 of the contents of the source file, reading it in
+  blocks."""
+  source_hash = hashlib.sha1()
+  with open(source, 'rb') as f:
+    for block in _read_blocks(f):
+      source_hash.update(block)
+  return source_hash.hexdigest()
+
+
+class BuildManifest(object):
+  """Records a hash of the inputs of each output of a build, so that outputs
+  whose inputs haven't changed are not rebuilt.
+
+  The manifest is kept as json, and outputs are keyed by their path relative
+  to it, so it is usually kept in the build's target directory.  It also
+  keeps the hashes of input files by path, size, and modification and change
+  times, so unchanged files are not read again."""
+
+  VERSION = 2
+
+  def __init__(self, manifest_path):
+    self.manifest_path = manifest_path
+    self.outputs = {}
+    self.file_hashes = {}
+    if path.isfile(manifest_path):
+      with open(manifest_path) as f:
+        data = json.load(f)
+      if data.get('version') == self.VERSION:
+        self.outputs = data['outputs']
+        self.file_hashes = data['file_hashes']
+
+  def save(self):
+    temp_path = '%s.%d.tmp' % (self.manifest_path, os.getpid())
+    with open(temp_path, 'w') as f:
+      json.dump({'version': self.VERSION, 'outputs': self.outputs,
+                 'file_hashes': self.file_hashes}, f)
+    os.rename(temp_path, self.manifest_path)
+
+  def file_hash(self, filepath):
+    filepath = path.abspath(filepath)
+    st = os.stat(filepath)
+    # the change time catches rewrites that keep the size and modification
+    # time, which can't be set back by the tool doing the rewrite
+    stamp = [st.st_size, st.st_mtime, st.st_ctime]
+    entry = self.file_hashes.get(filepath)
+    if entry and entry[0] == stamp:
+      return entry[1]
+    file_hash = file_sha1(filepath)
+    self.file_hashes[filepath] = [stamp, file_hash]
+    return file_hash
+
+  def inputs_hash(self, files=(), values=()):
+    """Returns a hash of the contents of the files and of the json-able
+    values."""
+    inputs_hash = hashlib.sha1()
+    for filepath in files:
+      inputs_hash.update(self.file_hash(filepath))
+    inputs_hash.update(json.dumps(values, sort_keys=True))
+    return inputs_hash.hexdigest()
+
+  def _key(self, output_path):
+    return path.relpath(output_path, path.dirname(self.manifest_path))
+
+  def is_current(self, output_path, inputs_hash):
+    """Returns true if output_path exists and was built from inputs with the
+    hash."""
+    return (path.isfile(output_path) and
+            self.outputs.get(self._key(output_path)) == inputs_hash)
+
+  def record(self, output_path, inputs_hash):
+    self.outputs[self._key(output_path)] = inputs_hash
+
+
+def _deflated_path(cache_dir, source_hash, level):
+  return path.join(cache_dir, '%s.%d.deflate' % (source_hash, level))
+
+
+def deflate_file(source, cache_dir=None, level=9, source_hash=None):
+  """Returns the path of a file with the crc, the size and the raw deflated
+  data of the source file, for use by generate_zip_from_filepairs.  The file
+  is created under cache_dir, by default deflate_cache_dir(), if it isn't
+  there already.  It is named by the sha1 of the source's contents, which
+  the caller can pass as source_hash if it already knows it, so each
+  distinct file is compressed only once.  The source is read in blocks."""
+
+  cache_dir = cache_dir or deflate_cache_dir()
+  cache_path = _deflated_path(
+      cache_dir, source_hash or file_sha1(source), level)
+  if path.isfile(cache_path):
+    return cache_path
+
+  if not path.isdir(cache_dir):
+    try:
+      os.makedirs(cache_dir)
+    except OSError:
+      # another process created it
+      if not path.isdir(cache_dir):
+        raise
+  compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+  header_size = struct.calcsize(_DEFLATED_HEADER)
+  temp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+  crc = 0
+  size = 0
+  with open(source, 'rb') as src, open(temp_path, 'wb') as f:
+    # the header is written once the crc and size are known
+    f.write('\0' * header_size)
+    for block in _read_blocks(src):
+      crc = zlib.crc32(block, crc)
+      size += len(block)
+      f.write(compressor.compress(block))
+    f.write(compressor.flush())
+    f.seek(0)
+    f.write(struct.pack(_DEFLATED_HEADER, crc & 0xffffffff, size))
+  os.rename(temp_path, cache_path)
+  return cache_path
+
+
+def prune_deflate_cache(keep_hashes, cache_dir=None):
+  """Removes the files under cache_dir, by default deflate_cache_dir(), that
+  deflate_file created for sources whose sha1 is not in keep_hashes, and
+  any left over from interrupted runs.  Returns the number removed."""
+
+  cache_dir = cache_dir or deflate_cache_dir()
+  if not path.isdir(cache_dir):
+    return 0
+  removed = 0
+  for name in os.listdir(cache_dir):
+    if name.endswith('.deflate'):
+      if name.split('.')[0] in keep_hashes:
+        continue
+    elif not name.endswith('.tmp'):
+      continue
+    try:
+      os.remove(path.join(cache_dir, name))
+      removed += 1
+    except OSError:
+      pass
+  return removed
+
+
+def _zip_date_time(source):
+  date_time = time.localtime(os.stat(source).st_mtime)[:6]
+  # zip can't represent dates before 1980
+  return max(date_time, (1980, 1, 1, 0, 0, 0))
+
+
+def generate_zip_from_filepairs(pairs, archive_path, cache_dir=None,
+                                deflated=None):
+  """Pairs are source/destination path pairs. The source will be put into the
+  zip with name destination.  Unlike generate_zip_with_7za_from_filepairs,
+  this replaces any existing archive and writes it in-process, copying the
+  compressed data from deflate_file's cache.  deflated optionally maps the
+  absolute path of sources to the deflate_file paths already created for
+  them."""
+
+  with open(archive_path, 'wb') as archive:
+    central_dir = []
+    seen = set()
+    for source, dest in pairs:
+      if dest in seen:
+        continue
+      seen.add(dest)
+      deflated_path = (deflated or {}).get(path.abspath(source))
+      if not deflated_path:
+        deflated_path = deflate_file(source, cache_dir)
+      with open(deflated_path, 'rb') as deflated_file:
+        header = deflated_file.read(struct.calcsize(_DEFLATED_HEADER))
+        crc, size = struct.unpack(_DEFLATED_HEADER, header)
+        compress_size = os.fstat(deflated_file.fileno()).st_size - len(header)
+        if max(size, compress_size, archive.tell()) >= zipfile.ZIP64_LIMIT:
+          raise ValueError('%s is too large for a zip without zip64' % dest)
+        info = zipfile.ZipInfo(dest, _zip_date_time(source))
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0644 << 16
+        info.CRC = crc
+        info.file_size = size
+        info.compress_size = compress_size
+        info.header_offset = archive.tell()
+        archive.write(info.FileHeader())
+        shutil.copyfileobj(deflated_file, archive)
+      central_dir.append(info)
+
+    central_dir_offset = archive.tell()
+    for info in central_dir:
+      dos_date = ((info.date_time[0] - 1980) << 9 |
+                  info.date_time[1] << 5 | info.date_time[2])
+      dos_time = (info.date_time[3] << 11 | info.date_time[4] << 5 |
+                  info.date_time[5] // 2)
+      archive.write(struct.pack(
+          zipfile.structCentralDir, zipfile.stringCentralDir,
+          info.create_version, info.create_system, info.extract_version,
+          info.reserved, info.flag_bits, info.compress_type, dos_time,
+          dos_date, info.CRC, info.compress_size, info.file_size,
+          len(info.filename), 0, 0, 0, info.internal_attr, info.external_attr,
+          info.header_offset))
+      archive.write(info.filename)
+    central_dir_size = archive.tell() - central_dir_offset
+    archive.write(struct.pack(
+        zipfile.structEndArchive, zipfile.stringEndArchive, 0, 0,
+        len(central_dir), len(central_dir), central_dir_size,
+        central_dir_offset, 0))
+
+
+def add_to_zip_from_filepairs(pairs, archive_path):
+  """Pairs are source/destination path pairs. The source will be added to the
+  existing zip with name destination."""
+
+  with zipfile.ZipFile(
+      archive_path, 'a', zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+    for source, dest in pairs:
+      archive.write(source, dest)
+
+
+def _deflate_file_job(args):
+  return deflate_file(*args)
+
+
+def _generate_zip_job(args):
+  generate_zip_from_filepairs(*args)
+  return args[1]
+
+
+def generate_zips_from_filepairs(archives, jobs=1, cache_dir=None,
+                                 source_hashes=None):
+  """Generates zips from a list of (pairs, archive path), see
+  generate_zip_from_filepairs, and yields each archive path as it is
+  written.  Each distinct source is compressed once, and then the archives
+  are written from the compressed data, both in a pool of jobs processes (0
+  for one per cpu).  source_hashes optionally maps the absolute path of
+  sources to the sha1 of their contents, so they need not be read to find
+  their compressed data."""
+
+  source_hashes = source_hashes or {}
+  sources = sorted(set(
+      path.abspath(source) for pairs, _ in archives for source, _ in pairs))
+  num_procs = jobs or multiprocessing.cpu_count()
+  pool = None
+  if num_procs > 1 and len(sources) > 1:
+    pool = multiprocessing.Pool(min(num_procs, len(sources)))
+    job_map = pool.imap
+  else:
+    job_map = itertools.imap
+  deflated = dict(zip(sources, job_map(
+      _deflate_file_job,
+      [(source, cache_dir, 9, source_hashes.get(source))
+       for source in sources])))
+  zip_jobs = []
+  for pairs, archive_path in archives:
+    archive_deflated = dict(
+        (path.abspath(source), deflated[path.abspath(source)])
+        for source, _ in pairs)
+    zip_jobs.append((pairs, archive_path, cache_dir, archive_deflated))
+  for archive_path in job_map(_generate_zip_job, zip_jobs):
+    yield archive_path
+  if pool:
+    pool.close()
+    pool.join()
+
+
 def dos2unix(root_dir, glob_list):
   """Convert dos line endings to unix ones in place."""
   with temp_chdir(root_dir):
@@ -395,7 +676,8 @@ def parse_int_ranges(
   as a separator, and ranges following it or hyphen are interpreted as suffixes
   that replace the same number of characters at the end of the previous value.
   '-' generates the range of intervening characters as before, while '/' does
-  not.  Returns a set or a list depending on return_set.
+  not.  Returns a CodepointSet or a list depending on return_set.  Ranges are
+  only expanded to individual values when a list is requested.
 
   For example, with compressed ranges the following:
     1ee42/7/9/b/d-f 1ee51-2/4/7/9/b/d/f
@@ -406,7 +688,8 @@ def parse_int_ranges(
   """
 
   base = 16 if is_hex else 10
-  vals = []
+  # inclusive (first, last) ranges in input order
+  ranges = []
 
   def _add_segment(prev_str, suffix, is_range):
     slen = len(suffix)
@@ -420,15 +703,15 @@ def parse_int_ranges(
       next_str = prev_str[:-slen] + suffix
 
       next_val = int(next_str, base)
-      if next_val <= vals[-1]:
+      if next_val <= ranges[-1][1]:
         raise ValueError(
             'next value \'%s\' is not greater than previous \'%s\'' % (
                 next_str, prev_str))
 
     if is_range:
-      start_val = vals[-1] + 1
-      vals.extend(range(start_val, next_val))
-    vals.append(next_val)
+      ranges[-1] = (ranges[-1][0], next_val)
+    else:
+      ranges.append((next_val, next_val))
 
     return next_str
 
@@ -488,25 +771,66 @@ def parse_int_ranges(
   if not allow_compressed and '/' != sep and range_string.find('/') != -1:
     raise ValueError('\'/\' only allowed in compressed range format')
 
-  # collect ordered list of values
+  # collect ordered list of ranges
   for r in range_string.split(sep):
     _add_range(r)
 
   # check for duplicates and/or convert to set
   if return_set or not allow_duplicates:
-    range_set = set(vals)
-    if not allow_duplicates and len(range_set) != len(vals):
+    range_set = CodepointSet.from_ranges(ranges)
+    count = sum(last - first + 1 for first, last in ranges)
+    if not allow_duplicates and len(range_set) != count:
       fail = set()
       seen = set()
-      for v in vals:
+      for v in expand_int_ranges(ranges):
         if v in seen:
           fail.add(v)
         else:
           seen.add(v)
       raise ValueError('range "%s" has %d duplicates: %s' % (
           range_string, len(fail), write_int_ranges(fail)))
+    if return_set:
+      return range_set
+
+  return list(expand_int_ranges(ranges))
 
-  return range_set if return_set else vals
+
+def expand_int_ranges(ranges):
+  """Generates the ints in an iterable of inclusive (first, last) ranges, in
+  order."""
+  for first, last in ranges:
+    for v in xrange(first, last + 1):
+      yield v
+
+
+def iter_int_ranges(int_values):
+  """Generates inclusive (first, last) ranges covering the ints in int_values,
+  in ascending order.  Duplicate values are ignored.  A CodepointSet already
+  holds its ranges, and a sorted list or tuple is encoded in a single pass;
+  anything else is sorted first."""
+  if isinstance(int_values, CodepointSet):
+    return iter(int_values.ranges())
+  if not (isinstance(int_values, (list, tuple)) and _is_sorted(int_values)):
+    int_values = sorted(int_values)
+  return _iter_sorted_int_ranges(int_values)
+
+
+def _is_sorted(values):
+  return all(values[i] <= values[i + 1] for i in xrange(len(values) - 1))
+
+
+def _iter_sorted_int_ranges(int_values):
+  it = iter(int_values)
+  try:
+    start = prev = next(it)
+  except StopIteration:
+    return
+  for v in it:
+    if v > prev + 1:
+      yield start, prev
+      start = v
+    prev = v
+  yield start, prev
 
 
 def write_int_ranges(int_values, in_hex=True, sep=' '):
@@ -514,33 +838,11 @@ def write_int_ranges(int_values, in_hex=True, sep=' '):
   parsed by parse_int_ranges to return the original values (not
   order_preserving)."""
 
-  if not int_values:
-    return ''
-
-  num_list = []
-
-  if type(int_values) is not list:
-    int_values = [v for v in int_values]
-  int_values.sort()
-  start = prev = int_values[0]
   single_fmt = '%04x' if in_hex else '%d'
   pair_fmt = single_fmt + '-' + single_fmt
-
-  def emit():
-    if prev == start:
-      num_list.append(single_fmt % prev)
-    else:
-      num_list.append(pair_fmt % (start, prev))
-
-  for v in int_values[1:]:
-    if v == prev + 1:
-      prev += 1
-      continue
-    else:
-      emit()
-    start = prev = v
-  emit()
-  return sep.join(num_list)
+  return sep.join(
+      single_fmt % first if first == last else pair_fmt % (first, last)
+      for first, last in iter_int_ranges(int_values))
 
 
 def setup_logging(loglevel, quiet_ttx=True):
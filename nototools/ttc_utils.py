@@ -18,6 +18,7 @@
 
 import argparse
 import collections
+import hashlib
 import os
 from os import path
 import struct
@@ -25,6 +26,7 @@ import subprocess
 
 from fontTools.ttLib.tables._n_a_m_e import table__n_a_m_e as NameTable
 
+from nototools import sfnt_reader
 from nototools import tool_utils
 
 _ttcHeader = '>4sLL'
@@ -40,7 +42,9 @@ FontEntry = collections.namedtuple('FontEntry', 'fmt,tables')
 TableEntry = collections.namedtuple('TableEntry', 'tag,offset,length')
 
 _EXTRACT_TOOL_PATH='[afdko]/FDK/Tools/linux/otc2otf'
-_BUILD_TOOL_PATH='[afdko]/FDK/Tools/linux/otf2otc'
+
+# Table data is copied and hashed in blocks of this size.
+_BLOCK_SIZE = 1 << 20
 
 class TTCFile(object):
   """Holds some information from the sfnt headers in a .ttc file.
@@ -52,32 +56,33 @@ class TTCFile(object):
   the table tag, offset, and length.  Offsets are relative to
   the very start of the data.  There is one entry for each unique
   table in the ttc.
+
+  data can be a string or a buffer such as an mmap (see ttcfile_dump); only
+  the headers are read from it.
   """
 
   def __init__(self, data=None):
+    self.fonts = []
+    self.tables = []
+    # map from TableEntry to its index in tables
+    self._table_indices = {}
     if data:
       self._build(data)
-    else:
-      self.fonts = []
-      self.tables = []
 
   def _build(self, data):
-    tag, version, font_count = struct.unpack(_ttcHeader, data[:_ttcHeaderSize])
+    tag, version, font_count = struct.unpack_from(_ttcHeader, data)
     if tag not in ['ttcf']:
       raise ValueError('not a font collection')
     if version not in [0x10000, 0x20000]:
       raise ValueError('unrecognized version %s' % version)
 
-    self.fonts = []
-    self.tables = []
-    for i in range(font_count):
-      pos = _ttcHeaderSize + i * 4
-      offset = struct.unpack('>L', data[pos:pos + 4])[0]
+    offsets = struct.unpack_from('>%dL' % font_count, data, _ttcHeaderSize)
+    for offset in offsets:
       self._build_font_entry(data, offset)
 
   def _build_font_entry(self, data, offset):
     limit = offset + _sfntHeaderSize
-    version, num_tables = struct.unpack(_sfntHeader, data[offset:limit])[:2]
+    version, num_tables = struct.unpack_from(_sfntHeader, data, offset)[:2]
     if version == 0x10000:
       version_str = '1.0'
       font_fmt = 'ttf'
@@ -95,23 +100,22 @@ class TTCFile(object):
     self.fonts.append(FontEntry(font_fmt, font_table_indices))
 
   def _build_table_entry(self, data, offset):
-    limit = offset + _sfntHeaderEntrySize
-    tag, checksum, offset, length = struct.unpack(
-        _sfntHeaderEntry, data[offset:limit])
+    tag, checksum, offset, length = struct.unpack_from(
+        _sfntHeaderEntry, data, offset)
     entry = TableEntry(tag, offset, length)
-    for i, e in enumerate(self.tables):
-      if e == entry:
-        return i
-    self.tables.append(entry)
-    return len(self.tables) - 1
+    index = self._table_indices.get(entry)
+    if index is None:
+      index = len(self.tables)
+      self._table_indices[entry] = index
+      self.tables.append(entry)
+    return index
 
 
 def ttcfile_dump(ttcfile):
   """Reads the file and dumps the information."""
-  with open(ttcfile, 'rb') as f:
-    data = f.read()
-  ttc = TTCFile(data=data)
-  ttc_dump(ttc, data)
+  with sfnt_reader.SfntFile(ttcfile) as sfnt_file:
+    ttc = TTCFile(data=sfnt_file.data)
+    ttc_dump(ttc, sfnt_file.data)
 
 
 def ttc_dump(ttc, data):
@@ -140,10 +144,9 @@ def ttc_dump(ttc, data):
 
 def ttcfile_filenames(ttcfile):
   """Reads the file and returns the filenames."""
-  with open(ttcfile, 'rb') as f:
-    data = f.read()
-  ttc = TTCFile(data=data)
-  return ttc_filenames(ttc, data)
+  with sfnt_reader.SfntFile(ttcfile) as sfnt_file:
+    ttc = TTCFile(data=sfnt_file.data)
+    return ttc_filenames(ttc, sfnt_file.data)
 
 
 def ttc_filenames(ttc, data):
@@ -182,15 +185,98 @@ def ttc_filenames(ttc, data):
   return names
 
 
-def ttcfile_build(output_ttc_path, fontpath_list, tool_path=_BUILD_TOOL_PATH):
-  """Build a .ttc from a list of font files."""
-  otf2otc = tool_utils.resolve_path(tool_path)
-  if not otf2otc:
-    raise ValueError('can not resolve %s' % tool_path)
-
-  tool_utils.ensure_dir_exists(path.dirname(output_ttc_path))
-  # capture and discard standard output, the tool is noisy
-  subprocess.check_output([otf2otc, '-o', output_ttc_path] + fontpath_list)
+def _table_blocks(data, entry):
+  """Yields the data of a table in blocks of at most _BLOCK_SIZE."""
+  limit = entry.offset + entry.length
+  for pos in xrange(entry.offset, limit, _BLOCK_SIZE):
+    yield data[pos:min(pos + _BLOCK_SIZE, limit)]
+
+
+def _table_hash(data, entry):
+  table_hash = hashlib.sha1()
+  for block in _table_blocks(data, entry):
+    table_hash.update(block)
+  return table_hash.digest()
+
+
+def _search_range(num_tables):
+  """Returns searchRange, entrySelector and rangeShift for the sfnt header."""
+  entry_selector = 0
+  while 2 ** (entry_selector + 1) <= num_tables:
+    entry_selector += 1
+  search_range = 2 ** entry_selector * _sfntHeaderEntrySize
+  return search_range, entry_selector, (
+      num_tables * _sfntHeaderEntrySize - search_range)
+
+
+def ttcfile_build(output_ttc_path, fontpath_list):
+  """Build a .ttc from a list of font files.  Fonts in .ttc files in the list
+  are all included.
+
+  Tables with the same checksum, length and contents are written only once
+  and shared between fonts.  Table data is copied from the mapped font files a
+  block at a time, so fonts are never read into memory as a whole."""
+
+  sfnt_files = [sfnt_reader.SfntFile(fontpath) for fontpath in fontpath_list]
+  try:
+    fonts = [font for sfnt_file in sfnt_files for font in sfnt_file.fonts]
+    offset = _ttcHeaderSize + 4 * len(fonts)
+    font_offsets = []
+    for font in fonts:
+      font_offsets.append(offset)
+      offset += _sfntHeaderSize + _sfntHeaderEntrySize * len(font.tables)
+
+    # Lay out the tables.  Tables are shared when their checksum and length
+    # match, and then their content hashes.  The hashes are computed only for
+    # tables whose checksum and length are not unique.
+    # - font_tables: for each font, a list of (tag, checksum, offset, length)
+    # - table_data: list of (data, TableEntry) to write, in order
+    # - candidates: map from (checksum, length) to a list of [hash or None,
+    #   data, TableEntry, offset] for the tables written so far
+    font_tables = []
+    table_data = []
+    candidates = {}
+    for font in fonts:
+      tables = []
+      for tag in sorted(font.tables):
+        entry = font.tables[tag]
+        key = entry.checksum, entry.length
+        table_offset = None
+        if key in candidates:
+          table_hash = _table_hash(font.data, entry)
+          for candidate in candidates[key]:
+            if candidate[0] is None:
+              candidate[0] = _table_hash(candidate[1], candidate[2])
+            if candidate[0] == table_hash:
+              table_offset = candidate[3]
+              break
+        else:
+          table_hash = None
+        if table_offset is None:
+          table_offset = offset
+          offset += (entry.length + 3) & ~3
+          table_data.append((font.data, entry))
+          candidates.setdefault(key, []).append(
+              [table_hash, font.data, entry, table_offset])
+        tables.append((tag, entry.checksum, table_offset, entry.length))
+      font_tables.append(tables)
+
+    tool_utils.ensure_dir_exists(path.dirname(output_ttc_path))
+    with open(output_ttc_path, 'wb') as f:
+      f.write(struct.pack(_ttcHeader, 'ttcf', 0x10000, len(fonts)))
+      f.write(struct.pack('>%dL' % len(fonts), *font_offsets))
+      for font, tables in zip(fonts, font_tables):
+        f.write(font.sfnt_version)
+        f.write(struct.pack('>4H', len(tables), *_search_range(len(tables))))
+        for table in tables:
+          f.write(struct.pack(_sfntHeaderEntry, *table))
+      for data, entry in table_data:
+        for block in _table_blocks(data, entry):
+          f.write(block)
+        f.write('\0' * (-entry.length & 3))
+  finally:
+    for sfnt_file in sfnt_files:
+      sfnt_file.close()
 
 
 def ttc_namesfile_name(ttc_path):
@@ -198,7 +284,7 @@ def ttc_namesfile_name(ttc_path):
 
 
 def ttcfile_build_from_namesfile(
-    output_ttc_path, file_dir, namesfile_name=None, tool_path=_BUILD_TOOL_PATH):
+    output_ttc_path, file_dir, namesfile_name=None):
   """Read names of files from namesfile and pass them to build_ttc to build
   a .ttc file.  The names file will default to one named after output_ttc and
   located in file_dir."""
@@ -272,7 +358,7 @@ def main():
   """
 
   parser = argparse.ArgumentParser(
-      description='Use afdko to operate on ttc files.',
+      description='Operate on ttc files, using afdko to extract them.',
       epilog=epilog,
       formatter_class=argparse.RawDescriptionHelpFormatter)
   parser.add_argument(
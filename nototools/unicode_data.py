@@ -27,39 +27,53 @@ __author__ = (
     "roozbeh@google.com (Roozbeh Pournader) and "
     "cibu@google.com (Cibu Johny)")
 
+import argparse
+import bisect
 import codecs
 import collections
+import copy
+import hashlib
+import itertools
 import os
 from os import path
 import re
 import sys
+import time
 
 from fontTools.misc.py23 import unichr
+try:
+  import cPickle as pickle
+except ImportError:
+  import pickle
 try:
   import unicodedata2 as unicodedata  # Unicode 8 compliant native lib
 except ImportError:
   import unicodedata  # Python's internal library
 
+from nototools import notoconfig
 from nototools import tool_utils # parse_int_ranges
 
-_data_is_loaded = False
+_loaded_tables = collections.OrderedDict()  # table name to load stats
 _property_value_aliases_data = {}
 _character_names_data = {}
-_general_category_data = {}
-_combining_class_data = {}
 _decomposition_data = {}
 _bidi_mirroring_characters = set()
-_script_data = {}
-_script_extensions_data = {}
-_block_data = {}
 _block_range = {}
 _block_names = []
-_age_data = {}
 _bidi_mirroring_glyph_data = {}
 _core_properties_data = {}
-_indic_positional_data = {}
-_indic_syllabic_data = {}
-_defined_characters = set()
+_defined_characters = None
+
+# range tables, see _RangeTable
+_general_category_data = None
+_combining_class_data = None
+_script_data = None
+_script_extensions_data = None
+_block_data = None
+_age_data = None
+_indic_positional_data = None
+_indic_syllabic_data = None
+_defined_character_ranges = None
 _script_code_to_long_name = {}
 _folded_script_name_to_code = {}
 _lower_to_upper_case = {}
@@ -83,6 +97,7 @@ _proposed_emoji_data_cps = None
 # emoji sequences
 _emoji_sequence_data = None
 _emoji_non_vs_to_canonical = None
+_emoji_names_data = None
 _emoji_group_data = None
 
 # nameslist/namealiases
@@ -90,32 +105,71 @@ _nameslist_see_also = None
 _namealiases_alt_names = None
 
 def load_data():
-  """Loads the data files needed for the module.
+  """Loads all the data tables of the module.
 
   Could be used by processes that care about controlling when the data is
-  loaded. Otherwise, data will be loaded the first time it's needed.
+  loaded. Otherwise, each table will be loaded the first time it's needed,
+  along with the tables it depends on.
   """
-  global _data_is_loaded
-
-  if not _data_is_loaded:
-    _load_property_value_aliases_txt()
-    _load_unicode_data_txt()
-    _load_scripts_txt()
-    _load_script_extensions_txt()
-    _load_blocks_txt()
-    _load_derived_age_txt()
-    _load_derived_core_properties_txt()
-    _load_bidi_mirroring_txt()
-    _load_indic_data()
-    _load_emoji_data()
-    _load_emoji_sequence_data()
-    _load_unicode_emoji_variants()
-    _load_variant_data()
-    _load_proposed_emoji_data()
-    _load_nameslist_data()
-    _load_namealiases_data()
-
-    _data_is_loaded = True
+  for table_name in _TABLES:
+    _load_table(table_name)
+
+
+def loaded_tables():
+  """Returns a list of (table name, seconds, from_cache) tuples for the tables
+  loaded so far, in load order.  The time for a table does not include the
+  time taken to load the tables it depends on."""
+  return [(table_name,) + stats
+          for table_name, stats in _loaded_tables.iteritems()
+          if stats is not None]
+
+
+def rebuild_cache(cache_dir=None):
+  """Parses the data files for all tables, replacing any data already loaded,
+  and writes the on-disk cache.  Returns the path to the cache directory."""
+  global _defined_characters
+
+  if cache_dir is None:
+    cache_dir = _cache_dir()
+  globals().update(copy.deepcopy(_INITIAL_DATA))
+  _defined_characters = None
+  _DEFINED_CHARACTERS_CACHE.clear()
+  _loaded_tables.clear()
+  for table_name in _TABLES:
+    _load_table(table_name, use_cache=False)
+    _write_cache(table_name, cache_dir)
+  return cache_dir
+
+
+def _load_table(table_name, use_cache=True):
+  """Loads the named table after the tables it depends on.  If use_cache is
+  true the table is read from the on-disk cache when the cache is current,
+  otherwise the table's data files are parsed and the cache is updated."""
+  if table_name in _loaded_tables:
+    return
+
+  table = _TABLES[table_name]
+  for dep in table.deps:
+    _load_table(dep, use_cache)
+
+  # Mark the table first, loading the emoji sequences calls back into name().
+  _loaded_tables[table_name] = None
+  start = time.time()
+  cached_data = _read_cache(table_name, _cache_dir()) if use_cache else None
+  if cached_data is not None:
+    globals().update(cached_data)
+  else:
+    try:
+      table.loader()
+    except:
+      del _loaded_tables[table_name]
+      raise
+    if use_cache:
+      try:
+        _write_cache(table_name, _cache_dir())
+      except (IOError, OSError):
+        pass  # the cache is only an optimization
+  _loaded_tables[table_name] = (time.time() - start, cached_data is not None)
 
 
 def name(char, *args):
@@ -132,9 +186,12 @@ def name(char, *args):
       return unicodedata.name(char)
   except ValueError as val_error:
     cp = ord(char)
-    load_data()
+    _load_table('unicode_data')
     if cp in _character_names_data:
       return _character_names_data[cp]
+    _load_table('emoji_sequences')
+    if cp in _emoji_names_data:
+      return _emoji_names_data[cp]
     elif (cp,) in _emoji_sequence_data:
       return _emoji_sequence_data[(cp,)][0]
     elif args:
@@ -151,51 +208,42 @@ def _char_to_int(char):
     return char
 
 def derived_props():
-  load_data()
+  _load_table('core_properties')
   return frozenset(_core_properties_data.keys())
 
 def chars_with_property(propname):
-  load_data()
-  return frozenset(_core_properties_data[propname])
+  _load_table('core_properties')
+  return frozenset(_core_properties_data[propname].codepoints())
 
 def category(char):
   """Returns the general category of a character."""
-  load_data()
+  _load_table('unicode_data')
   char = _char_to_int(char)
-  try:
-    return _general_category_data[char]
-  except KeyError:
-    return "Cn"  # Unassigned
+  return _general_category_data.get(char, "Cn")  # Unassigned
 
 
 def combining(char):
   """Returns the canonical combining class of a character."""
-  load_data()
+  _load_table('unicode_data')
   char = _char_to_int(char)
-  try:
-    return _combining_class_data[char]
-  except KeyError:
-    return 0
+  return _combining_class_data.get(char, 0)
 
 
 def to_upper(char):
   """Returns the upper case for a lower case character.
   This is not full upper casing, but simply reflects the 1-1
   mapping in UnicodeData.txt."""
-  load_data()
+  _load_table('unicode_data')
   cp = _char_to_int(char)
-  try:
-    if _general_category_data[cp] == 'Ll':
-      return unichr(_lower_to_upper_case[cp])
-  except KeyError:
-    pass
+  if _general_category_data.get(cp) == 'Ll' and cp in _lower_to_upper_case:
+    return unichr(_lower_to_upper_case[cp])
   return char
 
 
 def canonical_decomposition(char):
   """Returns the canonical decomposition of a character as a Unicode string.
   """
-  load_data()
+  _load_table('unicode_data')
   char = _char_to_int(char)
   try:
     return _decomposition_data[char]
@@ -205,12 +253,9 @@ def canonical_decomposition(char):
 
 def script(char):
   """Returns the script property of a character as a four-letter code."""
-  load_data()
+  _load_table('scripts')
   char = _char_to_int(char)
-  try:
-    return _script_data[char]
-  except KeyError:
-    return "Zzzz"  # Unknown
+  return _script_data.get(char, "Zzzz")  # Unknown
 
 
 def script_extensions(char):
@@ -218,40 +263,37 @@ def script_extensions(char):
 
   The return value is a frozenset of four-letter script codes.
   """
-  load_data()
+  _load_table('script_extensions')
   char = _char_to_int(char)
-  try:
-    return _script_extensions_data[char]
-  except KeyError:
+  extensions = _script_extensions_data.get(char)
+  if extensions is None:
     return frozenset([script(char)])
+  return extensions
 
 
 def block(char):
   """Returns the block property of a character."""
-  load_data()
+  _load_table('blocks')
   char = _char_to_int(char)
-  try:
-    return _block_data[char]
-  except KeyError:
-    return "No_Block"
+  return _block_data.get(char, "No_Block")
 
 
 def block_range(block):
   """Returns a range (first, last) of the named block."""
-  load_data()
+  _load_table('blocks')
   return _block_range[block]
 
 
 def block_chars(block):
   """Returns a frozenset of the cps in the named block."""
-  load_data()
+  _load_table('blocks')
   first, last = _block_range[block]
   return frozenset(xrange(first, last + 1))
 
 
 def block_names():
   """Returns the names of the blocks in block order."""
-  load_data()
+  _load_table('blocks')
   return _block_names[:]
 
 
@@ -259,12 +301,9 @@ def age(char):
   """Returns the age property of a character as a string.
 
   Returns None if the character is unassigned."""
-  load_data()
+  _load_table('age')
   char = _char_to_int(char)
-  try:
-    return _age_data[char]
-  except KeyError:
-    return None
+  return _age_data.get(char)
 
 
 # Uniscribe treats these ignorables (Hangul fillers) as spacing.
@@ -272,22 +311,21 @@ UNISCRIBE_USED_IGNORABLES = frozenset([0x115f, 0x1160, 0x3164, 0xffa0])
 
 def is_default_ignorable(char):
   """Returns true if the character has the Default_Ignorable property."""
-  load_data()
+  _load_table('core_properties')
   if type(char) in [str, unicode]:
     char = ord(char)
   return char in _core_properties_data["Default_Ignorable_Code_Point"]
 
 def default_ignorables():
-  load_data()
-  return frozenset(_core_properties_data["Default_Ignorable_Code_Point"])
+  return chars_with_property("Default_Ignorable_Code_Point")
 
 
 def is_defined(char):
   """Returns true if the character is defined in the Unicode Standard."""
-  load_data()
+  _load_table('unicode_data')
   if type(char) in [str, unicode]:
     char = ord(char)
-  return char in _defined_characters
+  return char in _defined_character_ranges
 
 
 def is_private_use(char):
@@ -297,7 +335,7 @@ def is_private_use(char):
 
 def mirrored(char):
   """Returns 1 if the characters is bidi mirroring, 0 otherwise."""
-  load_data()
+  _load_table('unicode_data')
   if type(char) in [str, unicode]:
     char = ord(char)
   return int(char in _bidi_mirroring_characters)
@@ -305,7 +343,7 @@ def mirrored(char):
 
 def bidi_mirroring_glyph(char):
   """Returns the bidi mirroring glyph property of a character."""
-  load_data()
+  _load_table('bidi_mirroring')
   if type(char) in [str, unicode]:
     char = ord(char)
   try:
@@ -315,42 +353,40 @@ def bidi_mirroring_glyph(char):
 
 
 def mirrored_chars():
+  _load_table('bidi_mirroring')
   return frozenset(_bidi_mirroring_glyph_data.keys())
 
 
 def indic_positional_category(char):
   """Returns the Indic positional category of a character."""
-  load_data()
+  _load_table('indic')
   if type(char) in [str, unicode]:
     char = ord(char)
-  try:
-    return _indic_positional_data[char]
-  except KeyError:
-    return "NA"
+  return _indic_positional_data.get(char, "NA")
 
 
 def indic_syllabic_category(char):
   """Returns the Indic syllabic category of a character."""
-  load_data()
+  _load_table('indic')
   if type(char) in [str, unicode]:
     char = ord(char)
-  try:
-    return _bidi_syllabic_data[char]
-  except KeyError:
-    return "Other"
+  return _indic_syllabic_data.get(char, "Other")
 
 
 def create_script_to_chars():
   """Returns a mapping from script to defined characters, based on script and
   extensions, for all scripts."""
-  load_data()
+  _load_table('unicode_data')
+  _load_table('scripts')
+  _load_table('script_extensions')
   result = collections.defaultdict(set)
-  for cp in _defined_characters:
-    if cp in _script_data:
-      result[_script_data[cp]].add(cp)
-    if cp in _script_extensions_data:
-      for script in _script_extensions_data[cp]:
-        result[script].add(cp)
+  for table in [_script_data, _script_extensions_data]:
+    for first, last, value in table.ranges():
+      scripts = [value] if table is _script_data else value
+      cps = [cp for cp in xrange(first, last + 1)
+             if cp in _defined_character_ranges]
+      for script in scripts:
+        result[script].update(cps)
   return result
 
 
@@ -358,7 +394,7 @@ _DEFINED_CHARACTERS_CACHE = {}
 
 def defined_characters(version=None, scr=None):
   """Returns the set of all defined characters in the Unicode Standard."""
-  load_data()
+  _load_table('unicode_data')
   # handle common error where version is passed as string, the age test
   # will always pass
   if version is not None:
@@ -367,7 +403,7 @@ def defined_characters(version=None, scr=None):
     return _DEFINED_CHARACTERS_CACHE[(version, scr)]
   except KeyError:
     pass
-  characters = _defined_characters
+  characters = _get_defined_characters()
   if version is not None:
     characters = {char for char in characters
                   if age(char) is not None and float(age(char)) <= version}
@@ -379,6 +415,15 @@ def defined_characters(version=None, scr=None):
   return characters
 
 
+def _get_defined_characters():
+  """Returns the frozenset of all defined characters, building it from the
+  defined character ranges the first time it's needed."""
+  global _defined_characters
+  if _defined_characters is None:
+    _defined_characters = frozenset(_defined_character_ranges.codepoints())
+  return _defined_characters
+
+
 _strip_re = re.compile(r"[-'_ ]+")
 def _folded_script_name(script_name):
   """Folds a script name to its bare bones for comparison."""
@@ -390,7 +435,7 @@ def _folded_script_name(script_name):
 def script_code(script_name):
   """Returns the four-letter ISO 15924 code of a script from its long name.
   """
-  load_data()
+  _load_table('property_value_aliases')
   folded_script_name = _folded_script_name(script_name)
   try:
     return _HARD_CODED_FOLDED_SCRIPT_NAME_TO_CODE[folded_script_name]
@@ -422,13 +467,13 @@ def human_readable_script_name(code):
   try:
     return _HARD_CODED_HUMAN_READABLE_SCRIPT_NAMES[code]
   except KeyError:
-    load_data()
+    _load_table('property_value_aliases')
     return _script_code_to_long_name[code]
 
 
 def all_scripts():
   """Return a frozenset of all four-letter script codes."""
-  load_data()
+  _load_table('property_value_aliases')
   return frozenset(_script_code_to_long_name.keys())
 
 
@@ -436,6 +481,55 @@ _DATA_DIR_PATH = path.join(path.abspath(path.dirname(__file__)),
                            os.pardir, "third_party", "ucd")
 
 
+def _cache_dir():
+  return path.join(notoconfig.noto_cache(), 'unicode_data')
+
+
+def _source_hashes(table_name):
+  """Returns a map from the name of each data file read by the table or the
+  tables it depends on to a hash of the file's contents."""
+  hashes = {}
+  pending = [table_name]
+  while pending:
+    table = _TABLES[pending.pop()]
+    pending.extend(table.deps)
+    for data_file_name in table.data_files:
+      if data_file_name not in hashes:
+        with open(path.join(_DATA_DIR_PATH, data_file_name), 'rb') as f:
+          hashes[data_file_name] = hashlib.sha1(f.read()).hexdigest()
+  return hashes
+
+
+def _read_cache(table_name, cache_dir):
+  """Returns a map from global name to parsed data for the table read from the
+  cache in cache_dir, or None if the cache is missing, unreadable, or was not
+  built from the current data files by the current version of this module."""
+  try:
+    with open(path.join(cache_dir, table_name + '.pickle'), 'rb') as f:
+      version, hashes, cached_data = pickle.load(f)
+  except Exception:
+    return None
+  if version != _CACHE_VERSION or hashes != _source_hashes(table_name):
+    return None
+  return cached_data
+
+
+def _write_cache(table_name, cache_dir):
+  """Writes the parsed data for the table to the cache in cache_dir."""
+  if not path.isdir(cache_dir):
+    os.makedirs(cache_dir)
+  cached_data = {
+      name: globals()[name] for name in _TABLES[table_name].data_globals}
+  # write to a temp file and rename so concurrent readers never see a
+  # partial cache
+  cache_path = path.join(cache_dir, table_name + '.pickle')
+  temp_path = '%s.%d.tmp' % (cache_path, os.getpid())
+  with open(temp_path, 'wb') as f:
+    pickle.dump((_CACHE_VERSION, _source_hashes(table_name), cached_data), f,
+                pickle.HIGHEST_PROTOCOL)
+  os.rename(temp_path, cache_path)
+
+
 def open_unicode_data_file(data_file_name):
   """Opens a Unicode data file.
 
@@ -497,6 +591,64 @@ def _parse_code_ranges(input_data):
   return ranges
 
 
+class _RangeTable(object):
+  """Maps code points to property values using sorted, disjoint ranges.
+
+  The Unicode data files assign most properties to long runs of code points,
+  so the table keeps one entry per run rather than one per code point, and
+  looks code points up with a binary search on the range starts.
+  """
+
+  def __init__(self, ranges=()):
+    """Builds the table from (first, last, value) tuples in any order.
+    Adjacent ranges with equal values are coalesced; overlapping ranges
+    raise a ValueError."""
+    starts = []
+    ends = []
+    values = []
+    for first, last, value in sorted(ranges, key=lambda r: r[0]):
+      if ends and first <= ends[-1]:
+        raise ValueError('range %04X..%04X overlaps %04X..%04X' % (
+            first, last, starts[-1], ends[-1]))
+      if ends and first == ends[-1] + 1 and value == values[-1]:
+        ends[-1] = last
+      else:
+        starts.append(first)
+        ends.append(last)
+        values.append(value)
+    self._starts = starts
+    self._ends = ends
+    self._values = values
+
+  def _index(self, cp):
+    """Returns the index of the range containing cp, or -1."""
+    i = bisect.bisect_right(self._starts, cp) - 1
+    if i >= 0 and cp <= self._ends[i]:
+      return i
+    return -1
+
+  def get(self, cp, default=None):
+    i = self._index(cp)
+    return default if i == -1 else self._values[i]
+
+  def __contains__(self, cp):
+    return self._index(cp) != -1
+
+  def __len__(self):
+    """Returns the number of ranges, not the number of code points."""
+    return len(self._starts)
+
+  def ranges(self):
+    """Returns an iterator over the (first, last, value) tuples in order."""
+    return itertools.izip(self._starts, self._ends, self._values)
+
+  def codepoints(self):
+    """Returns an iterator over all the code points in the table, in order."""
+    return itertools.chain.from_iterable(
+        xrange(first, last + 1)
+        for first, last in itertools.izip(self._starts, self._ends))
+
+
 def _parse_semicolon_separated_data(input_data):
   """Reads semicolon-separated Unicode data from an input string.
 
@@ -535,14 +687,17 @@ def _parse_semicolon_separated_data(input_data):
 
 def _load_unicode_data_txt():
   """Load character data from UnicodeData.txt."""
-  global _defined_characters
+  global _general_category_data, _combining_class_data
+  global _defined_character_ranges
   global _bidi_mirroring_characters
-  if _defined_characters:
-    return
 
   with open_unicode_data_file("UnicodeData.txt") as unicode_data_txt:
     unicode_data = _parse_semicolon_separated_data(unicode_data_txt.read())
 
+  general_category_ranges = []
+  combining_class_ranges = []
+  defined_ranges = []
+
   for line in unicode_data:
     code = int(line[0], 16)
     char_name = line[1]
@@ -569,68 +724,71 @@ def _load_unicode_data_txt():
     elif char_name.endswith("Last>"):
       # Ignore surrogates
       if "Surrogate" not in char_name:
-        for char in xrange(last_range_opener, code+1):
-          _general_category_data[char] = general_category
-          _combining_class_data[char] = combining_class
-          if bidi_mirroring:
-            _bidi_mirroring_characters.add(char)
-          _defined_characters.add(char)
+        general_category_ranges.append(
+            (last_range_opener, code, general_category))
+        combining_class_ranges.append(
+            (last_range_opener, code, combining_class))
+        defined_ranges.append((last_range_opener, code, True))
+        if bidi_mirroring:
+          _bidi_mirroring_characters.update(
+              xrange(last_range_opener, code + 1))
     else:
       _character_names_data[code] = char_name
-      _general_category_data[code] = general_category
-      _combining_class_data[code] = combining_class
+      general_category_ranges.append((code, code, general_category))
+      combining_class_ranges.append((code, code, combining_class))
+      defined_ranges.append((code, code, True))
       if bidi_mirroring:
         _bidi_mirroring_characters.add(code)
-      _decomposition_data[code] = decomposition
-      _defined_characters.add(code)
+      if decomposition:
+        _decomposition_data[code] = decomposition
 
-  _defined_characters = frozenset(_defined_characters)
+  _general_category_data = _RangeTable(general_category_ranges)
+  _combining_class_data = _RangeTable(combining_class_ranges)
+  _defined_character_ranges = _RangeTable(defined_ranges)
   _bidi_mirroring_characters = frozenset(_bidi_mirroring_characters)
 
 
 def _load_scripts_txt():
   """Load script property from Scripts.txt."""
+  global _script_data
   with open_unicode_data_file("Scripts.txt") as scripts_txt:
     script_ranges = _parse_code_ranges(scripts_txt.read())
 
-  for first, last, script_name in script_ranges:
-    folded_script_name = _folded_script_name(script_name)
-    script = _folded_script_name_to_code[folded_script_name]
-    for char_code in xrange(first, last+1):
-      _script_data[char_code] = script
+  _script_data = _RangeTable(
+      (first, last, _folded_script_name_to_code[_folded_script_name(name)])
+      for first, last, name in script_ranges)
 
 
 def _load_script_extensions_txt():
   """Load script property from ScriptExtensions.txt."""
+  global _script_extensions_data
   with open_unicode_data_file("ScriptExtensions.txt") as se_txt:
     script_extensions_ranges = _parse_code_ranges(se_txt.read())
 
-  for first, last, script_names in script_extensions_ranges:
-    script_set = frozenset(script_names.split(' '))
-    for character_code in xrange(first, last+1):
-      _script_extensions_data[character_code] = script_set
+  _script_extensions_data = _RangeTable(
+      (first, last, frozenset(script_names.split(' ')))
+      for first, last, script_names in script_extensions_ranges)
 
 
 def _load_blocks_txt():
   """Load block name from Blocks.txt."""
+  global _block_data
   with open_unicode_data_file("Blocks.txt") as blocks_txt:
     block_ranges = _parse_code_ranges(blocks_txt.read())
 
   for first, last, block_name in block_ranges:
     _block_names.append(block_name)
     _block_range[block_name] = (first, last)
-    for character_code in xrange(first, last + 1):
-      _block_data[character_code] = block_name
+  _block_data = _RangeTable(block_ranges)
 
 
 def _load_derived_age_txt():
   """Load age property from DerivedAge.txt."""
+  global _age_data
   with open_unicode_data_file("DerivedAge.txt") as derived_age_txt:
     age_ranges = _parse_code_ranges(derived_age_txt.read())
 
-  for first, last, char_age in age_ranges:
-    for char_code in xrange(first, last+1):
-      _age_data[char_code] = char_age
+  _age_data = _RangeTable(age_ranges)
 
 
 def _load_derived_core_properties_txt():
@@ -638,12 +796,11 @@ def _load_derived_core_properties_txt():
   with open_unicode_data_file("DerivedCoreProperties.txt") as dcp_txt:
     dcp_ranges = _parse_code_ranges(dcp_txt.read())
 
+  property_ranges = collections.defaultdict(list)
   for first, last, property_name in dcp_ranges:
-    for character_code in xrange(first, last+1):
-      try:
-        _core_properties_data[property_name].add(character_code)
-      except KeyError:
-        _core_properties_data[property_name] = {character_code}
+    property_ranges[property_name].append((first, last, True))
+  for property_name, ranges in property_ranges.iteritems():
+    _core_properties_data[property_name] = _RangeTable(ranges)
 
 
 def _load_property_value_aliases_txt():
@@ -674,17 +831,14 @@ def _load_bidi_mirroring_txt():
 
 def _load_indic_data():
   """Load Indic properties from Indic(Positional|Syllabic)Category.txt."""
+  global _indic_positional_data, _indic_syllabic_data
   with open_unicode_data_file("IndicPositionalCategory.txt") as inpc_txt:
     positional_ranges = _parse_code_ranges(inpc_txt.read())
-  for first, last, char_position in positional_ranges:
-    for char_code in xrange(first, last+1):
-      _indic_positional_data[char_code] = char_position
+  _indic_positional_data = _RangeTable(positional_ranges)
 
   with open_unicode_data_file("IndicSyllabicCategory.txt") as insc_txt:
     syllabic_ranges = _parse_code_ranges(insc_txt.read())
-  for first, last, char_syllabic_category in syllabic_ranges:
-    for char_code in xrange(first, last+1):
-      _indic_syllabic_data[char_code] = char_syllabic_category
+  _indic_syllabic_data = _RangeTable(syllabic_ranges)
 
 
 def _load_emoji_data():
@@ -692,9 +846,6 @@ def _load_emoji_data():
   global _presentation_default_emoji, _presentation_default_text
   global _emoji, _emoji_modifier_base
 
-  if _presentation_default_emoji:
-    return
-
   emoji_sets = {
       'Emoji': set(),
       'Emoji_Presentation': set(),
@@ -1013,9 +1164,6 @@ def _apply_order_patch(patch, group_list):
 
 def _load_emoji_group_data():
   global _emoji_group_data
-  if _emoji_group_data:
-    return
-
   _emoji_group_data = {}
 
   with open_unicode_data_file('emoji-test.txt') as f:
@@ -1038,13 +1186,13 @@ def get_emoji_group_data(seq):
   Group data is a tuple of index, group, subgroup, and name.  The
   index is a unique global sort index for the sequence among all
   sequences in the group data."""
-  _load_emoji_group_data()
+  _load_table('emoji_groups')
   return _emoji_group_data.get(seq, None)
 
 
 def get_emoji_groups():
   """Return the main emoji groups, in order."""
-  _load_emoji_group_data()
+  _load_table('emoji_groups')
   groups = []
   group = None
   for _, g, _, _ in sorted(_emoji_group_data.values()):
@@ -1057,7 +1205,7 @@ def get_emoji_groups():
 def get_emoji_subgroups(group):
   """Return the subgroups of this group, in order, or None
   if the group is not recognized."""
-  _load_emoji_group_data()
+  _load_table('emoji_groups')
   subgroups = []
   subgroup = None
   for _, g, sg, _ in sorted(_emoji_group_data.values()):
@@ -1072,7 +1220,7 @@ def get_emoji_in_group(group, subgroup=None):
   """Return the sorted list of the emoji sequences in the group (limiting to
   subgroup if subgroup is not None).  Returns None if group does not
   exist, and an empty list if subgroup does not exist in group."""
-  _load_emoji_group_data()
+  _load_table('emoji_groups')
   result = None
   for seq, (index, g, sg, _) in _emoji_group_data.iteritems():
     if g == group:
@@ -1090,19 +1238,17 @@ def get_sorted_emoji_sequences(seqs):
   these sequences in the canonical emoji group order.  Sequences that are not
   canonical are placed at the end, in unicode code point order.
   """
-  _load_emoji_group_data()
+  _load_table('emoji_groups')
   return sorted(seqs, key=lambda s: (_emoji_group_data.get(s, 100000), s))
 
 
 def _load_emoji_sequence_data():
-  """Ensure the emoji sequence data is initialized."""
-  global _emoji_sequence_data, _emoji_non_vs_to_canonical
-
-  if _emoji_sequence_data is not None:
-    return
+  """Load the emoji sequence data."""
+  global _emoji_sequence_data, _emoji_non_vs_to_canonical, _emoji_names_data
 
   _emoji_sequence_data = {}
   _emoji_non_vs_to_canonical = {}
+  _emoji_names_data = {}
 
   def add_data(data):
     for k, t in data.iteritems():
@@ -1116,10 +1262,6 @@ def _load_emoji_sequence_data():
     add_data(_read_emoji_data_file(datafile))
   add_data(_read_emoji_data(_LEGACY_ANDROID_SEQUENCES.splitlines()))
 
-  _load_unicode_data_txt()  # ensure character_names_data is populated
-  _load_emoji_data()  # ensure presentation_default_text is populated
-  _load_emoji_group_data()  # ensure group data is populated
-
   # Get names for single emoji from the test data. We will prefer these over
   # those in UnicodeData (e.g. prefer "one o'clock" to "clock face one oclock"),
   # and if they're not in UnicodeData these are proposed new emoji.
@@ -1135,7 +1277,7 @@ def _load_emoji_sequence_data():
       # use 'ignore' to strip curly quotes etc if they exist, unicode
       # character names are ASCII, and it's probably best to keep it that way.
       cp_name = emoji_name.encode('ascii', 'ignore').upper()
-      _character_names_data[cp] = cp_name
+      _emoji_names_data[cp] = cp_name
 
     is_default_text_presentation = cp in _presentation_default_text
     if is_default_text_presentation:
@@ -1181,7 +1323,7 @@ def get_emoji_sequences(age=None, types=None):
   if age is not None, and those with type in types (if not a string) or
   type == types (if type is a string) if types is not None.  By default
   all sequences are returned, including those for single emoji."""
-  _load_emoji_sequence_data()
+  _load_table('emoji_sequences')
 
   result = _emoji_sequence_data.keys()
   if types is not None:
@@ -1197,7 +1339,7 @@ def get_emoji_sequences(age=None, types=None):
 def get_emoji_sequence_data(seq):
   """Return a tuple of the name, age, and type for the (possibly non-canonical)
   sequence, or None if not recognized as a sequence."""
-  _load_emoji_sequence_data()
+  _load_table('emoji_sequences')
 
   seq = get_canonical_emoji_sequence(seq)
   if not seq or seq not in _emoji_sequence_data:
@@ -1231,7 +1373,7 @@ def get_emoji_sequence_type(seq):
 def is_canonical_emoji_sequence(seq):
   """Return true if this is a canonical emoji sequence (has 'vs' where Unicode
   says it should), and is known."""
-  _load_emoji_sequence_data()
+  _load_table('emoji_sequences')
   return seq in _emoji_sequence_data
 
 
@@ -1324,27 +1466,27 @@ def is_skintone_modifier(cp):
 
 
 def get_presentation_default_emoji():
-  _load_emoji_data()
+  _load_table('emoji')
   return _presentation_default_emoji
 
 
 def get_presentation_default_text():
-  _load_emoji_data()
+  _load_table('emoji')
   return _presentation_default_text
 
 
 def get_emoji():
-  _load_emoji_data()
+  _load_table('emoji')
   return _emoji
 
 
 def is_emoji(cp):
-  _load_emoji_data()
+  _load_table('emoji')
   return cp in _emoji
 
 
 def is_emoji_modifier_base(cp):
-  _load_emoji_data()
+  _load_table('emoji')
   return cp in _emoji_modifier_base
 
 
@@ -1354,8 +1496,6 @@ def _load_unicode_emoji_variants():
   also have a text variant presentation so a single set works for both."""
 
   global _emoji_variants, _emoji_variants_proposed
-  if _emoji_variants:
-    return
 
   emoji_variants = set()
   line_re = re.compile(r'([0-9A-F]{4,6})\s+FE0F\s*;\s*emoji style\s*;')
@@ -1385,7 +1525,7 @@ def get_unicode_emoji_variants(include_proposed='proposed'):
   include_proposed is 'proposed_extra', also include the emoji Noto proposes
   for text presentation treatment to align related characters.  Else
   include_proposed should resolve to boolean False."""
-  _load_unicode_emoji_variants()
+  _load_table('emoji_variants')
   if not include_proposed:
     return _emoji_variants
   elif include_proposed == 'proposed':
@@ -1410,8 +1550,6 @@ def _load_variant_data():
   glyph as another CJK character."""
 
   global _variant_data, _variant_data_cps
-  if _variant_data:
-    return
 
   compatibility_re = re.compile(
       r'\s*CJK COMPATIBILITY IDEOGRAPH-([0-9A-Fa-f]+)')
@@ -1451,17 +1589,17 @@ def _load_variant_data():
 
 
 def has_variant_data(cp):
-  _load_variant_data()
+  _load_table('variants')
   return cp in _variant_data
 
 
 def get_variant_data(cp):
-  _load_variant_data()
+  _load_table('variants')
   return _variant_data[cp][:] if cp in _variant_data else None
 
 
 def variant_data_cps():
-  _load_variant_data()
+  _load_table('variants')
   return _variant_data_cps
 
 # proposed emoji
@@ -1471,8 +1609,6 @@ def _load_proposed_emoji_data():
   yet approved for Unicode 10."""
 
   global _proposed_emoji_data, _proposed_emoji_data_cps
-  if _proposed_emoji_data:
-    return
 
   _proposed_emoji_data = {}
   line_re = re.compile(
@@ -1497,17 +1633,17 @@ def _load_proposed_emoji_data():
 
 
 def proposed_emoji_name(cp):
-  _load_proposed_emoji_data()
+  _load_table('proposed_emoji')
   return _proposed_emoji_data.get(cp, '')
 
 
 def proposed_emoji_cps():
-  _load_proposed_emoji_data()
+  _load_table('proposed_emoji')
   return _proposed_emoji_data_cps
 
 
 def is_proposed_emoji(cp):
-  _load_proposed_emoji_data()
+  _load_table('proposed_emoji')
   return cp in _proposed_emoji_data_cps
 
 
@@ -1558,8 +1694,6 @@ def _dump_emoji_presentation():
 
 def _load_nameslist_data():
   global _nameslist_see_also
-  if _nameslist_see_also is not None:
-    return
 
   _nameslist_see_also = collections.defaultdict(set)
   cp = None
@@ -1587,14 +1721,12 @@ def _load_nameslist_data():
 
 
 def see_also(cp):
-  _load_nameslist_data()
+  _load_table('nameslist')
   return frozenset(_nameslist_see_also.get(cp))
 
 
 def _load_namealiases_data():
   global _namealiases_alt_names
-  if _namealiases_alt_names is not None:
-    return
 
   _namealiases_alt_names = collections.defaultdict(list)
   line_re = re.compile(r'([0-9A-F]{4,6});([^;]+);(.*)$')
@@ -1616,11 +1748,84 @@ def _load_namealiases_data():
 
 def alt_names(cp):
   """Return list of name, nametype tuples for cp, or None."""
-  _load_namealiases_data()
+  _load_table('namealiases')
   return tuple(_namealiases_alt_names.get(cp))
 
 
-if __name__ == '__main__':
+# The data tables, in the order load_data loads them.  Each table names the
+# tables it depends on, the data files it parses, and the module globals that
+# hold its data.  Any change to the parsing code or to the data hard-coded in
+# this module must bump _CACHE_VERSION so that existing caches are rebuilt.
+_CACHE_VERSION = 2
+_Table = collections.namedtuple(
+    '_Table', 'loader deps data_files data_globals')
+_TABLES = collections.OrderedDict([
+    ('property_value_aliases', _Table(
+        _load_property_value_aliases_txt, [], ['PropertyValueAliases.txt'],
+        ['_script_code_to_long_name', '_folded_script_name_to_code'])),
+    ('unicode_data', _Table(
+        _load_unicode_data_txt, [], ['UnicodeData.txt'],
+        ['_character_names_data', '_decomposition_data',
+         '_bidi_mirroring_characters', '_general_category_data',
+         '_combining_class_data', '_defined_character_ranges',
+         '_lower_to_upper_case'])),
+    ('scripts', _Table(
+        _load_scripts_txt, ['property_value_aliases'], ['Scripts.txt'],
+        ['_script_data'])),
+    ('script_extensions', _Table(
+        _load_script_extensions_txt, [], ['ScriptExtensions.txt'],
+        ['_script_extensions_data'])),
+    ('blocks', _Table(
+        _load_blocks_txt, [], ['Blocks.txt'],
+        ['_block_data', '_block_range', '_block_names'])),
+    ('age', _Table(
+        _load_derived_age_txt, [], ['DerivedAge.txt'], ['_age_data'])),
+    ('core_properties', _Table(
+        _load_derived_core_properties_txt, [], ['DerivedCoreProperties.txt'],
+        ['_core_properties_data'])),
+    ('bidi_mirroring', _Table(
+        _load_bidi_mirroring_txt, [], ['BidiMirroring.txt'],
+        ['_bidi_mirroring_glyph_data'])),
+    ('indic', _Table(
+        _load_indic_data, [],
+        ['IndicPositionalCategory.txt', 'IndicSyllabicCategory.txt'],
+        ['_indic_positional_data', '_indic_syllabic_data'])),
+    ('emoji', _Table(
+        _load_emoji_data, [], ['emoji-data.txt'],
+        ['_presentation_default_emoji', '_presentation_default_text',
+         '_emoji_modifier_base', '_emoji'])),
+    ('emoji_groups', _Table(
+        _load_emoji_group_data, [], ['emoji-test.txt'],
+        ['_emoji_group_data'])),
+    ('emoji_sequences', _Table(
+        _load_emoji_sequence_data,
+        ['unicode_data', 'age', 'emoji', 'emoji_groups'],
+        ['emoji-zwj-sequences.txt', 'emoji-sequences.txt'],
+        ['_emoji_sequence_data', '_emoji_non_vs_to_canonical',
+         '_emoji_names_data'])),
+    ('emoji_variants', _Table(
+        _load_unicode_emoji_variants, [],
+        ['StandardizedVariants.txt', 'proposed-variants.txt'],
+        ['_emoji_variants', '_emoji_variants_proposed'])),
+    ('variants', _Table(
+        _load_variant_data, [], ['StandardizedVariants.txt'],
+        ['_variant_data', '_variant_data_cps'])),
+    ('proposed_emoji', _Table(
+        _load_proposed_emoji_data, [], ['proposed-emoji-10.txt'],
+        ['_proposed_emoji_data', '_proposed_emoji_data_cps'])),
+    ('nameslist', _Table(
+        _load_nameslist_data, [], ['NamesList.txt'], ['_nameslist_see_also'])),
+    ('namealiases', _Table(
+        _load_namealiases_data, [], ['NameAliases.txt'],
+        ['_namealiases_alt_names'])),
+])
+_INITIAL_DATA = {
+    name: copy.deepcopy(globals()[name])
+    for table in _TABLES.itervalues() for name in table.data_globals}
+
+
+def _dump_emoji_groups():
+  """Dump emoji group info, for testing."""
   for k in sorted(get_emoji_sequences()):
     if not get_emoji_group_data(k):
       print 'no data:', seq_to_string(k)
@@ -1630,3 +1835,32 @@ if __name__ == '__main__':
     for subgroup in get_emoji_subgroups(group):
       print '  subgroup:', subgroup
       print '    %d items' % len(get_emoji_in_group(group, subgroup))
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+      '--rebuild_cache', help='reparse the data files and rewrite the cache '
+      '(default "%s")' % _cache_dir(), metavar='dir', nargs='?',
+      const=_cache_dir())
+  parser.add_argument(
+      '--load_stats', help='load all tables and report the time taken by '
+      'each', action='store_true')
+  args = parser.parse_args()
+
+  if args.rebuild_cache:
+    print 'wrote %s' % rebuild_cache(args.rebuild_cache)
+  elif args.load_stats:
+    load_data()
+    for table_name, seconds, from_cache in loaded_tables():
+      print '%-22s %7.3fs %s' % (
+          table_name, seconds, 'cache' if from_cache else 'parsed')
+  else:
+    _dump_emoji_groups()
+
+
+if __name__ == '__main__':
+  # Run the package module rather than __main__, so that the cache pickles
+  # _RangeTable under a name later imports can find.
+  from nototools import unicode_data
+  unicode_data.main()
@@ -14,9 +14,7 @@
 
 """Test general health of the fonts."""
 
-import json
-
-from nototools import render
+from nototools import shaper
 
 def _run_harfbuzz(text, font, language, extra_parameters=None):
     """Run harfbuzz on some text and return the shaped list."""
@@ -25,9 +23,8 @@ def _run_harfbuzz(text, font, language, extra_parameters=None):
         extra_parameters = extra_parameters.split(' ')
     except AttributeError:
         pass
-    hb_output = render.run_harfbuzz_on_text(
-        text, font, language, extra_parameters)
-    return json.loads(hb_output)
+    return shaper.get_shaper(font).shape(
+        text, language, hb_shape_options=extra_parameters)
 
 
 _advance_cache = {}
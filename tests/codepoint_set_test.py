@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for codepoint_set.py."""
+
+import pickle
+import random
+import unittest
+
+from nototools import tool_utils
+from nototools.codepoint_set import CodepointSet
+
+
+class CodepointSetTest(unittest.TestCase):
+    """Test class for codepoint_set.CodepointSet."""
+
+    def test_construction(self):
+        cps = CodepointSet([5, 3, 4, 10, 4, 0x10ffff])
+        self.assertEqual([(3, 5), (10, 10), (0x10ffff, 0x10ffff)], cps.ranges())
+        self.assertEqual(3, cps.range_count())
+        self.assertEqual(5, len(cps))
+        self.assertEqual([3, 4, 5, 10, 0x10ffff], list(cps))
+        self.assertEqual([0x10ffff, 10, 5, 4, 3], list(reversed(cps)))
+        self.assertEqual(cps, CodepointSet(cps))
+        self.assertFalse(CodepointSet())
+
+    def test_from_ranges(self):
+        cps = CodepointSet.from_ranges([(20, 30), (0, 5), (6, 8), (25, 40)])
+        self.assertEqual([(0, 8), (20, 40)], cps.ranges())
+        self.assertTrue(8 in cps)
+        self.assertFalse(9 in cps)
+        self.assertRaises(ValueError, CodepointSet.from_ranges, [(5, 4)])
+
+    def test_compares_with_set(self):
+        cps = CodepointSet([1, 2, 3])
+        self.assertEqual(set([1, 2, 3]), cps)
+        self.assertEqual(cps, frozenset([1, 2, 3]))
+        self.assertNotEqual(cps, set([1, 2]))
+        self.assertTrue(set([1, 2]) < cps)
+        self.assertTrue(cps <= set([1, 2, 3, 4]))
+        self.assertTrue(cps.issubset([1, 2, 3]))
+        self.assertTrue(cps.isdisjoint([0, 4]))
+
+    def test_operations_match_set(self):
+        rng = random.Random(42)
+        def random_set():
+            result = set()
+            for _ in range(rng.randint(0, 6)):
+                start = rng.randint(0, 100)
+                result.update(range(start, start + rng.randint(1, 10)))
+            return result
+
+        for _ in range(200):
+            a, b = random_set(), random_set()
+            cps_a, cps_b = CodepointSet(a), CodepointSet(b)
+            self.assertEqual(a & b, cps_a & cps_b)
+            self.assertEqual(a | b, cps_a | cps_b)
+            self.assertEqual(a - b, cps_a - cps_b)
+            self.assertEqual(a ^ b, cps_a ^ cps_b)
+            self.assertEqual(a - b, a - cps_b)
+            self.assertEqual(a <= b, cps_a <= cps_b)
+            self.assertEqual(a >= b, cps_a >= b)
+            self.assertIsInstance(b | cps_a, CodepointSet)
+
+    def test_mutation(self):
+        cps = CodepointSet()
+        for cp in [5, 7, 6, 1, 3, 2]:
+            cps.add(cp)
+        self.assertEqual([(1, 3), (5, 7)], cps.ranges())
+        cps.add(4)
+        self.assertEqual([(1, 7)], cps.ranges())
+        cps.discard(4)
+        cps.discard(1)
+        cps.discard(100)
+        self.assertEqual([(2, 3), (5, 7)], cps.ranges())
+        self.assertRaises(KeyError, cps.remove, 4)
+        self.assertEqual(2, cps.pop())
+        cps |= set([10])
+        cps -= CodepointSet([6])
+        self.assertEqual([(3, 3), (5, 5), (7, 7), (10, 10)], cps.ranges())
+        cps.clear()
+        self.assertRaises(KeyError, cps.pop)
+
+    def test_pickle(self):
+        for cps in (CodepointSet.from_ranges([(0x20, 0x7e), (0xa0, 0xff)]),
+                    CodepointSet()):
+            for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+                copy = pickle.loads(pickle.dumps(cps, protocol))
+                self.assertEqual(cps, copy)
+                self.assertEqual(cps.ranges(), copy.ranges())
+
+    def test_int_ranges(self):
+        cps = tool_utils.parse_int_ranges('20-7e a0 a1-ff')
+        self.assertIsInstance(cps, CodepointSet)
+        self.assertEqual([(0x20, 0x7e), (0xa0, 0xff)], cps.ranges())
+        self.assertEqual('0020-007e 00a0-00ff', tool_utils.write_int_ranges(cps))
+        self.assertEqual(
+            tool_utils.write_int_ranges(set(cps)),
+            tool_utils.write_int_ranges(cps))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for font_caching.py."""
+
+import os
+import tempfile
+import unittest
+
+from nototools import font_caching
+from nototools import ttc_utils
+from hb_input_test import make_font
+
+
+class FontCacheTest(unittest.TestCase):
+    """Test class for font_caching.FontCache."""
+
+    def setUp(self):
+        self.font_files = []
+        for _ in range(3):
+            font_file = tempfile.NamedTemporaryFile(suffix='.ttf')
+            make_font('').save(font_file.name)
+            self.font_files.append(font_file)
+        self.cache = font_caching.FontCache(max_fonts=2)
+
+    def test_reuse(self):
+        name = self.font_files[0].name
+        font = self.cache.open_font(name)
+        self.assertIs(font, self.cache.open_font(name))
+        # the font number doesn't matter for a font that isn't a collection
+        self.assertIs(font, self.cache.open_font(name, fontNumber=0))
+
+    def test_collection(self):
+        ttc_file = tempfile.NamedTemporaryFile(suffix='.ttc')
+        ttc_utils.ttcfile_build(
+            ttc_file.name, [f.name for f in self.font_files[:2]])
+        font_0 = self.cache.open_font(ttc_file.name, fontNumber=0)
+        font_1 = self.cache.open_font(ttc_file.name, fontNumber=1)
+        self.assertIsNot(font_0, font_1)
+        self.assertIs(font_0, self.cache.open_font(ttc_file.name, fontNumber=0))
+
+    def test_changed_file(self):
+        name = self.font_files[0].name
+        font = self.cache.open_font(name)
+        st = os.stat(name)
+        os.utime(name, (st.st_atime, st.st_mtime + 10))
+        self.assertIsNot(font, self.cache.open_font(name))
+
+    def test_least_recently_used(self):
+        name_a, name_b, name_c = [f.name for f in self.font_files]
+        font_a = self.cache.open_font(name_a)
+        font_b = self.cache.open_font(name_b)
+        self.cache.open_font(name_a)
+        self.cache.open_font(name_c)
+        self.assertIs(font_a, self.cache.open_font(name_a))
+        self.assertIsNot(font_b, self.cache.open_font(name_b))
+
+    def test_evict(self):
+        name_a, name_b, _ = [f.name for f in self.font_files]
+        font_a = self.cache.open_font(name_a)
+        font_b = self.cache.open_font(name_b)
+        self.cache.evict(name_a)
+        self.assertIsNot(font_a, self.cache.open_font(name_a))
+        self.assertIs(font_b, self.cache.open_font(name_b))
+        self.cache.evict()
+        self.assertIsNot(font_b, self.cache.open_font(name_b))
+
+
+if __name__ == '__main__':
+    unittest.main()
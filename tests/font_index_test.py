@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for font_index.py."""
+
+from os import path
+import shutil
+import tempfile
+import unittest
+
+from fontTools.ttLib import newTable
+
+from nototools import font_index
+from hb_input_test import make_font
+
+
+class FontIndexTest(unittest.TestCase):
+    """Test class for font_index.FontIndex."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index_path = path.join(self.temp_dir, 'index.sqlite')
+        self.font_file = path.join(self.temp_dir, 'font.ttf')
+        self._save_font(u'Test Sans')
+
+        self.read_font_info = font_index.read_font_info
+        self.reads = []
+
+        def read_font_info(font_file, font_number=0):
+            self.reads.append(font_file)
+            return self.read_font_info(font_file, font_number)
+        font_index.read_font_info = read_font_info
+
+    def tearDown(self):
+        font_index.read_font_info = self.read_font_info
+        shutil.rmtree(self.temp_dir)
+
+    def _save_font(self, family_name):
+        font = make_font('')
+        font['name'] = newTable('name')
+        font['name'].names = []
+        font['name'].setName(family_name, 1, 3, 1, 0x409)
+        font.save(self.font_file)
+
+    def test_info(self):
+        info = font_index.FontIndex(self.index_path).get(self.font_file)
+        self.assertEqual(u'Test Sans', info.names[1])
+        self.assertIn(ord('a'), info.cmap)
+        self.assertNotIn(ord(u'\u0b95'), info.cmap)
+        self.assertFalse(info.is_hinted)
+        self.assertIn('cmap', info.table_checksums)
+
+    def test_unchanged_file_is_not_read(self):
+        expected = font_index.FontIndex(self.index_path).get(self.font_file)
+        index = font_index.FontIndex(self.index_path)
+        self.assertEqual(expected, index.get(self.font_file))
+        copy_file = path.join(self.temp_dir, 'copy.ttf')
+        shutil.copy(self.font_file, copy_file)
+        self.assertEqual(expected, index.get(copy_file))
+        self.assertEqual([self.font_file], self.reads)
+
+    def test_changed_file_is_read(self):
+        index = font_index.FontIndex(self.index_path)
+        index.get(self.font_file)
+        self._save_font(u'Test Serif Changed')
+        self.assertEqual(u'Test Serif Changed', index.get(self.font_file).names[1])
+        self.assertEqual(2, len(self.reads))
+
+
+if __name__ == '__main__':
+    unittest.main()
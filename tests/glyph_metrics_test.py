@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for glyph_metrics.py."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+from nototools import glyph_metrics
+from nototools.glyph_area_pen import GlyphAreaPen
+from hb_input_test import make_font
+
+
+def _make_font():
+    """Returns a font where A is a square, B is A moved right, and C is A
+    as a component, moved right."""
+
+    font = make_font('')
+    glyf = font['glyf']
+    pen = TTGlyphPen(glyf)
+    for x in (100, 300):
+        pen.moveTo((x, 0))
+        pen.lineTo((x, 200))
+        pen.lineTo((x + 200, 200))
+        pen.lineTo((x + 200, 0))
+        pen.closePath()
+        glyf['A' if x == 100 else 'B'] = pen.glyph()
+    pen.addComponent('A', (1, 0, 0, 1, 200, 0))
+    glyf['C'] = pen.glyph()
+    return font
+
+
+class GlyphMetricsTest(unittest.TestCase):
+    """Test class for the glyph_metrics module."""
+
+    def test_glyph_metrics(self):
+        glyph_set = _make_font().getGlyphSet()
+        metrics = glyph_metrics.glyph_metrics(glyph_set, ['A', 'B', 'C', 'a'])
+
+        pen = GlyphAreaPen(glyph_set)
+        glyph_set['A'].draw(pen)
+        self.assertEqual(pen.pop(), metrics['A'].area)
+        self.assertEqual((100, 0, 300, 200), metrics['A'].bounds)
+        self.assertEqual(1, metrics['A'].contours)
+
+        self.assertEqual(metrics['A'].area, metrics['B'].area)
+        self.assertNotEqual(metrics['A'].outline_hash,
+                            metrics['B'].outline_hash)
+        self.assertEqual(metrics['B'], metrics['C'])
+
+        self.assertEqual(0, metrics['a'].area)
+        self.assertIsNone(metrics['a'].bounds)
+        self.assertEqual(0, metrics['a'].contours)
+
+    def test_raw_glyph_hashes(self):
+        font_a = _make_font()
+        font_b = _make_font()
+        # changing A changes the hash of C, which uses it as a component
+        pen = TTGlyphPen(font_b['glyf'])
+        pen.moveTo((100, 0))
+        pen.lineTo((100, 200))
+        pen.lineTo((300, 0))
+        pen.closePath()
+        font_b['glyf']['A'] = pen.glyph()
+
+        hashes = []
+        for font in (font_a, font_a, font_b):
+            font_file = tempfile.NamedTemporaryFile()
+            font.save(font_file.name)
+            hashes.append(glyph_metrics.raw_glyph_hashes(
+                TTFont(font_file.name)))
+        hashes_a, hashes_a2, hashes_b = hashes
+        self.assertEqual(hashes_a, hashes_a2)
+        self.assertEqual(
+            set(['A', 'C']),
+            set(name for name in hashes_a if hashes_a[name] != hashes_b[name]))
+
+    def test_font_glyph_metrics(self):
+        font = _make_font()
+        cache_dir = tempfile.mkdtemp()
+        try:
+            font_file = os.path.join(cache_dir, 'font.ttf')
+            font.save(font_file)
+            metrics = glyph_metrics.font_glyph_metrics(
+                font_file, cache_dir=cache_dir)
+            self.assertEqual(set(font.getGlyphOrder()), set(metrics))
+            self.assertEqual(2, len(os.listdir(cache_dir)))
+            self.assertEqual(metrics, glyph_metrics.font_glyph_metrics(
+                font_file, cache_dir=cache_dir))
+            self.assertEqual(metrics, glyph_metrics.font_glyph_metrics(
+                font_file, font, use_cache=False))
+        finally:
+            shutil.rmtree(cache_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
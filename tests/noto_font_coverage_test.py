@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for noto_font_coverage.py."""
+
+import unittest
+
+from nototools import noto_font_coverage
+from nototools import noto_fonts
+from nototools.codepoint_set import CodepointSet
+
+
+def _family(name, ranges):
+    charset = CodepointSet.from_ranges(ranges) if ranges is not None else None
+    return noto_fonts.NotoFamily(name, name.lower(), None, charset, [], [])
+
+
+class CoverageIndexTest(unittest.TestCase):
+    """Test class for noto_font_coverage.CoverageIndex."""
+
+    def setUp(self):
+        families = [
+            _family('Latin', [(0x20, 0x7e), (0xa0, 0xff)]),
+            _family('Greek', [(0x20, 0x7e), (0x370, 0x3ff)]),
+            _family('Symbols', [(0x2190, 0x21ff)]),
+            _family('Collection', None)]
+        self.index = noto_font_coverage.CoverageIndex(
+            dict((family.family_id, family) for family in families))
+
+    def test_families(self):
+        self.assertEqual(set(['Latin', 'Greek']), self.index.families(0x41))
+        self.assertEqual(set(['Latin']), self.index.families(0xff))
+        self.assertEqual(set(), self.index.families(0x100))
+        self.assertEqual(set(), self.index.families(0x10ffff))
+
+    def test_each_coverage(self):
+        cps = noto_font_coverage.codepoints(['7d-a0', '3ff', '2190'])
+        self.assertEqual(
+            [('007d-007e', set(['Latin', 'Greek'])),
+             ('007f-009f', set()),
+             ('00a0', set(['Latin'])),
+             ('03ff', set(['Greek'])),
+             ('2190', set(['Symbols']))],
+            [(noto_font_coverage.to_ranges_str(out_cps), out_families)
+             for out_cps, out_families in self.index.each_coverage(cps)])
+
+    def test_any_coverage(self):
+        cps = noto_font_coverage.codepoints(['41-43', '370', '100'])
+        result, missing = self.index.any_coverage(cps)
+        self.assertEqual(
+            {'Latin': CodepointSet([0x41, 0x42, 0x43]),
+             'Greek': CodepointSet([0x41, 0x42, 0x43, 0x370])},
+            result)
+        self.assertEqual(CodepointSet([0x100]), missing)
+
+    def test_all_coverage(self):
+        codepoints = noto_font_coverage.codepoints
+        self.assertEqual(set(['Latin', 'Greek']),
+                         self.index.all_coverage(codepoints(['20-7e'])))
+        self.assertEqual(set(['Latin']),
+                         self.index.all_coverage(codepoints(['41', 'e9'])))
+        self.assertEqual(set(),
+                         self.index.all_coverage(codepoints(['7e-a0'])))
+
+
+if __name__ == '__main__':
+    unittest.main()
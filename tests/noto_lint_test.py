@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for noto_lint.py."""
+
+from os import path
+import unittest
+
+from nototools import noto_lint
+from nototools import shaper
+from nototools import unicode_data
+
+
+def _polygon(*points):
+    """Returns a closed contour of line curves through the points."""
+    points = list(points)
+    return [[p, q] for p, q in zip(points, points[1:] + points[:1])]
+
+
+class CurvesIntersectTest(unittest.TestCase):
+    """Test class for noto_lint.curves_intersect."""
+
+    def check(self, contours):
+        """Returns the result, checking that pruning doesn't change it."""
+        result = noto_lint.curves_intersect(contours)
+        self.assertEqual(
+            noto_lint.curves_intersect(contours, prune=False), result)
+        return result
+
+    def test_separate_contours(self):
+        self.assertIsNone(self.check([
+            _polygon((0, 0), (0, 100), (100, 100), (100, 0)),
+            _polygon((200, 0), (200, 100), (300, 100), (300, 0)),
+            _polygon((20, 20), (50, 80), (80, 20))]))
+
+    def test_curves(self):
+        self.assertIsNone(self.check([
+            [[(0, 0), (50, 100), (100, 0)], [(100, 0), (0, 0)]],
+            [[(40, 10), (50, 40), (60, 10)], [(60, 10), (40, 10)]]]))
+        self.assertEqual(
+            'intersection ((0.0, 0.0), (50.0, 100.0), (100.0, 0.0)) and '
+            '((40.0, 10.0), (50.0, 120.0), (60.0, 10.0))',
+            self.check([
+                [[(0, 0), (50, 100), (100, 0)], [(100, 0), (0, 0)]],
+                [[(40, 10), (50, 120), (60, 10)], [(60, 10), (40, 10)]]]))
+
+    def test_crossing_contours(self):
+        self.assertEqual(
+            'intersection ((10.0, 100.0), (100.0, 90.0)) and '
+            '((40.0, 40.0), (60.0, 140.0))',
+            self.check([
+                _polygon((0, 0), (10, 100), (100, 90), (90, -10)),
+                _polygon((40, 40), (60, 140), (140, 120), (120, 20))]))
+
+    def test_touching_pieces(self):
+        # two contours sharing a point
+        self.assertIsNotNone(self.check([
+            _polygon((0, 0), (0, 100), (100, 100)),
+            _polygon((100, 100), (200, 100), (200, 200))]))
+
+    def test_overlapping_piece_pairs(self):
+        pieces = [((0.0, 0.0), (10.0, 10.0)),
+                  ((20.0, 0.0), (30.0, 10.0)),
+                  ((5.0, 5.0), (25.0, 5.0)),
+                  ((0.0, 20.0), (30.0, 30.0))]
+        self.assertEqual(
+            [(0, 2), (1, 2)], noto_lint.overlapping_piece_pairs(pieces))
+
+
+class ToolVersionTest(unittest.TestCase):
+    """Test class for the inputs of the noto_lint result cache key."""
+
+    def test_sources_include_imported_modules(self):
+        sources = noto_lint._nototools_source_files()
+        for module in [noto_lint, shaper, unicode_data]:
+            self.assertIn(
+                path.splitext(path.abspath(module.__file__))[0] + '.py',
+                sources)
+
+    def test_data_files_include_ucd_and_cmap_data(self):
+        names = [path.basename(f) for f in noto_lint._data_files()]
+        self.assertIn('UnicodeData.txt', names)
+        self.assertIn('noto_cmap_phase3.xml', names)
+
+
+if __name__ == '__main__':
+    unittest.main()
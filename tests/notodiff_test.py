@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for notodiff.py."""
+
+import unittest
+
+from nototools import notodiff
+from nototools import shape_diff
+
+
+_STAT_TYPES = (
+    'compared', 'untested', 'unmatched', 'unicode_mismatch',
+    'gdef_mark_mismatch', 'zero_width_mismatch', 'input_mismatch')
+
+
+def _stats(**kwargs):
+    stats = dict((stat_type, []) for stat_type in _STAT_TYPES)
+    stats.update(kwargs)
+    return stats
+
+
+class MergeShapeStatsTest(unittest.TestCase):
+    """Test class for notodiff._merge_shape_stats."""
+
+    def test_merge(self):
+        pair_stats = [
+            _stats(compared=[(0.5, 'a', 'A.ttf'), (0.1, 'b', 'A.ttf'),
+                             (0.9, 'c', 'A.ttf')],
+                   unmatched=[('A.ttf', set(['d']), set())]),
+            _stats(compared=[(0.3, 'a', 'B.ttf'), (0.7, 'b', 'B.ttf')],
+                   unmatched=[('B.ttf', set(), set(['e']))])]
+        unmerged = _stats()
+        merged = {}
+        for stats in pair_stats:
+            for stat_type, values in stats.items():
+                unmerged[stat_type].extend(values)
+            notodiff._merge_shape_stats(merged, dict(stats), ['c'], 2)
+
+        self.assertEqual(4, merged['compared_count'])
+        self.assertEqual(
+            [(0.7, 'b', 'B.ttf'), (0.5, 'a', 'A.ttf')], merged['compared'])
+        self.assertEqual(unmerged['unmatched'], merged['unmatched'])
+        self.assertEqual(
+            shape_diff.ShapeDiffFinder.dump(unmerged, ['c'], 2, False, True),
+            shape_diff.ShapeDiffFinder.dump(merged, ['c'], 2, False, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for otl_rules.py."""
+
+import unittest
+
+from nototools import otl_rules
+from hb_input_test import make_font
+
+
+class OtlRulesTest(unittest.TestCase):
+    """Test class for the otl_rules module."""
+
+    def test_kerning_pairs(self):
+        font = make_font('''
+            @A_B = [A B];
+            @C_D = [C D];
+            @E_F = [E F];
+            feature kern {
+                pos a b -10;
+                pos @A_B @C_D -20;
+                pos @E_F @C_D 30;
+                pos @E_F A 0;
+                pos a d <5 0 -10 0>;
+                pos a c -40;
+            } kern;
+        ''')
+        self.assertEqual({
+            ('a', 'b'): [-10], ('a', 'c'): [-40],
+            ('A', 'C'): [-20], ('A', 'D'): [-20],
+            ('B', 'C'): [-20], ('B', 'D'): [-20],
+            ('E', 'C'): [30], ('E', 'D'): [30],
+            ('F', 'C'): [30], ('F', 'D'): [30]},
+            otl_rules.kerning_pairs(font))
+
+    def test_marks(self):
+        font = make_font('''
+            markClass [acute grave] <anchor 0 500> @TOP;
+            markClass cedilla <anchor 0 -10> @BOTTOM;
+            feature mark {
+                pos base [a e] <anchor 250 450> mark @TOP
+                    <anchor 250 0> mark @BOTTOM;
+            } mark;
+            feature mkmk {
+                pos mark acute <anchor 0 700> mark @TOP;
+            } mkmk;
+        ''')
+        self.assertEqual({
+            ('acute', '@acute'): (0, 500), ('grave', '@acute'): (0, 500),
+            ('cedilla', '@cedilla'): (0, -10)},
+            otl_rules.mark_classes(font))
+        self.assertEqual({
+            ('a', '@acute'): (250, 450), ('e', '@acute'): (250, 450),
+            ('a', '@cedilla'): (250, 0), ('e', '@cedilla'): (250, 0)},
+            otl_rules.mark_attachments(font, 'base'))
+        self.assertEqual(
+            {('acute', '@acute'): (0, 700)},
+            otl_rules.mark_attachments(font, 'mark'))
+
+    def test_gsub_rules(self):
+        font = make_font('''
+            lookup SMCP {
+                sub a by A.sc;
+                sub b by B.sc;
+            } SMCP;
+            feature smcp {
+                lookup SMCP;
+            } smcp;
+            feature c2sc {
+                lookup SMCP;
+                sub A by A.sc;
+            } c2sc;
+            feature liga {
+                sub f i by f_i;
+                sub a' b by a.alt1;
+            } liga;
+        ''')
+        self.assertEqual(set([
+            ('smcp', 'a', 'A.sc'), ('smcp', 'b', 'B.sc'),
+            ('c2sc', 'a', 'A.sc'), ('c2sc', 'b', 'B.sc'),
+            ('c2sc', 'A', 'A.sc')]),
+            otl_rules.gsub_rules(font))
+
+
+if __name__ == '__main__':
+    unittest.main()
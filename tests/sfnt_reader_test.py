@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for sfnt_reader.py."""
+
+import tempfile
+import unittest
+
+from fontTools.ttLib import newTable
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._c_m_a_p import cmap_format_12
+
+from nototools import font_data
+from nototools import sfnt_reader
+from nototools import summary
+from hb_input_test import make_font
+
+
+class SfntReaderTest(unittest.TestCase):
+    """Test class for sfnt_reader.SfntFile, comparing it with fontTools."""
+
+    def _check_font(self, font):
+        font_file = tempfile.NamedTemporaryFile(suffix='.ttf')
+        font.save(font_file.name)
+        font = TTFont(font_file.name)
+        with sfnt_reader.SfntFile(font_file.name) as sfnt_file:
+            self.assertEqual(1, len(sfnt_file.fonts))
+            sfnt_font = sfnt_file.fonts[0]
+            self.assertEqual(sorted(font.reader.keys()),
+                             sorted(sfnt_font.tables))
+            for tag, entry in sfnt_font.tables.iteritems():
+                self.assertEqual(font.reader.tables[tag].length, entry.length)
+                self.assertEqual(
+                    int(font.reader.tables[tag].checkSum) & 0xffffffff,
+                    entry.checksum)
+            self.assertEqual(font_data.get_name_records(font),
+                             sfnt_font.name_records())
+            self.assertEqual(font['maxp'].numGlyphs, sfnt_font.num_glyphs())
+            self.assertAlmostEqual(font['head'].fontRevision,
+                                   sfnt_font.font_revision(), places=4)
+            self.assertEqual(
+                font_data.printable_font_revision(font),
+                font_data.format_font_revision(sfnt_font.font_revision()))
+            self.assertEqual(set(summary.get_largest_cmap(font)),
+                             sfnt_font.cmap_codepoints())
+
+    def _make_font(self):
+        font = make_font('')
+        font['head'].fontRevision = 2.0041
+        font['name'] = newTable('name')
+        font['name'].names = []
+        font['name'].setName(u'Test Sans', 1, 3, 1, 0x409)
+        font['name'].setName(u'Version 2.004', 5, 3, 1, 0x409)
+        font['name'].setName(u'Mac Name', 1, 1, 0, 0)
+        return font
+
+    def test_format_4_cmap(self):
+        self._check_font(self._make_font())
+
+    def test_format_12_cmap(self):
+        font = self._make_font()
+        table = cmap_format_12(12)
+        table.platformID = 3
+        table.platEncID = 10
+        table.language = 0
+        table.cmap = dict(font['cmap'].tables[0].cmap)
+        table.cmap[0x1f600] = 'a'
+        font['cmap'].tables.append(table)
+        self._check_font(font)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for shape_diff.py."""
+
+import random
+import tempfile
+import unittest
+
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from PIL import Image
+
+from nototools import shape_diff
+from hb_input_test import make_font
+
+
+def _random_image(rng, width, height):
+    img = Image.new('L', (width, height))
+    img.putdata([rng.choice((0, 0, 255, rng.randint(0, 255)))
+                 for _ in range(width * height)])
+    return img
+
+
+class ImageDiffTest(unittest.TestCase):
+    """Test class for ShapeDiffFinder's image comparison."""
+
+    def setUp(self):
+        font_file = tempfile.NamedTemporaryFile()
+        make_font('').save(font_file.name)
+        self.finder = shape_diff.ShapeDiffFinder(
+            font_file.name, font_file.name, {})
+        self.have_numpy = shape_diff._HAVE_NUMPY
+
+    def tearDown(self):
+        shape_diff._HAVE_NUMPY = self.have_numpy
+
+    def _compare(self, img_a, img_b):
+        """Returns the diff and comparison image data with and without
+        numpy."""
+        results = []
+        for have_numpy in (False, self.have_numpy):
+            shape_diff._HAVE_NUMPY = have_numpy
+            results.append((
+                self.finder._diff_images(img_a, img_b),
+                list(self.finder._comparison_image(img_a, img_b).getdata())))
+        return results
+
+    def test_identical(self):
+        img = _random_image(random.Random(1), 9, 7)
+        for diff, data in self._compare(img, img):
+            self.assertEqual(0, diff)
+            self.assertTrue(all(r == g == b for r, g, b in data))
+
+    def test_numpy_matches_python(self):
+        rng = random.Random(2)
+        sizes = [(30, 20), (31, 20), (30, 25), (17, 9), (1, 1), (44, 60)]
+        for size_a in sizes:
+            for size_b in sizes:
+                img_a = _random_image(rng, *size_a)
+                img_b = _random_image(rng, *size_b)
+                python_result, numpy_result = self._compare(img_a, img_b)
+                self.assertEqual(repr(python_result[0]), repr(numpy_result[0]))
+                self.assertEqual(python_result[1], numpy_result[1])
+
+
+class ShapeDiffTest(unittest.TestCase):
+    """Test class for ShapeDiffFinder's shape comparison."""
+
+    def _save_font(self, points):
+        font = make_font('')
+        pen = TTGlyphPen(font['glyf'])
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+        font['glyf']['A'] = pen.glyph()
+        pen.addComponent('A', (1, 0, 0, 1, 0, 0))
+        font['glyf']['B'] = pen.glyph()
+        font_file = tempfile.NamedTemporaryFile()
+        font.save(font_file.name)
+        return font_file
+
+    def test_unchanged_glyphs(self):
+        file_a = self._save_font([(0, 0), (0, 100), (100, 100), (100, 0)])
+        file_b = self._save_font([(0, 0), (0, 100), (100, 0)])
+        stats = {}
+        finder = shape_diff.ShapeDiffFinder(file_a.name, file_b.name, stats)
+        finder.find_shape_diffs()
+        self.assertEqual(
+            ['A', 'B'], sorted(name for _, name, _ in stats['compared']))
+        self.assertEqual(
+            [(finder.basepath, len(finder.names) - 2)], stats['unchanged'])
+
+
+@unittest.skipUnless(shape_diff._HAVE_FREETYPE, 'requires freetype-py')
+class FreeTypeRendererTest(unittest.TestCase):
+    """Test class for shape_diff.FreeTypeRenderer."""
+
+    def test_render(self):
+        font = make_font('')
+        font['hhea'].ascent = 800
+        font['hhea'].descent = -200
+        pen = TTGlyphPen(font['glyf'])
+        pen.moveTo((100, 0))
+        pen.lineTo((100, 700))
+        pen.lineTo((500, 700))
+        pen.lineTo((500, 0))
+        pen.closePath()
+        font['glyf']['A'] = pen.glyph()
+        font_file = tempfile.NamedTemporaryFile()
+        font.save(font_file.name)
+
+        renderer = shape_diff.FreeTypeRenderer(font_file.name, 100)
+        glyph_a = {'g': font.getGlyphID('A'), 'cl': 0,
+                   'dx': 0, 'dy': 0, 'ax': 600, 'ay': 0}
+        img = renderer.render([glyph_a, dict(glyph_a, cl=1, dy=100)])
+        # two 60 unit advances plus margins, ascent + descent plus margins
+        self.assertEqual((152, 132), img.size)
+        # the baseline is at 16 + 80, the first square covers x 26-66,
+        # y 26-96, the second is shifted up 10 and right 60
+        self.assertEqual(0, img.getpixel((40, 80)))
+        self.assertEqual(0, img.getpixel((100, 20)))
+        self.assertEqual(255, img.getpixel((100, 90)))
+        self.assertEqual(255, img.getpixel((20, 50)))
+        self.assertEqual(255, img.getpixel((70, 50)))
+
+
+if __name__ == '__main__':
+    unittest.main()
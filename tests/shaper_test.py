@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for shaper.py."""
+
+from os import path
+import subprocess
+import unittest
+
+from nototools import shaper
+
+
+_FONT_FILE = path.join(path.dirname(path.abspath(__file__)), 'data',
+                       'font1.ttf')
+
+
+def _have_hb_shape():
+    try:
+        subprocess.check_output([shaper.hb_shape_path(), '--version'])
+    except (OSError, subprocess.CalledProcessError):
+        return False
+    return True
+
+
+class ShaperTest(unittest.TestCase):
+    """Test class for the shaper module."""
+
+    def test_parse_features(self):
+        self.assertEqual({}, shaper.parse_features(''))
+        self.assertEqual(
+            {'isol': 0, 'init': 1, 'ss01': 1, 'aalt': 2},
+            shaper.parse_features('-isol,init, +ss01,aalt=2'))
+        self.assertIsNone(shaper.parse_features('kern[3:5]'))
+        self.assertIsNone(shaper.parse_features('liga=on'))
+
+    def test_format_glyphs(self):
+        glyphs = [
+            {'g': 'uni0627', 'cl': 0, 'dx': 0, 'dy': 0, 'ax': 500, 'ay': 0},
+            {'g': 'uni064B', 'cl': 0, 'dx': -20, 'dy': 30, 'ax': 0, 'ay': 0},
+            {'g': 7, 'cl': 1, 'dx': 0, 'dy': 0, 'ax': 0, 'ay': -1000}]
+        self.assertEqual(
+            '[uni0627=0+500|uni064B=0@-20,30+0|7=1+0,-1000]',
+            shaper.format_glyphs(glyphs))
+
+    def test_shared_shaper(self):
+        font_file = shaper.get_shaper('font.ttf').font_file
+        self.assertIs(shaper.get_shaper(font_file), shaper.get_shaper('font.ttf'))
+        self.assertEqual([], shaper.get_shaper(font_file).shape_lines([]))
+
+    def test_codepoints(self):
+        self.assertEqual([0x41, 0x1f600, 0x42],
+                         shaper.codepoints(u'A\ud83d\ude00B'))
+        self.assertEqual([0x41, 0x1f600], shaper.codepoints(u'A\U0001f600'))
+        # lone surrogates are passed through
+        self.assertEqual([0xde00, 0xd83d], shaper.codepoints(u'\ude00\ud83d'))
+
+    @unittest.skipUnless(shaper._HAVE_UHARFBUZZ and _have_hb_shape(),
+                         'requires uharfbuzz and hb-shape')
+    def test_in_process_matches_hb_shape(self):
+        # includes a character outside the BMP, which the font doesn't map
+        lines = [u'Hello, world', u'fi \u00e9\u0301', u'A\U0001f600B']
+        font_shaper = shaper.Shaper(_FONT_FILE)
+        for glyph_names in (False, True):
+            hb_shape = font_shaper._run_hb_shape(
+                lines, None, '', glyph_names, [])
+            self.assertEqual(len(lines), len(hb_shape))
+            for line, glyphs in zip(lines, hb_shape):
+                self.assertEqual(
+                    glyphs, font_shaper._shape_in_process(
+                        line, None, {}, glyph_names))
+
+
+if __name__ == '__main__':
+    unittest.main()
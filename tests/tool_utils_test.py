@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for tool_utils.py."""
+
+import os
+from os import path
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+from nototools import coverage
+from nototools import lint_config
+from nototools import noto_font_coverage
+from nototools import tool_utils
+from nototools.codepoint_set import CodepointSet
+
+
+class IntRangesTest(unittest.TestCase):
+    """Test class for the int range reading and writing functions."""
+
+    def test_iter_int_ranges(self):
+        expected = [(1, 3), (5, 5), (7, 8)]
+        for values in ([1, 2, 3, 5, 7, 8], [1, 2, 2, 3, 5, 7, 8],
+                       (8, 7, 5, 3, 2, 1), set([1, 2, 3, 5, 7, 8]),
+                       CodepointSet([1, 2, 3, 5, 7, 8])):
+            self.assertEqual(expected, list(tool_utils.iter_int_ranges(values)))
+        self.assertEqual([], list(tool_utils.iter_int_ranges([])))
+
+    def test_write_int_ranges(self):
+        values = [0x20, 0x21, 0x22, 0x41, 0x4e00, 0x4e01]
+        self.assertEqual(
+            '0020-0022 0041 4e00-4e01', tool_utils.write_int_ranges(values))
+        self.assertEqual(
+            '32-34,65,19968-19969',
+            tool_utils.write_int_ranges(set(values), in_hex=False, sep=','))
+        self.assertEqual('', tool_utils.write_int_ranges(set()))
+
+    def test_writers_agree(self):
+        values = set(range(0x4e00, 0x9fd6)) | set([0x20, 0x3000, 0x3002])
+        expected = tool_utils.write_int_ranges(values)
+        self.assertEqual(expected, lint_config.write_int_ranges(values))
+        self.assertEqual(expected, noto_font_coverage.to_ranges_str(values))
+        self.assertEqual(
+            [(0x20, 0x20), (0x3000, 0x3000), (0x3002, 0x3002), (0x4e00, 0x9fd5)],
+            coverage.convert_set_to_ranges(values))
+
+    def test_parse_int_ranges(self):
+        text = '20-7e a0 a1-ff'
+        self.assertEqual(
+            set(range(0x20, 0x7f) + range(0xa0, 0x100)),
+            tool_utils.parse_int_ranges(text))
+        self.assertEqual(
+            range(0x20, 0x7f) + range(0xa0, 0x100),
+            tool_utils.parse_int_ranges(text, return_set=False))
+        self.assertEqual(
+            [0x1ee42, 0x1ee47, 0x1ee4d, 0x1ee4e, 0x1ee4f],
+            tool_utils.parse_int_ranges(
+                '1ee42/7/d-f', return_set=False, allow_compressed=True))
+        self.assertRaises(ValueError, tool_utils.parse_int_ranges, '20-30 25')
+        self.assertEqual(
+            [0x20, 0x21, 0x21],
+            tool_utils.parse_int_ranges(
+                '20-21 21', allow_duplicates=True, return_set=False))
+
+    def test_round_trip(self):
+        text = tool_utils.write_int_ranges(range(0x4e00, 0x9fd6) + [0x20])
+        self.assertEqual(
+            set(range(0x4e00, 0x9fd6) + [0x20]),
+            lint_config.parse_int_ranges(text))
+        self.assertEqual(
+            CodepointSet.from_ranges([(0x20, 0x20), (0x4e00, 0x9fd5)]),
+            tool_utils.parse_int_ranges(text))
+
+
+class ZipTest(unittest.TestCase):
+    """Test class for the in-process zip functions."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = path.join(self.temp_dir, 'cache')
+        self.contents = {'a.txt': 'abc' * 1000, 'b.txt': '', 'c.bin': '\xff\0'}
+        for name, data in self.contents.iteritems():
+            with open(path.join(self.temp_dir, name), 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _pairs(self, *names):
+        return [(path.join(self.temp_dir, name), 'dir/' + name)
+                for name in names]
+
+    def _check_zip(self, archive_path, names):
+        with zipfile.ZipFile(archive_path) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(['dir/' + name for name in names],
+                             archive.namelist())
+            for name in names:
+                self.assertEqual(self.contents[name],
+                                 archive.read('dir/' + name))
+
+    def test_generate_zips(self):
+        archives = [
+            (self._pairs('a.txt', 'b.txt', 'c.bin'),
+             path.join(self.temp_dir, 'all.zip')),
+            (self._pairs('c.bin', 'a.txt'),
+             path.join(self.temp_dir, 'some.zip'))]
+        for jobs in (1, 2):
+            self.assertEqual(
+                [archive_path for _, archive_path in archives],
+                list(tool_utils.generate_zips_from_filepairs(
+                    archives, jobs, self.cache_dir)))
+            self._check_zip(archives[0][1], ['a.txt', 'b.txt', 'c.bin'])
+            self._check_zip(archives[1][1], ['c.bin', 'a.txt'])
+        # each distinct file is compressed once
+        self.assertEqual(3, len(os.listdir(self.cache_dir)))
+
+    def test_deflate_in_blocks(self):
+        # more than one block, so the crc and compressor carry across reads
+        data = ''.join(chr(i % 251) for i in range(3 << 19))
+        self.contents['big.bin'] = data
+        source = path.join(self.temp_dir, 'big.bin')
+        with open(source, 'wb') as f:
+            f.write(data)
+        archive_path = path.join(self.temp_dir, 'big.zip')
+        tool_utils.generate_zip_from_filepairs(
+            self._pairs('big.bin'), archive_path, self.cache_dir)
+        self._check_zip(archive_path, ['big.bin'])
+        self.assertEqual(
+            path.basename(tool_utils.deflate_file(source, self.cache_dir)),
+            tool_utils.file_sha1(source) + '.9.deflate')
+
+    def test_source_hashes(self):
+        source = path.join(self.temp_dir, 'a.txt')
+        archive_path = path.join(self.temp_dir, 'a.zip')
+        # a known hash names the cache entry without reading the source
+        list(tool_utils.generate_zips_from_filepairs(
+            [(self._pairs('a.txt'), archive_path)], 1, self.cache_dir,
+            {source: 'f' * 40}))
+        self.assertEqual(['f' * 40 + '.9.deflate'], os.listdir(self.cache_dir))
+        self._check_zip(archive_path, ['a.txt'])
+
+    def test_prune_deflate_cache(self):
+        sources = [path.join(self.temp_dir, name)
+                   for name in ('a.txt', 'b.txt', 'c.bin')]
+        for source in sources:
+            tool_utils.deflate_file(source, self.cache_dir)
+        with open(path.join(self.cache_dir, 'x.9.deflate.123.tmp'), 'w'):
+            pass
+        keep = tool_utils.file_sha1(sources[0])
+        self.assertEqual(
+            3, tool_utils.prune_deflate_cache(set([keep]), self.cache_dir))
+        self.assertEqual([keep + '.9.deflate'], os.listdir(self.cache_dir))
+
+    def test_add_to_zip(self):
+        archive_path = path.join(self.temp_dir, 'add.zip')
+        tool_utils.generate_zip_from_filepairs(
+            self._pairs('a.txt'), archive_path, self.cache_dir)
+        tool_utils.add_to_zip_from_filepairs(
+            self._pairs('b.txt', 'c.bin'), archive_path)
+        self._check_zip(archive_path, ['a.txt', 'b.txt', 'c.bin'])
+
+
+class BuildManifestTest(unittest.TestCase):
+    """Test class for tool_utils.BuildManifest."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.target = path.join(self.temp_dir, 'target')
+        os.makedirs(self.target)
+        self.manifest_path = path.join(self.target, 'build_manifest.json')
+        self.input_path = path.join(self.temp_dir, 'input.txt')
+        self.output_path = path.join(self.target, 'output.txt')
+        self._write(self.input_path, 'abcd')
+        self._write(self.output_path, 'built')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, filepath, text):
+        with open(filepath, 'w') as f:
+            f.write(text)
+
+    def _load(self):
+        return tool_utils.BuildManifest(self.manifest_path)
+
+    def _build(self, manifest):
+        """Records the output as built from the input, returning the inputs
+        hash."""
+        inputs_hash = manifest.inputs_hash([self.input_path], ['values'])
+        manifest.record(self.output_path, inputs_hash)
+        return inputs_hash
+
+    def _is_current(self, manifest):
+        return manifest.is_current(
+            self.output_path,
+            manifest.inputs_hash([self.input_path], ['values']))
+
+    def test_record_and_reload(self):
+        manifest = self._load()
+        self.assertFalse(self._is_current(manifest))
+        self._build(manifest)
+        self.assertTrue(self._is_current(manifest))
+        # other values make other inputs
+        self.assertFalse(manifest.is_current(
+            self.output_path, manifest.inputs_hash([self.input_path], [])))
+
+        manifest.save()
+        self.assertTrue(self._is_current(self._load()))
+
+        os.remove(self.output_path)
+        self.assertFalse(self._is_current(self._load()))
+
+    def test_moved_target(self):
+        manifest = self._load()
+        self._build(manifest)
+        manifest.save()
+
+        moved_target = path.join(self.temp_dir, 'moved')
+        shutil.move(self.target, moved_target)
+        self.output_path = path.join(moved_target, 'output.txt')
+        self.assertTrue(self._is_current(tool_utils.BuildManifest(
+            path.join(moved_target, 'build_manifest.json'))))
+
+    def test_changed_content_with_same_size_and_mtime(self):
+        # whole seconds, so that setting the time back is exact
+        os.utime(self.input_path, (1000000000, 1000000000))
+        manifest = self._load()
+        self._build(manifest)
+        manifest.save()
+
+        st = os.stat(self.input_path)
+        self._write(self.input_path, 'abce')
+        os.utime(self.input_path, (1000000000, 1000000000))
+        self.assertEqual(st.st_size, os.stat(self.input_path).st_size)
+        self.assertEqual(st.st_mtime, os.stat(self.input_path).st_mtime)
+        self.assertFalse(self._is_current(self._load()))
+
+    def test_changed_mtime_with_same_content(self):
+        manifest = self._load()
+        inputs_hash = self._build(manifest)
+        manifest.save()
+
+        st = os.stat(self.input_path)
+        os.utime(self.input_path, (st.st_atime, st.st_mtime + 10))
+        manifest = self._load()
+        self.assertTrue(self._is_current(manifest))
+        # the hash is stored under the new stamp, so the file isn't read again
+        manifest.save()
+        entry = self._load().file_hashes[path.abspath(self.input_path)]
+        self.assertEqual(os.stat(self.input_path).st_mtime, entry[0][1])
+        self.assertEqual(
+            inputs_hash, manifest.inputs_hash([self.input_path], ['values']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+# Copyright 2017 Google Inc. All rights reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for ttc_utils.py."""
+
+from os import path
+import shutil
+import tempfile
+import unittest
+
+from fontTools.ttLib import newTable
+from fontTools.ttLib import TTFont
+
+from nototools import ttc_utils
+from hb_input_test import make_font
+
+
+class TTCBuildTest(unittest.TestCase):
+    """Test class for ttc_utils.ttcfile_build."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.font_files = []
+        for ps_name in [u'Test-Regular', u'Test-Bold']:
+            font = make_font('')
+            font['name'] = newTable('name')
+            font['name'].names = []
+            font['name'].setName(ps_name, 6, 3, 1, 0x409)
+            font_file = path.join(self.temp_dir, ps_name + '.ttf')
+            font.save(font_file)
+            self.font_files.append(font_file)
+        self.ttc_file = path.join(self.temp_dir, 'ttc', 'Test.ttc')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_build(self):
+        ttc_utils.ttcfile_build(self.ttc_file, self.font_files)
+        self.assertEqual(['Test-Regular.ttf', 'Test-Bold.ttf'],
+                         ttc_utils.ttcfile_filenames(self.ttc_file))
+        for font_number, font_file in enumerate(self.font_files):
+            font = TTFont(font_file)
+            ttc_font = TTFont(self.ttc_file, fontNumber=font_number)
+            self.assertEqual(sorted(font.reader.keys()),
+                             sorted(ttc_font.reader.keys()))
+            for tag in font.reader.keys():
+                self.assertEqual(font.reader[tag], ttc_font.reader[tag])
+
+    def test_shared_tables(self):
+        ttc_utils.ttcfile_build(self.ttc_file, self.font_files)
+        with open(self.ttc_file, 'rb') as f:
+            ttc = ttc_utils.TTCFile(f.read())
+        regular, bold = ttc.fonts
+        shared = set(regular.tables) & set(bold.tables)
+        self.assertEqual(
+            set(['head', 'name']),
+            set(ttc.tables[i].tag for i in regular.tables) -
+            set(ttc.tables[i].tag for i in shared))
+
+    def test_build_from_ttc(self):
+        ttc_utils.ttcfile_build(self.ttc_file, self.font_files)
+        ttc_copy = path.join(self.temp_dir, 'copy.ttc')
+        ttc_utils.ttcfile_build(ttc_copy, [self.ttc_file])
+        with open(self.ttc_file, 'rb') as f, open(ttc_copy, 'rb') as g:
+            self.assertEqual(f.read(), g.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,6 +18,9 @@
 
 __author__ = 'roozbeh@google.com (Roozbeh Pournader)'
 
+import os
+import shutil
+import tempfile
 import unittest
 
 from nototools import unicode_data
@@ -111,6 +114,17 @@ class UnicodeDataTest(unittest.TestCase):
         self.assertEqual(unicode_data.age(0x2B820), '8.0')
         self.assertEqual(unicode_data.age(0x104B0), '9.0')
 
+    def test_indic_categories(self):
+        """Tests the indic_*_category methods."""
+        self.assertEqual(
+            unicode_data.indic_syllabic_category(0x0915), 'Consonant')
+        self.assertEqual(
+            unicode_data.indic_syllabic_category(0x0041), 'Other')
+        self.assertEqual(
+            unicode_data.indic_positional_category(0x093F), 'Left')
+        self.assertEqual(
+            unicode_data.indic_positional_category(0x0041), 'NA')
+
     def test_bidi_mirroring_glyph(self):
         """Tests the bidi_mirroring_glyph() method."""
         self.assertEqual(unicode_data.bidi_mirroring_glyph(0x0028), 0x0029)
@@ -155,5 +169,57 @@ class UnicodeDataTest(unittest.TestCase):
             [(0, 31, 'Common'), (32, 32, 'Common')],
             unicode_data._parse_code_ranges(source))
 
+    def test_range_table(self):
+        """Tests the _RangeTable class."""
+        table = unicode_data._RangeTable(
+            [(0x20, 0x2F, 'b'), (0x10, 0x1F, 'a'), (0x30, 0x3F, 'b')])
+        self.assertEqual(
+            [(0x10, 0x1F, 'a'), (0x20, 0x3F, 'b')], list(table.ranges()))
+        self.assertEqual('a', table.get(0x10))
+        self.assertEqual('b', table.get(0x3F))
+        self.assertIsNone(table.get(0x0F))
+        self.assertEqual('x', table.get(0x40, 'x'))
+        self.assertIn(0x25, table)
+        self.assertNotIn(0x40, table)
+        self.assertEqual(range(0x10, 0x40), list(table.codepoints()))
+        with self.assertRaises(ValueError):
+            unicode_data._RangeTable([(0x10, 0x1F, 'a'), (0x1F, 0x20, 'b')])
+
+    def test_cache(self):
+        """Tests rebuilding and reading the on-disk cache."""
+        cache_dir = tempfile.mkdtemp()
+        try:
+            self.assertIsNone(unicode_data._read_cache('blocks', cache_dir))
+            self.assertEqual(cache_dir, unicode_data.rebuild_cache(cache_dir))
+            self.assertEqual(
+                sorted(unicode_data._TABLES),
+                sorted(name[:-len('.pickle')]
+                       for name in os.listdir(cache_dir)))
+            cached_data = unicode_data._read_cache('blocks', cache_dir)
+            self.assertEqual(
+                unicode_data._block_names, cached_data['_block_names'])
+            self.assertEqual('Emoticons', unicode_data.block(0x1F600))
+
+            # a cache from another version of the module is stale
+            unicode_data._CACHE_VERSION += 1
+            try:
+                self.assertIsNone(
+                    unicode_data._read_cache('blocks', cache_dir))
+            finally:
+                unicode_data._CACHE_VERSION -= 1
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_loaded_tables(self):
+        """Tests that tables are loaded along with their dependencies."""
+        unicode_data.script(0x41)
+        loaded = [t[0] for t in unicode_data.loaded_tables()]
+        self.assertLess(
+            loaded.index('property_value_aliases'), loaded.index('scripts'))
+        unicode_data.load_data()
+        self.assertEqual(
+            sorted(unicode_data._TABLES),
+            sorted(t[0] for t in unicode_data.loaded_tables()))
+
 if __name__ == '__main__':
     unittest.main()